@@ -0,0 +1,177 @@
+"""Benchmark for building whole sites, generated with creator.create_project/create_note.
+
+For each note count, a synthetic site is generated (notes of a given size, plus static assets) and built:
+    - cold: no build state at all i.e. no note cache, manifest, compiled templates or output directory
+    - warm: built again right after, re-using all of the above (but still re-rendering every page)
+
+Each build runs in a process of its own, so its peak RSS (and that of its worker processes) is measured on its own.
+Reports wall time, notes/second and peak RSS of each build, and writes them to a JSON file.
+
+Usage:
+    $ python benchmarks/bench_build.py [--notes 100 10000 100000] [--note-size 2] [--assets 20] [--asset-size 100]
+        [--jobs N] [--output bench_build.json]
+"""
+
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from json import dumps, loads
+from os import cpu_count, urandom
+from pathlib import Path
+from platform import platform, python_version
+from resource import RUSAGE_CHILDREN, RUSAGE_SELF, getrusage
+from shutil import rmtree
+from subprocess import run
+from sys import executable, platform as sys_platform
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from rupantar.sohoj.builder import build_project
+from rupantar.sohoj.creator import create_note, create_project
+
+PARAGRAPH = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Maecenas vel velit iaculis, "
+    "pretium nulla quis, *malesuada* nisl. Sed **auctor** [ligula](https://example.com) "
+    "a `mauris` tincidunt, sit amet dictum urna fermentum.\n\n"
+)
+SECTION = (
+    "## Section {num}\n\n"
+    + PARAGRAPH * 2
+    + "- First item\n- Second item\n- Third item\n\n"
+    + "```python\nprint('hello {num}')\n```\n\n"
+    + "> Quoted text, for good measure.\n\n"
+)
+
+
+def note_body(num, size_kib):
+    """Markdown of roughly the given size, with a mix of what notes usually have."""
+    body = f"# Note {num}\n\n" + PARAGRAPH
+    section = 0
+    while len(body) < size_kib * 1024:
+        body += SECTION.format(num=section)
+        section += 1
+    return body
+
+
+def generate_site(project, notes, note_size, assets, asset_size):
+    """Generate a rupantar project with the given number of notes and static assets."""
+    with redirect_stdout(StringIO()):
+        create_project(str(project), [None, None, None])
+        notes_path = Path(project, "content", "notes")
+        for note in notes_path.glob("*.md"):
+            note.unlink()
+        for num in range(notes):
+            create_note(project, f"note{num}", bool(num % 2))
+            note = Path(notes_path, f"note{num}.md")
+            note.write_text(
+                note.read_text().replace('"Title"', f'"Title {num}"').rstrip()
+                + "\n\n"
+                + note_body(num, note_size)
+            )
+    static_path = Path(project, "static")
+    for num in range(assets):
+        # Mostly images, which are the bulk of most sites' assets
+        if num % 4:
+            Path(static_path, f"image{num}.png").write_bytes(urandom(asset_size * 1024))
+        else:
+            Path(static_path, f"style{num}.css").write_text(
+                "p { margin: 0; }\n" * (asset_size * 64)
+            )
+
+
+def get_peak_rss_mib(who):
+    # KiB on Linux, bytes on macOS
+    peak = getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys_platform == "darwin" else peak / 1024
+
+
+def measure(project, jobs):
+    """Build a project in this process, report as JSON on stdout."""
+    with redirect_stdout(StringIO()):
+        start_time = perf_counter()
+        build_project(project, None, jobs=jobs)
+        wall_time = perf_counter() - start_time
+    if not Path(project, "public", "index.html").exists():
+        raise SystemExit(f"Build of {project} failed")
+    print(
+        dumps(
+            {
+                "wall_time": wall_time,
+                "peak_rss_mib": get_peak_rss_mib(RUSAGE_SELF),
+                "peak_worker_rss_mib": get_peak_rss_mib(RUSAGE_CHILDREN),
+            }
+        )
+    )
+
+
+def build_in_subprocess(project, jobs):
+    command = [executable, __file__, "--measure", str(project)]
+    if jobs is not None:
+        command += ["--jobs", str(jobs)]
+    result = run(command, capture_output=True, text=True, check=True)
+    return loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--notes", type=int, nargs="+", default=[100, 10000], help="Note counts"
+    )
+    parser.add_argument("--note-size", type=float, default=2, help="KiB per note")
+    parser.add_argument("--assets", type=int, default=20, help="Static assets")
+    parser.add_argument("--asset-size", type=int, default=100, help="KiB per asset")
+    parser.add_argument("--jobs", type=int, help="Worker processes. Default all CPUs")
+    parser.add_argument(
+        "--output", default="bench_build.json", help="JSON file to write results to"
+    )
+    parser.add_argument("--measure", help="Internal: build this project and report")
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.jobs)
+        return
+
+    results = []
+    print(
+        f"{'notes':>8} {'mode':>5} {'wall s':>9} {'notes/s':>10} {'RSS MiB':>9} {'workers MiB':>12}"
+    )
+    with TemporaryDirectory() as work_dir:
+        for notes in args.notes:
+            project = Path(work_dir, f"site{notes}")
+            generate_site(project, notes, args.note_size, args.assets, args.asset_size)
+            for mode in ("cold", "warm"):
+                if mode == "cold":
+                    rmtree(Path(project, ".rupantar"), ignore_errors=True)
+                    rmtree(Path(project, "public"), ignore_errors=True)
+                result = {
+                    "notes": notes,
+                    "mode": mode,
+                    **build_in_subprocess(project, args.jobs),
+                }
+                result["notes_per_second"] = notes / result["wall_time"]
+                results.append(result)
+                print(
+                    f"{notes:>8} {mode:>5} {result['wall_time']:>9.2f} {result['notes_per_second']:>10,.0f}"
+                    f" {result['peak_rss_mib']:>9.1f} {result['peak_worker_rss_mib']:>12.1f}"
+                )
+            rmtree(project)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": python_version(),
+        "platform": platform(),
+        "cpus": cpu_count(),
+        "parameters": {
+            "note_size_kib": args.note_size,
+            "assets": args.assets,
+            "asset_size_kib": args.asset_size,
+            "jobs": args.jobs,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(dumps(report, indent=2))
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
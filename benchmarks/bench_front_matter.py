@@ -0,0 +1,85 @@
+"""Micro-benchmark for parsing the front matter of notes.
+
+Compares the throughput, in notes/second, of:
+    - before: line-by-line splitting + PyYAML's pure-Python safe_load (what parse_md used to do)
+    - libyaml: same, but loading with the C-accelerated loader only
+    - after: builder.parse_front_matter i.e. the flat 'key : value' fast path, falling back to full YAML
+
+Usage:
+    $ python benchmarks/bench_front_matter.py [--notes 5000] [--repeat 5]
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from timeit import repeat
+from yaml import load, safe_load
+
+from rupantar.sohoj.builder import FrontMatterLoader, parse_front_matter
+
+# Same front matter as generated by creator.create_note()
+NOTE_TEMPLATE = """---
+title : "Title {num}"
+subtitle : "Subtitle"
+showInHome : {show}
+date : {date}
+---
+
+# Note {num}
+
+Lorem ipsum dolor sit amet, consectetur adipiscing elit. Maecenas vel velit iaculis, pretium nulla quis.
+"""
+
+
+def split_front_matter(md_text):
+    yaml_lines = []
+    lines = iter(md_text.splitlines(keepends=True))
+    for line in lines:
+        if line.startswith("---"):
+            break
+    for line in lines:
+        if line.startswith("---"):
+            break
+        yaml_lines.append(line)
+    return "".join(yaml_lines), "".join(lines).strip()
+
+
+def parse_before(md_text):
+    ym_meta, contents = split_front_matter(md_text)
+    return safe_load(ym_meta), contents
+
+
+def parse_libyaml(md_text):
+    ym_meta, contents = split_front_matter(md_text)
+    return load(ym_meta, Loader=FrontMatterLoader), contents
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=5000, help="Number of notes per run")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of runs, best is kept"
+    )
+    args = parser.parse_args()
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    notes = [
+        NOTE_TEMPLATE.format(num=num, show=bool(num % 2), date=today)
+        for num in range(args.notes)
+    ]
+    print(f"Front matter loader: {FrontMatterLoader.__name__}")
+    results = {}
+    for name, parse in (
+        ("before", parse_before),
+        ("libyaml", parse_libyaml),
+        ("after", parse_front_matter),
+    ):
+        best = min(
+            repeat(lambda: [parse(note) for note in notes], number=1, repeat=args.repeat)
+        )
+        results[name] = args.notes / best
+        print(f"{name:>8}: {results[name]:>12,.0f} notes/s")
+    print(f"speedup (after vs before): {results['after'] / results['before']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark for the request throughput of the `serve` web server.
+
+Compares, in requests/second:
+    - before: socketserver.TCPServer + SimpleHTTPRequestHandler i.e. one connection at a time, over HTTP/1.0
+    - after: server.create_web_server i.e. a pool of worker threads, over HTTP/1.1 persistent connections
+
+Each is measured with a number of concurrent clients repeatedly fetching a small page, a stylesheet and an image,
+and again while one extra client holds a connection open without sending anything (eg: a stalled browser).
+The server runs in a process of its own, so it does not compete with the clients for the GIL.
+
+Usage:
+    $ python benchmarks/bench_server.py [--clients 8] [--duration 3] [--workers 16]
+"""
+
+from argparse import ArgumentParser
+from functools import partial
+from http.client import HTTPConnection
+from http.server import SimpleHTTPRequestHandler
+from multiprocessing import Event, Process
+from pathlib import Path
+from socket import create_connection
+from socketserver import TCPServer
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter, sleep
+
+from rupantar.sohoj.server import create_web_server
+
+FILES = {
+    "index.html": b"<html><body>"
+    + b"<p>Lorem ipsum dolor sit amet.</p>" * 300
+    + b"</body></html>",
+    "style.css": b"p { margin: 0; }\n" * 300,
+    "logo.png": bytes(100 * 1024),
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(variant, port, serving_dir, workers, ready):
+    if variant == "before":
+        TCPServer.allow_reuse_address = True
+        httpd = TCPServer(
+            ("127.0.0.1", port), partial(QuietHandler, directory=serving_dir)
+        )
+    else:
+        httpd = create_web_server("127.0.0.1", port, serving_dir, workers=workers)
+    ready.set()
+    httpd.serve_forever()
+
+
+def client(port, deadline, counts, index):
+    connection = HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        while perf_counter() < deadline:
+            for name in FILES:
+                connection.request("GET", f"/{name}")
+                connection.getresponse().read()
+                counts[index] += 1
+    except OSError:
+        # Server went away while this client was stuck
+        pass
+    connection.close()
+
+
+def measure(variant, port, serving_dir, clients, duration, workers, stalled):
+    ready = Event()
+    server = Process(target=serve, args=(variant, port, serving_dir, workers, ready))
+    server.start()
+    ready.wait()
+    sleep(0.2)
+    # Connected, but never sends a request
+    staller = create_connection(("127.0.0.1", port)) if stalled else None
+    counts = [0] * clients
+    deadline = perf_counter() + duration
+    threads = [
+        Thread(target=client, args=(port, deadline, counts, index), daemon=True)
+        for index in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # Clients stuck behind the stalled connection are left behind
+        thread.join(duration + 1)
+    server.terminate()
+    server.join()
+    if staller is not None:
+        staller.close()
+    return sum(counts) / duration
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds per run")
+    parser.add_argument("--workers", type=int, default=16, help="Server worker threads")
+    parser.add_argument("--port", type=int, default=8799, help="Port to serve at")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as serving_dir:
+        for name, contents in FILES.items():
+            Path(serving_dir, name).write_bytes(contents)
+        print(f"{args.clients} clients, {args.duration}s per run")
+        for variant in ("before", "after"):
+            for stalled in (False, True):
+                rate = measure(
+                    variant,
+                    args.port,
+                    serving_dir,
+                    args.clients,
+                    args.duration,
+                    args.workers,
+                    stalled,
+                )
+                label = f"{variant} (+1 stalled client)" if stalled else variant
+                print(f"{label:<28} {rate:>10,.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
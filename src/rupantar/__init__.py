@@ -1,4 +1,9 @@
-import importlib.metadata
+def __getattr__(name: str) -> str:
+    # Get version # of package as per pyproject.toml file, on first use only (https://peps.python.org/pep-0562/)
+    # importlib.metadata takes a while to import, and most commands never need the version
+    if name == "__version__":
+        from importlib.metadata import version
 
-# Get version # of package as per pyproject.toml file
-__version__ = importlib.metadata.version("rupantar")
+        globals()["__version__"] = version("rupantar")
+        return globals()["__version__"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
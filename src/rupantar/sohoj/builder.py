@@ -1,17 +1,104 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from shutil import copytree, rmtree
-from os import makedirs
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from io import StringIO
+from itertools import islice
+from multiprocessing import get_context
+from multiprocessing.util import Finalize
+from os import cpu_count, getpid, makedirs, replace
 from pathlib import Path
 from logging import getLogger
-from yaml import safe_load
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from datetime import date
+from re import compile as re_compile
+from yaml import load
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+
+# Use the (much faster) libyaml-based loader, if PyYAML was built with it
+# https://pyyaml.org/wiki/PyYAMLDocumentation#loading-yaml
+try:
+    from yaml import CSafeLoader as FrontMatterLoader
+except ImportError:
+    from yaml import SafeLoader as FrontMatterLoader
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    select_autoescape,
+)
 from markdown2 import markdown
+from rupantar.sohoj.cache import DEFAULT_CACHE_MAX_MB, NoteCache, open_note_cache
+from rupantar.sohoj.compressor import compress_store, compress_tree
 from rupantar.sohoj.configger import Config
-from rupantar.sohoj.utils import get_func_exec_time, resolve_path
+from rupantar.sohoj.indexer import ContentIndex
+from rupantar.sohoj.manifest import BuildManifest
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.pipeline import BackgroundWriter, prefetch
+from rupantar.sohoj.profiler import (
+    BuildProfile,
+    activate,
+    deactivate,
+    dump_stream,
+    get_active_profile,
+    timed,
+)
+from rupantar.sohoj.swapper import (
+    get_generation_paths,
+    get_manifest_name,
+    get_staging_generation,
+    swap_in,
+)
+from rupantar.sohoj.syncer import prune_tree, sync_tree
+from rupantar.sohoj.utils import get_func_exec_time, get_state_dir, resolve_path
 
 logger = getLogger()
 
+# A line of flat 'key : value' front matter, as generated by creator.create_note()
+FLAT_FRONT_MATTER_LINE = re_compile(r"([A-Za-z_][\w-]*)[ \t]*:[ \t]+(.+?)[ \t]*")
+# Pages of a home page split into pages, after the first one (see get_listing_page())
+LISTING_PAGE = re_compile(r"page/[0-9]+/index\.html")
+# Marks the end of a note's excerpt in the RSS feed, eg: after it's opening paragraph
+EXCERPT_MARKER = "<!--more-->"
+DEFAULT_EXCERPT_LENGTH = 500
+HTML_TAG = re_compile(r"<[^>]*>")
+# An opening or closing HTML element tag (not a comment), see close_open_tags()
+HTML_ELEMENT_TAG = re_compile(r"<(/?)([A-Za-z][A-Za-z0-9]*)\b[^>]*?(/?)>")
+# Elements that never have a closing tag
+HTML_VOID_ELEMENTS = frozenset(
+    "area base br col embed hr img input link meta source track wbr".split()
+)
+PARTIAL_ENTITY = re_compile(r"&[#\w]*$")
+# Quoted strings without any escapes/nested quotes in them
+QUOTED_SCALAR = re_compile(r'"([^"\\]*)"|\'([^\']*)\'')
+DECIMAL_INT = re_compile(r"[-+]?(0|[1-9][0-9]*)")
+ISO_DATE = re_compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+# A mapping value/comment indicator within a plain (unquoted) scalar
+PLAIN_SCALAR_BREAK = re_compile(r":[ \t]|[ \t]#")
+# Characters that a plain (unquoted) YAML scalar may not start with
+YAML_INDICATORS = frozenset("-?:,[]{}#&*!|>'\"%@`")
+YAML_RESOLVER = Resolver()
+YAML_BOOL_VALUES = {
+    "yes": True,
+    "no": False,
+    "true": True,
+    "false": False,
+    "on": True,
+    "off": False,
+}
+
+# Size of the write buffer when streaming a page to it's file, i.e. the most of a page held in memory at once
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# Size of the batches converted notes are stored in the note cache in, i.e. the most converted notes held in memory at once
+SPILL_BATCH_SIZE = 256
+
+# Project data of a build worker process, set up once per process by init_build_worker()
+_worker_project_data = None
+# Note cache of a build worker process, to load the converted notes sent to it from
+_worker_notes_cache = None
+
 
 # https://docs.python.org/3/library/dataclasses.html#module-dataclasses
 @dataclass(slots=True)
@@ -21,10 +108,39 @@ class ProjectData:
     Attributes:
         project_name (str): Name of rupantar project. Relative path.
         config (Config): The rupantar config object.
+        environment (Environment): The Jinja2 environment shared by every page of a build. Created on first use if not provided.
+        site_context (SiteContext): The site-wide render context, registered as globals of the environment. Loaded on first use if not provided.
+        output_path (Path): The directory to write pages to. Defaults to the output directory (config.home_path) within the project.
+        store (MemoryStore): Keep pages in this in-memory output directory, instead of writing them to disk. Optional.
+        notes_path (Path): The notes directory (eg: content/notes/). Pages of notes in its sub-directories go into the same sub-directories of the output directory. Optional.
     """
 
     project_name: str
     config: Config
+    environment: Environment | None = None
+    site_context: SiteContext | None = None
+    output_path: Path | None = None
+    store: MemoryStore | None = None
+    notes_path: Path | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class SiteContext:
+    """Store the render context that is identical for every page of a site i.e. config values, header and footer.
+
+    Computed once per build instead of once per page.
+
+    Attributes:
+        config (dict[str]): The config values, as a dictionary.
+        header (str): The header, converted to HTML.
+        footer (str): The footer, converted to HTML.
+        sources (tuple): The (path, modification time, size) of each file the context was computed from. Used to tell if it is outdated.
+    """
+
+    config: dict[str]
+    header: str
+    footer: str
+    sources: tuple[tuple[str, int, int], ...]
 
 
 @dataclass(slots=True)
@@ -35,15 +151,258 @@ class PageData:
         page_template (str): The Jinja2 template to use for rendering this page.
         posts (list[str]): The list of posts to include in the new page.
         page_metadata (dict[str]): The front matter-based details to be included. Eg: title, description, etc.
-        md_content (str): The content of the page, in markdown.
+        md_content (str): The content of the page, in markdown. Not needed if the page is of an already converted post.
         out_filename (str): The name of the file to create i.e. new page name.
+        post (Post, optional): The already converted note, if this is a note's page.
+        page_num (int): Number of this page, for a home page split into pages (see paginate()). Defaults to 1.
+        page_count (int): Number of pages the home page is split into. Defaults to 1.
     """
 
     page_template: str
     posts: list[str]
     page_metadata: dict[str]
-    md_content: str
+    md_content: str | None
     out_filename: str
+    post: Post | None = None
+    page_num: int = 1
+    page_count: int = 1
+
+
+@dataclass(slots=True)
+class Post:
+    """Store a note that has been converted to HTML, once, for use by every page that shows it.
+
+    i.e. the note's own page, the home page listing and the RSS feed.
+    Front matter values can be looked up by key, same as with a dictionary, so templates can access them as eg: post.title
+    Other than url and note, the attributes are private, so they never hide a front matter value of the same name (eg: post._source).
+
+    Only the front matter is kept in memory for the whole build. Once stored in the note cache, the converted HTML is dropped (see spill())
+    and loaded back from there whenever used (eg: by a template, as post.note), so memory usage grows with the number of notes, not their size.
+
+    Attributes:
+        _metadata (dict[str]): The front matter-based details of the note. Eg: title, date, etc.
+        _html (str, optional): The contents of the note, converted to HTML. None once dropped from memory.
+        url (str): The path of the note's page on the site. Eg: /example_blog.html
+        _content_hash (str): Hash of the note's contents, it's key in the note cache.
+        _source (str): The path to the note's markdown file, converted again should its HTML no longer be in the note cache.
+        _notes_cache (NoteCache, optional): Where to load the converted HTML from, once dropped from memory.
+    """
+
+    _metadata: dict[str]
+    _html: str | None
+    url: str
+    _content_hash: str = ""
+    _source: str = ""
+    _notes_cache: NoteCache | None = None
+
+    @property
+    def note(self) -> str:
+        """The contents of the note, converted to HTML. Loaded from the note cache each time, if not in memory."""
+        if self._html is not None:
+            return self._html
+        note_html = (
+            None
+            if self._notes_cache is None
+            else self._notes_cache.get_html(self._content_hash)
+        )
+        if note_html is None:
+            # Eg: evicted from the note cache since, by another build
+            logger.warning(f"Converted note not found, converting again: {self._source}")
+            post = render_note(self._source)
+            note_html = "" if post is None else post._html
+        return note_html
+
+    def spill(self, notes_cache: NoteCache) -> None:
+        """Drop the converted HTML from memory, to be loaded from the note cache (which must have it already) whenever used.
+
+        Args:
+            notes_cache (NoteCache): The note cache.
+        """
+        self._notes_cache = notes_cache
+        self._html = None
+
+    # Same as the note's dictionary used to be, with it's url and note set over the front matter
+    def __getitem__(self, key: str):
+        if key == "url":
+            return self.url
+        if key == "note":
+            return self.note
+        return self._metadata[key]
+
+    def get(self, key: str, default=None):
+        if key in ("url", "note"):
+            return self[key]
+        return self._metadata.get(key, default)
+
+    # Sent to and from worker processes without the note cache (and it's database connection)
+    def __getstate__(self) -> tuple:
+        return (self._metadata, self._html, self.url, self._content_hash, self._source)
+
+    def __setstate__(self, state: tuple) -> None:
+        self._metadata, self._html, self.url, self._content_hash, self._source = state
+        self._notes_cache = None
+
+
+@dataclass(slots=True)
+class BuildSession:
+    """Store the state kept warm between the builds of a long-running process (eg: `serve`), so that a rebuild only re-does what changed.
+
+    Passed to build_project(), which fills it in and re-uses it on the next call.
+
+    Attributes:
+        project_data (ProjectData): Project data of the last build, along with its Jinja2 environment (and compiled templates) and site-wide render context.
+        manifest (BuildManifest): Build manifest of the last build, along with its memoized file hashes.
+        notes (dict): Mapping of each note's manifest key to its content hash and converted note, as of the last build.
+        content_index (ContentIndex): Index of the notes directory, refreshed with the paths changed since the last build (see indexer.py).
+    """
+
+    project_data: ProjectData | None = None
+    manifest: BuildManifest | None = None
+    notes: dict[str, tuple[str, Post]] = field(default_factory=dict)
+    content_index: ContentIndex | None = None
+
+
+@dataclass(slots=True)
+class NoteTask:
+    """Store what needs to be done to build a note.
+
+    Attributes:
+        md_file_path (Path): The path to the note's markdown file.
+        with_page (bool): Whether the note's page needs to be (re-)created.
+        content_hash (str): Hash of the note's contents.
+        post (Post, optional): The converted note, if found in the note cache. Converted from the markdown file otherwise.
+    """
+
+    md_file_path: Path
+    with_page: bool
+    content_hash: str
+    post: Post | None = None
+
+
+@dataclass(slots=True)
+class BuildInputs:
+    """Store the content hashes of the inputs of each kind of page, see BuildManifest.hash_inputs().
+
+    Attributes:
+        note_page (dict): Inputs of every note's page, other than the note itself (eg: config, header, footer, note template).
+        listing (dict): Inputs of both the home page and the RSS feed (eg: config, header, footer, home page content and every note).
+        home (dict): Inputs of the home page, the listing ones along with the home page template.
+        feed (dict): Inputs of the RSS feed, the listing ones along with the feed template.
+    """
+
+    note_page: dict[str, str]
+    listing: dict[str, str]
+    home: dict[str, str]
+    feed: dict[str, str]
+
+
+def load_flat_scalar(value: str) -> tuple[bool, object]:
+    """Load a single YAML scalar, but only if it is a simple one i.e. a string, boolean, null, decimal integer or date.
+
+    Args:
+      value(str): The scalar, as written in the front matter.
+
+    Returns:
+      tuple: Whether the scalar could be loaded, and the loaded value.
+
+    """
+    quoted = QUOTED_SCALAR.fullmatch(value)
+    if quoted:
+        return True, quoted.group(1) if quoted.group(1) is not None else quoted.group(2)
+    if (
+        value[0] in YAML_INDICATORS
+        or value[-1] == ":"
+        or PLAIN_SCALAR_BREAK.search(value)
+    ):
+        return False, None
+
+    # Same implicit type resolution (eg: 'True' -> bool) as PyYAML would apply
+    tag = YAML_RESOLVER.resolve(ScalarNode, value, (True, False))
+    if tag == "tag:yaml.org,2002:str":
+        return True, value
+    if tag == "tag:yaml.org,2002:bool":
+        return True, YAML_BOOL_VALUES[value.lower()]
+    if tag == "tag:yaml.org,2002:null":
+        return True, None
+    if tag == "tag:yaml.org,2002:int" and DECIMAL_INT.fullmatch(value):
+        return True, int(value)
+    if tag == "tag:yaml.org,2002:timestamp" and ISO_DATE.fullmatch(value):
+        return True, date.fromisoformat(value)
+    return False, None
+
+
+def load_front_matter(ym_meta: str) -> dict[str] | None:
+    """Load the YAML front matter of a markdown file.
+
+    Front matter made up of only flat 'key : value' lines with simple values (like the one generated by `rupantar new`)
+    is loaded directly, without going through a full YAML parser. Anything more complex is loaded with PyYAML,
+    using the C-accelerated libyaml loader if it is available, as is any value left empty. The result is the same either way.
+
+    Args:
+      ym_meta(str): The front matter, without the '---' lines.
+
+    Returns:
+      dict: The metadata. None if the front matter is empty.
+
+    Raises:
+      YAMLError: If the front matter is not valid YAML.
+
+    """
+    post_detail = {}
+    for line in ym_meta.split("\n"):
+        if not line.strip():
+            continue
+        flat_line = FLAT_FRONT_MATTER_LINE.fullmatch(line)
+        if flat_line is None:
+            break
+        key, value = flat_line.groups()
+        # Eg: 'key :   ', an empty value is null to YAML, not whitespace
+        value = value.strip()
+        if not value:
+            break
+        key_loaded, key = load_flat_scalar(key)
+        value_loaded, value = load_flat_scalar(value)
+        if not (key_loaded and value_loaded and isinstance(key, str)):
+            break
+        post_detail[key] = value
+    else:
+        return post_detail or None
+
+    # Not flat, fallback to a full YAML parse
+    return load(ym_meta, Loader=FrontMatterLoader)
+
+
+def parse_front_matter(md_text: str) -> tuple[dict(str), str]:
+    """Split the contents of a markdown file into it's front matter metadata and the rest of the page contents.
+
+    Args:
+      md_text(str): The contents of the markdown file.
+
+    Returns:
+      tuple: A tuple containing the post's metadata and the page contents.
+
+    """
+    yaml_lines, ym_meta, md_contents = [], "", ""
+
+    lines = iter(StringIO(md_text))
+    for line in lines:
+        if line.startswith("---"):
+            break
+
+    for line in lines:
+        if line.startswith("---"):
+            break
+        yaml_lines.append(line)
+
+    ym_meta = "".join(yaml_lines)
+    md_contents = "".join(lines)
+
+    post_detail = load_front_matter(ym_meta)
+    logger.debug("Metadata: %s", post_detail)
+    # strip() to remove leading and trailing whitespace off of contents
+    page_contents = md_contents.strip()
+    logger.debug("Page contents: %s", page_contents)
+    return post_detail, page_contents
 
 
 @get_func_exec_time
@@ -74,27 +433,8 @@ def parse_md(md_file_path: str) -> tuple[dict(str), str] | OSError | FileNotFoun
         md_path = resolve_path(md_file_path, strict=True)
         with open(md_path) as infile:
             logger.info(f"Parsing file: {md_file_path}")
-            yaml_lines, ym_meta, md_contents = [], "", ""
-
-            lines = iter(infile)
-            for line in lines:
-                if line.startswith("---"):
-                    break
-
-            for line in lines:
-                if line.startswith("---"):
-                    break
-                yaml_lines.append(line)
-
-            ym_meta = "".join(yaml_lines)
-            md_contents = "".join(lines)
-
-        post_detail = safe_load(ym_meta)
-        logger.debug(f"Metadata: {post_detail}")
-        # strip() to remove leading and trailing whitespace off of contents
-        page_contents = md_contents.strip()
-        logger.debug(f"Page contents: {page_contents}")
-        return post_detail, page_contents
+            md_text = infile.read()
+        return parse_front_matter(md_text)
 
     except FileNotFoundError as err:
         logger.exception(f"Could not find markdown file: {md_file_path}\n {err}")
@@ -105,6 +445,81 @@ def parse_md(md_file_path: str) -> tuple[dict(str), str] | OSError | FileNotFoun
         )
 
 
+@get_func_exec_time
+def render_note(
+    md_file_path: str | Path,
+    md_text: str | None = None,
+    notes_path: str | Path | None = None,
+) -> Post | None:
+    """Parse a given note and convert its contents to HTML.
+
+    Args:
+      md_file_path(str or Path): The path to the note's markdown file.
+      md_text(str, optional): The contents of the markdown file, if already read. Read from md_file_path otherwise.
+      notes_path(str or Path, optional): The notes directory, for the URL of a note in a sub-directory of it. See get_note_url().
+
+    Returns:
+      Post: The converted note. None if the note could not be parsed or has no front matter.
+
+    """
+    note = get_profiled_note(md_file_path, notes_path)
+    if md_text is None:
+        with timed("read", note):
+            md_text = md_to_str(md_file_path)
+        if md_text is None:
+            return None
+    with timed("front_matter", note):
+        post_detail, md_content = parse_front_matter(md_text)
+    if post_detail is None:
+        return None
+    with timed("markdown", note):
+        note_html = markdown(md_content)
+    return Post(
+        post_detail,
+        note_html,
+        get_note_url(md_file_path, notes_path),
+        "",
+        str(md_file_path),
+    )
+
+
+def get_note_url(md_file_path: str | Path, notes_path: str | Path | None = None) -> str:
+    """Get the path of a note's page on the site.
+
+    A note in a sub-directory of the notes directory gets a page in the same sub-directory of the site.
+
+    Args:
+      md_file_path(str or Path): The path to the note's markdown file.
+      notes_path(str or Path, optional): The notes directory. If not provided, the note is taken to be directly in it.
+
+    Returns:
+      str: The path of the note's page. Eg: /example_blog.html or /2024/example_blog.html
+
+    """
+    md_file_path = Path(md_file_path)
+    if notes_path is None or md_file_path.parent == Path(notes_path):
+        return "/" + md_file_path.name.replace(".md", ".html")
+    return "/" + md_file_path.relative_to(notes_path).with_suffix(".html").as_posix()
+
+
+def get_profiled_note(
+    md_file_path: str | Path, notes_path: str | Path | None = None
+) -> str | None:
+    """Get the name a note's timings are recorded under, in the active build profile (see profiler.py).
+
+    Args:
+      md_file_path(str or Path): The path to the note's markdown file.
+      notes_path(str or Path, optional): The notes directory. See get_note_url().
+
+    Returns:
+      str: The name of the note's page. Eg: example_blog.html. None if not profiling.
+
+    """
+    if get_active_profile() is None:
+        return None
+    return get_note_url(md_file_path, notes_path).lstrip("/")
+
+
 @get_func_exec_time
 def md_to_str(md_file: str) -> str:
     """Convert a given Markdown file to plain-text string.
@@ -133,24 +548,131 @@ def md_to_str(md_file: str) -> str:
 
 
 @get_func_exec_time
-def create_page(
-    project_data: ProjectData, page_data: PageData
-) -> str | FileNotFoundError | OSError:
-    """Create a new HTML page from a given Jinja2 template and markdown content.
+def create_environment(
+    project_folder_path: Path | str, bytecode_cache: bool = True
+) -> Environment:
+    """Create the Jinja2 environment used for rendering all the pages of a rupantar project.
 
-    Take a Jinja2 page template, post details, markdown content, and a filename,
-    and create a new page with the given details. The new page will be saved to the same location as the original file.
+    Templates are loaded relative to the project directory. Compiled templates are also kept in an on-disk bytecode cache,
+    within the project's build state directory, so that subsequent builds can skip compiling unchanged templates.
+
+    Note:
+        Reference: https://jinja.palletsprojects.com/en/3.1.x/api/#bytecode-cache
+
+    Args:
+        project_folder_path (Path or str): Absolute path to the rupantar project directory.
+        bytecode_cache (bool): Keep compiled templates in the on-disk bytecode cache. Defaults to True. Not used for in-memory builds, which write nothing to disk.
+
+    Returns:
+        Environment: The Jinja2 environment.
+    """
+    if not bytecode_cache:
+        return Environment(
+            loader=FileSystemLoader(searchpath=project_folder_path),
+            autoescape=select_autoescape(["html", "htm", "xml"]),
+        )
+    bytecode_cache_path = Path(get_state_dir(project_folder_path), "jinja")
+    bytecode_cache_path.mkdir(exist_ok=True)
+    logger.debug(f"Jinja2 bytecode cache location: {bytecode_cache_path}")
+    return Environment(
+        loader=FileSystemLoader(searchpath=project_folder_path),
+        autoescape=select_autoescape(["html", "htm", "xml"]),
+        bytecode_cache=FileSystemBytecodeCache(str(bytecode_cache_path)),
+    )
+
+
+def get_site_context_sources(
+    project_data: ProjectData,
+) -> tuple[tuple[str, int, int], ...]:
+    """Get the current (path, modification time, size) of the files that the site-wide render context is computed from.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+
+    Returns:
+        tuple: A (path, modification time in ns, size) tuple for each of the header and footer files. -1 for both if a file is missing.
+    """
+    sources = []
+    for source_md in (project_data.config.header_md, project_data.config.footer_md):
+        source_path = Path(project_data.project_name, source_md)
+        try:
+            stats = source_path.stat()
+            sources.append((str(source_path), stats.st_mtime_ns, stats.st_size))
+        except FileNotFoundError:
+            sources.append((str(source_path), -1, -1))
+    return tuple(sources)
+
+
+@get_func_exec_time
+def load_site_context(
+    project_data: ProjectData, previous: SiteContext | None = None
+) -> SiteContext:
+    """Compute the site-wide render context of a rupantar project and register it as globals of the project's Jinja2 environment.
+
+    The header and footer files are only read and converted from markdown again if they changed since the previous context was computed.
+    Useful when re-building in watch mode.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        previous (SiteContext, optional): A previously computed context, re-used if still up to date.
+
+    Returns:
+        SiteContext: The site-wide render context.
+    """
+    sources = get_site_context_sources(project_data)
+    # A copy, so a later change to the config is never also made to the context it is compared against
+    config = dict(project_data.config.__dict__)
+    if previous is not None and previous.sources == sources and previous.config == config:
+        logger.debug("Site-wide render context is up to date.")
+        site_context = previous
+    else:
+        site_context = SiteContext(
+            config=config,
+            header=markdown(md_to_str(sources[0][0])),
+            footer=markdown(md_to_str(sources[1][0])),
+            sources=sources,
+        )
+
+    if project_data.environment is None:
+        project_data.environment = create_environment(project_data.project_name)
+    project_data.environment.globals.update(
+        config=site_context.config,
+        page_title=project_data.config.site_title,
+        home=project_data.config.home_md,
+        header=site_context.header,
+        footer=site_context.footer,
+    )
+    project_data.site_context = site_context
+    return site_context
+
+
+@get_func_exec_time
+def compile_templates(environment: Environment, *template_names: str) -> None:
+    """Load and compile the given templates into the environment's template cache, once for the whole build.
+
+    Args:
+        environment (Environment): The Jinja2 environment to load the templates with.
+        *template_names (str): Paths to the templates, relative to the project directory.
+    """
+    for template_name in template_names:
+        environment.get_template(template_name)
+        logger.debug(f"Compiled template: {template_name}")
+
+
+def prepare_page(
+    project_data: ProjectData, page_data: PageData
+) -> tuple[Template, Path, dict[str]] | FileNotFoundError:
+    """Work out everything needed to render a page i.e. the Jinja2 template, where the page goes, and the template's variables.
 
     Args:
         project_date (ProjectData): rupantar project config data
         page_data (PageData): page specific config data
 
     Returns:
-        str: The name of the new static file.
+        tuple: The page's template, the path where the page is to be saved, and the variables to render the template with.
 
     Raises:
-        OSError: If any error opening or writing file.
-        FileNotFoundError:
+        FileNotFoundError: If the rupantar project or the page template does not exist.
 
     """
 
@@ -164,29 +686,42 @@ def create_page(
     logger.info(
         f"Building page using template: {page_data.page_template} from: {page_template_path}"
     )
-    rd_page_template = Environment(
-        loader=FileSystemLoader(searchpath=project_folder_path),
-        autoescape=select_autoescape(["html", "htm", "xml"]),
-    ).get_template(page_data.page_template)
+    if project_data.environment is None:
+        project_data.environment = create_environment(project_folder_path)
+    rd_page_template = project_data.environment.get_template(page_data.page_template)
+    if project_data.site_context is None:
+        load_site_context(project_data)
 
     page_header = project_data.config.title
     post_date = (
         post_data
-    ) = posts_list = last_date = next_page = post_meta = page_subtitle = post_file = ""
-    page_out_path = project_data.config.home_path
+    ) = (
+        posts_list
+    ) = last_date = next_page = prev_page = post_meta = page_subtitle = post_file = ""
+    output_path = project_data.output_path or Path(
+        project_folder_path, project_data.config.home_path
+    )
+    page_out_path = output_path
 
     if output_filename == "index.html":
         post_file = page_data.out_filename
         posts_list = page_data.posts
-        page_out_path = Path(project_folder_path, project_data.config.home_path)
+        page_out_path = output_path
+        if page_data.page_num < page_data.page_count:
+            next_page = get_listing_url(page_data.page_num + 1)
+        if page_data.page_num > 1:
+            prev_page = get_listing_url(page_data.page_num - 1)
+            if project_data.store is None:
+                makedirs(Path(page_out_path, post_file).parent, exist_ok=True)
     elif output_filename.endswith(".html"):
         post_file = page_data.out_filename
         posts_list = page_data.posts
     elif output_filename.endswith(".xml"):
         post_file = page_data.out_filename
         posts_list = page_data.posts
-        page_out_path = Path(project_folder_path, project_data.config.home_path)
-        last_date = posts_list[0].get("date")
+        page_out_path = output_path
+        # Eg: a feed limited to posts shown on the home page, with none of them shown there
+        last_date = posts_list[0].get("date") if posts_list else date.today()
     elif page_data.page_metadata is None:
         logger.info(f"Converting {output_file} to .html format")
         post_file = output_filename.replace(".md", ".html")
@@ -197,150 +732,1397 @@ def create_page(
         post_date = page_data.page_metadata.get("date")
         post_meta = page_data.page_metadata.get("meta")  # XD
         # post_data = filename.split('/')
-        page_out_path = Path(
-            project_folder_path, project_data.config.home_path
-        )  # Don't resolve just yet
+        page_out_path = output_path  # Don't resolve just yet
         # post_file = post_data[2].replace('.md','.html')
-        # Convert to HTML
-        post_file = output_filename.replace(".md", ".html")
+        # Convert to HTML, in the same sub-directory as the note is in
+        post_file = get_note_url(output_file, project_data.notes_path).lstrip("/")
         # post_data = post_data[1]
         post_data = output_file.parent
-        makedirs(page_out_path, exist_ok=True)
+        if project_data.store is None:
+            makedirs(Path(page_out_path, post_file).parent, exist_ok=True)
 
     # Define where new .html/.xml file will be located
     # Eg: public/file.html || public/file.xml, 'public' dir from 'config.home_path' value
     logger.debug(f"Post data: {post_data}")
     post_file_new = resolve_path(page_out_path, post_file)
-    logger.info(f"Creating: {post_file_new.name} at: {post_file_new}")
-    with open(post_file_new, "w") as output_file:
-        try:
-            output_file.write(
-                rd_page_template.render(
-                    config=project_data.config.__dict__,
-                    title=page_header,
-                    page_title=project_data.config.site_title,
-                    page_desc=page_subtitle,
-                    date=post_date,
-                    metad=post_meta,
-                    url=Path(project_data.config.url, post_file),
-                    article=markdown(page_data.md_content),
-                    posts=posts_list,
-                    home=project_data.config.home_md,
-                    header=markdown(
-                        md_to_str(
-                            Path(project_folder_path, project_data.config.header_md)
-                        )
-                    ),
-                    footer=markdown(
-                        md_to_str(
-                            Path(project_folder_path, project_data.config.footer_md)
-                        )
-                    ),
-                    nextpage=next_page,
-                    last_date=last_date,
-                )
-            )
-            logger.info(f"Rendering and writing page: {post_file_new} complete")
+    # config, page_title, home, header and footer are environment globals
+    page_context = {
+        "title": page_header,
+        "page_desc": page_subtitle,
+        "date": post_date,
+        "metad": post_meta,
+        "url": Path(project_data.config.url, post_file),
+        "article": (
+            page_data.post.note
+            if page_data.post is not None
+            else markdown(page_data.md_content)
+        ),
+        "posts": posts_list,
+        "nextpage": next_page,
+        "prevpage": prev_page,
+        "page_num": page_data.page_num,
+        "page_count": page_data.page_count,
+        "last_date": last_date,
+    }
+    return rd_page_template, post_file_new, page_context
 
-        except OSError as err:
-            logger.exception(
-                "Error rendering or writing to page %s: %s", post_file_new, str(err)
-            )
 
-    return post_file
+@get_func_exec_time
+def render_page(
+    project_data: ProjectData, page_data: PageData
+) -> tuple[Path, str] | FileNotFoundError:
+    """Render a new HTML page from a given Jinja2 template and markdown content, without writing it.
+
+    Take a Jinja2 page template, post details, markdown content, and a filename,
+    and render a new page with the given details.
+
+    Args:
+        project_date (ProjectData): rupantar project config data
+        page_data (PageData): page specific config data
+
+    Returns:
+        tuple: The path where the new static file is to be saved, and it's rendered contents.
+
+    Raises:
+        FileNotFoundError: If the rupantar project or the page template does not exist.
+
+    """
+    note = (
+        None
+        if page_data.post is None
+        else get_profiled_note(page_data.out_filename, project_data.notes_path)
+    )
+    with timed("render", note):
+        rd_page_template, page_path, page_context = prepare_page(project_data, page_data)
+        logger.info(f"Rendering: {page_path.name} for: {page_path}")
+        return page_path, rd_page_template.render(page_context)
+
+
+def write_page(page_path: Path, page_contents: str, note: str | None = None) -> None:
+    """Write a rendered page to disk.
+
+    Args:
+        page_path (Path): Where the page is to be saved.
+        page_contents (str): The rendered page.
+        note (str, optional): The note the page is for, to record the time taken under when profiling.
+
+    Raises:
+        OSError: If any error opening or writing file. Logged, not re-raised.
+    """
+    try:
+        # Replace, rather than write through, any existing file (it may be hard-linked to a static asset)
+        with timed("write", note):
+            page_path.unlink(missing_ok=True)
+            with open(page_path, "w") as output_file:
+                output_file.write(page_contents)
+        logger.info(f"Rendering and writing page: {page_path} complete")
+
+    except OSError as err:
+        logger.exception("Error rendering or writing to page %s: %s", page_path, str(err))
 
 
 @get_func_exec_time
-def build_project(
-    project_folder: str, config_file_name: str | None
-) -> None | FileNotFoundError:
-    """Build a rupantar project, using an optional config file if provided.
+def create_page(
+    project_data: ProjectData, page_data: PageData
+) -> str | FileNotFoundError | OSError:
+    """Create a new HTML page from a given Jinja2 template and markdown content.
 
-    Generate the actual static site pages using data loaded from the config file.
-    Store the output files in a public/ directory, within the rupantar project folder, ready to serve to clients at a web server.
-    Overwrites existing public/ directory.
+    Take a Jinja2 page template, post details, markdown content, and a filename,
+    and create a new page with the given details. The new page will be saved to the same location as the original file.
+
+    The page is streamed to the file as it is rendered, in chunks, rather than rendered into one big string first.
+    Keeps memory usage low for pages listing every post, like the home page and RSS feed.
+    If the project's output is kept in memory, the page is added to the in-memory store instead.
 
     Note:
-        Applies Jinja2 templates in order to generate the static files.
+        Reference: https://jinja.palletsprojects.com/en/3.1.x/api/#jinja2.Template.stream
 
     Args:
-      project_folder (str): The name of an existing rupantar project.
-      config_file_name (str): The name of the config file to load relevant project-specific configurations. Defaults to 'config.yml' that is created by creator.py when initializing a rupantar project.
+        project_date (ProjectData): rupantar project config data
+        page_data (PageData): page specific config data
+
+    Returns:
+        str: The name of the new static file.
 
     Raises:
-      OSError: If any error opening or writing file
-      FileNotFoundError: Missing rupantar project/config file
+        OSError: If any error opening or writing file.
+        FileNotFoundError:
 
     """
+    note = (
+        None
+        if page_data.post is None
+        else get_profiled_note(page_data.out_filename, project_data.notes_path)
+    )
+    with timed("render", note):
+        rd_page_template, page_path, page_context = prepare_page(project_data, page_data)
+    if project_data.store is not None:
+        logger.info(f"Creating: {page_path.name} in memory")
+        with timed("render", note):
+            page_contents = rd_page_template.render(page_context).encode()
+        with timed("write", note):
+            project_data.store.write(
+                get_output_name(project_data, page_path), page_contents
+            )
+        return page_path.name
 
+    logger.info(f"Creating: {page_path.name} at: {page_path}")
     try:
-        print("Building project...")
-        # Get absolute paths for both the rupantar project and the config file (rather than keep 'em relative!)
-        project_folder_path = resolve_path(project_folder, strict=True)
-        logger.info(f"Rupantar project directory location: {project_folder_path}")
-        # Default values for config here instead of directly on function signature
-        config_file = "config.yml" if (config_file_name is None) else config_file_name
-        config_file_path = resolve_path(project_folder_path, config_file, strict=True)
-        logger.info(f"Config file location: {config_file_path}")
-        # Instantiate Config object for reading and loading config data values
-        config = Config(config_file_path)
+        # Replace, rather than write through, any existing file (it may be hard-linked to a static asset)
+        page_path.unlink(missing_ok=True)
+        with open(page_path, "w", buffering=STREAM_BUFFER_SIZE) as output_file:
+            # Rendered as it is written, dump_stream() tells the two apart when profiling
+            dump_stream(rd_page_template.stream(page_context), output_file, note)
+        logger.info(f"Rendering and writing page: {page_path} complete")
 
-        project_data = ProjectData(project_folder_path, config)
-
-        # Resource dir = Static assets (eg: static/); images, stylesheets, scrips, etc.
-        resource_path_abs = resolve_path(
-            project_folder, config.resource_path, strict=True
-        )
-        # Home dir = Files to be served (eg: public/); web-accessible (NOT created at this point)
-        home_path_abs = resolve_path(project_folder, config.home_path)
-        # Clear out existing public/ folder
-        if Path.exists(home_path_abs):
-            logger.info("Found existing public/ folder. Removing it.")
-            rmtree(home_path_abs)
-        # Recreate home path with resource
-        copytree(resource_path_abs, home_path_abs)
-        logger.info(
-            f"Finish copying static resources from {resource_path_abs}\n to output directory:  {home_path_abs}"
-        )
+    except OSError as err:
+        logger.exception("Error rendering or writing to page %s: %s", page_path, str(err))
 
-        posts = []
+    return page_path.name
 
-        # Build the pages from markdown content based out of content/notes/*.md
-        notes_path = resolve_path(
-            project_folder_path, config.content_path, "notes", strict=True
-        )
-        logger.info(f"Notes path: {notes_path}")
-        for each_note_md in Path(notes_path).glob("*.md"):
-            logger.info(f"Creating page using: {each_note_md}")
-            post_detail, md_content = parse_md(each_note_md)
-            # Create blog pages
-            if post_detail is not None:
-                page_data_posts = PageData(
-                    config.note_template, posts, post_detail, md_content, each_note_md
-                )
-                post_url = create_page(project_data, page_data_posts)
-                ymd = post_detail
-                ymd.update({"url": "/" + post_url})
-                ymd.update({"note": markdown(md_content)})
-                posts += [ymd]
 
-        # Sort all blog posts based on date in a descending order
-        posts = sorted(posts, key=lambda post: post["date"], reverse=True)
+def get_output_name(project_data: ProjectData, page_path: Path) -> str:
+    """Get the path of a page relative to the output directory. Eg: 'index.html'
 
-        # Create the other pages from data in content directory
-        home_content_path = Path(project_folder_path, config.home_md)
-        page_data_home = PageData(
-            config.home_template, posts, None, md_to_str(home_content_path), "index.html"
-        )
-        home_page = create_page(project_data, page_data_home)
-        logger.info(f"Home page created at:  {resolve_path(home_page)}")
+    Args:
+        project_data (ProjectData): rupantar project config data
+        page_path (Path): Where the page is to be saved.
 
-        page_data_rss = PageData(
-            config.feed_template, posts, None, md_to_str(home_content_path), "rss.xml"
-        )
-        # TODO: Check RSS content
-        rss_feed = create_page(project_data, page_data_rss)
-        logger.info(f"RSS feed created at:  {resolve_path(rss_feed)}")
+    Returns:
+        str: The page's path relative to the output directory, in POSIX form.
+    """
+    output_path = project_data.output_path or Path(
+        project_data.project_name, project_data.config.home_path
+    )
+    return page_path.relative_to(resolve_path(output_path)).as_posix()
+
+
+def get_ignore_patterns(config: Config) -> list[str]:
+    """Get the patterns of notes (and directories of notes) to leave out of the build, from the optional 'ignore_notes' config value.
+
+    Args:
+        config (Config): The rupantar config object.
+
+    Returns:
+        list of str: The patterns, see indexer.ContentIndex. Empty if not set.
+    """
+    patterns = getattr(config, "ignore_notes", None) or []
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return [str(pattern) for pattern in patterns]
+
+
+def get_content_index(
+    notes_path: Path,
+    ignore: list[str],
+    session: BuildSession | None = None,
+    rescan: bool = True,
+) -> ContentIndex:
+    """Get the index of every note to build.
+
+    The index of the session is re-used if it is of the same notes directory and ignore patterns.
+
+    Args:
+        notes_path (Path): The notes directory.
+        ignore (list of str): Patterns of notes to leave out.
+        session (BuildSession, optional): Warm state of the previous build.
+        rescan (bool): Re-scan the notes directory even if the session's index is re-used. Defaults to True.
+
+    Returns:
+        ContentIndex: The index.
+
+    Raises:
+        OSError: If any error listing the notes directory.
+    """
+    content_index = None if session is None else session.content_index
+    if (
+        content_index is None
+        or content_index.notes_path != notes_path
+        or content_index.ignore != tuple(ignore)
+    ):
+        content_index = ContentIndex(notes_path, ignore)
+        rescan = True
+    if rescan:
+        with timed("read"):
+            content_index.scan()
+    if session is not None:
+        session.content_index = content_index
+    return content_index
+
+
+def is_shown_in_home(post: Post) -> bool:
+    """Check if a post is listed on the home page, going by it's optional 'showInHome' front matter value.
+
+    Args:
+        post (Post): The converted note.
+
+    Returns:
+        bool: True unless 'showInHome' is set to a false value.
+    """
+    return "showInHome" not in post._metadata or bool(post["showInHome"])
+
+
+def paginate(posts: list[Post], posts_per_page: int | None) -> list[list[Post]]:
+    """Split the posts listed on the home page into pages.
+
+    Args:
+        posts (list of Post): Every post, in the order they are listed.
+        posts_per_page (int, optional): Number of posts on each page. None (or 0) to list every post on a single page.
+
+    Returns:
+        list: The posts on each page. A single page with every post (even those not shown on the home page) if not split.
+    """
+    if not posts_per_page:
+        return [posts]
+    shown = [post for post in posts if is_shown_in_home(post)]
+    return [
+        shown[start : start + posts_per_page]
+        for start in range(0, len(shown), posts_per_page)
+    ] or [[]]
+
+
+def get_count_config(config: Config, key: str) -> int | None:
+    """Get an optional config value that is a number of things, eg: 'posts_per_page' or 'feed_limit'.
+
+    Args:
+        config (Config): The rupantar config object.
+        key (str): The config value's name.
+
+    Returns:
+        int: The config value. None if not set, or not a positive whole number (logged).
+    """
+    count = getattr(config, key, None)
+    if count is None:
+        return None
+    if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+        logger.warning(
+            f"Invalid {key}: {count}, must be a positive whole number. Ignoring it."
+        )
+        return None
+    return count
+
+
+def get_excerpt_length(config: Config) -> int | None:
+    """Get the length of the note excerpts in the RSS feed, from the optional 'feed_excerpt' config value.
+
+    Args:
+        config (Config): The rupantar config object.
+
+    Returns:
+        int: Number of characters of each excerpt, DEFAULT_EXCERPT_LENGTH if set to true. None if the feed has whole notes (not set, or set to false).
+    """
+    feed_excerpt = getattr(config, "feed_excerpt", None)
+    if feed_excerpt is True:
+        return DEFAULT_EXCERPT_LENGTH
+    if feed_excerpt is False:
+        return None
+    return get_count_config(config, "feed_excerpt")
+
+
+def close_open_tags(html: str) -> str:
+    """Close every element left open in a fragment of HTML, eg: one cut off part way through a paragraph.
+
+    Args:
+        html (str): The fragment of HTML.
+
+    Returns:
+        str: The fragment, with the closing tags of the elements open at its end added, innermost first.
+    """
+    open_tags = []
+    for tag in HTML_ELEMENT_TAG.finditer(html):
+        closing, name, self_closing = tag.groups()
+        name = name.lower()
+        if self_closing or name in HTML_VOID_ELEMENTS:
+            continue
+        if not closing:
+            open_tags.append(name)
+        elif name in open_tags:
+            # Also closes any element left open within it
+            del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name) :]
+    return html + "".join(f"</{name}>" for name in reversed(open_tags))
+
+
+def get_excerpt(note_html: str, length: int) -> str:
+    """Get the excerpt of a note, for the RSS feed.
+
+    Either everything up to the note's <!--more--> marker, if it has one, or up to so many characters of it's text.
+    With a marker, the HTML is kept, closing any element the marker was within (eg: a paragraph, for a marker written inline).
+    Otherwise cut at a word boundary, with the HTML tags taken out (entities are kept as is).
+
+    Args:
+        note_html (str): The contents of the note, converted to HTML.
+        length (int): Most characters of text in the excerpt, if the note has no marker.
+
+    Returns:
+        str: The excerpt, as HTML.
+    """
+    if EXCERPT_MARKER in note_html:
+        return close_open_tags(note_html.split(EXCERPT_MARKER, 1)[0].rstrip())
+    text = " ".join(HTML_TAG.sub(" ", note_html).split())
+    if len(text) <= length:
+        return text
+    excerpt = (
+        text[: length + 1].rsplit(" ", 1)[0] if " " in text[:length] else text[:length]
+    )
+    # Not to end half-way through an entity, eg: &am
+    return PARTIAL_ENTITY.sub("", excerpt).rstrip() + "…"
+
+
+def select_feed_posts(posts: list[Post], feed_limit: int) -> list[Post]:
+    """Select the newest posts, for a RSS feed limited to so many posts.
+
+    Picked from the posts as already sorted for the home page, stopping as soon as there are enough, rather than sorting them again.
+
+    Args:
+        posts (list of Post): Every post, newest first.
+        feed_limit (int): Most posts in the feed.
+
+    Returns:
+        list: The newest feed_limit posts shown on the home page, newest first.
+    """
+    return list(islice((post for post in posts if is_shown_in_home(post)), feed_limit))
+
+
+def get_listing_page(page_num: int) -> str:
+    """Get the name of a page of the home page, relative to the output directory.
+
+    Args:
+        page_num (int): Number of the page, starting at 1.
+
+    Returns:
+        str: 'index.html' for the first page, 'page/<page_num>/index.html' for the others.
+    """
+    return "index.html" if page_num == 1 else f"page/{page_num}/index.html"
+
+
+def get_listing_url(page_num: int) -> str:
+    """Get the path of a page of the home page on the site.
+
+    Args:
+        page_num (int): Number of the page, starting at 1.
+
+    Returns:
+        str: '/' for the first page, '/page/<page_num>/' for the others.
+    """
+    return "/" if page_num == 1 else f"/page/{page_num}/"
+
+
+def remove_listing_page(page_path: Path) -> None:
+    """Delete a page of the home page, along with it's directory (eg: public/page/3/) if left empty.
+
+    Args:
+        page_path (Path): Where the page is saved.
+    """
+    page_path.unlink(missing_ok=True)
+    try:
+        page_path.parent.rmdir()
+    except OSError:
+        # Not empty, eg: a static asset was put there
+        pass
+
+
+def is_output_fresh(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    output: str,
+    inputs: dict[str, str],
+) -> bool:
+    """Check if an output is up to date, be it on disk or in memory.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        output (str): The output's name, relative to the output directory.
+        inputs (dict): Current hashes of every input of the output.
+
+    Returns:
+        bool: True if the output does not need to be re-rendered.
+    """
+    if project_data.store is None:
+        return manifest.is_fresh(output, inputs, Path(project_data.output_path, output))
+    return output in project_data.store and manifest.is_fresh(output, inputs, None)
+
+
+def sync_assets(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    resource_path: Path,
+    asset_mode: str = "copy",
+    checksum_assets: bool = False,
+) -> None:
+    """Sync static assets into the output directory, or the in-memory store, and record them in the manifest.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        resource_path (Path): The static assets directory (eg: static/).
+        asset_mode (str): How to get static assets into the output directory, see syncer.sync_tree(). Defaults to 'copy'.
+        checksum_assets (bool): Compare contents of static assets whose modification time changed. Defaults to False.
+
+    Raises:
+        OSError: If any error reading or writing files.
+    """
+    if project_data.store is None:
+        manifest.assets = sync_tree(
+            resource_path,
+            project_data.output_path,
+            manifest.assets,
+            asset_mode,
+            checksum_assets,
+        ).files
+    else:
+        manifest.assets = project_data.store.load_tree(resource_path, manifest.assets)
+
+
+def build_note(
+    project_data: ProjectData,
+    md_file_path: str | Path,
+    with_page: bool = True,
+    md_text: str | None = None,
+    writer: BackgroundWriter | None = None,
+    post: Post | None = None,
+) -> Post | None:
+    """Convert a note and, optionally, create its page.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        md_file_path (str or Path): The path to the note's markdown file.
+        with_page (bool): Whether to also create the note's page. Defaults to True.
+        md_text (str, optional): The contents of the note, if already read. Read from md_file_path otherwise.
+        writer (BackgroundWriter, optional): Writes the page in the background if provided. Written right away otherwise.
+        post (Post, optional): The already converted note (eg: from the note cache), if any.
+
+    Returns:
+        Post: The converted note. None if the note could not be parsed.
+    """
+    logger.info(f"Creating page using: {md_file_path}")
+    # Converted once, then used for the note's page, the home page and the RSS feed
+    if post is None:
+        post = render_note(md_file_path, md_text, project_data.notes_path)
+    # Create blog pages
+    if post is not None and with_page:
+        page_data_posts = PageData(
+            project_data.config.note_template,
+            [],
+            post._metadata,
+            None,
+            md_file_path,
+            post,
+        )
+        if writer is None:
+            create_page(project_data, page_data_posts)
+        else:
+            writer.submit(
+                write_page,
+                *render_page(project_data, page_data_posts),
+                get_profiled_note(md_file_path, project_data.notes_path),
+            )
+    return post
+
+
+def init_build_worker(
+    project_folder_path: Path,
+    config_file_path: Path,
+    output_path: Path | None = None,
+    profile: bool = False,
+    cache_path: Path | None = None,
+    notes_path: Path | None = None,
+) -> None:
+    """Set up a build worker process, for building notes in parallel.
+
+    Each worker loads the config and creates its own Jinja2 environment and site-wide render context, once.
+
+    Args:
+        project_folder_path (Path): Absolute path to the rupantar project directory.
+        config_file_path (Path): Absolute path to the config file.
+        output_path (Path, optional): The directory to write pages to, if not the output directory itself.
+        profile (bool): Whether to time the notes built, for the parent's build profile. Defaults to False.
+        cache_path (Path, optional): The note cache of the parent's build, to load the converted notes sent without their HTML from.
+        notes_path (Path, optional): The notes directory, to mirror it's sub-directories into the output directory.
+    """
+    if profile:
+        activate(BuildProfile())
+    global _worker_project_data, _worker_notes_cache
+    if cache_path is not None:
+        _worker_notes_cache = open_note_cache(cache_path, read_only=True)
+        if _worker_notes_cache is not None:
+            # Closed as the worker process exits, once the pool is shut down
+            Finalize(None, _worker_notes_cache.close, exitpriority=10)
+    _worker_project_data = ProjectData(
+        project_folder_path,
+        Config(config_file_path),
+        create_environment(project_folder_path),
+        output_path=output_path,
+        notes_path=notes_path,
+    )
+    load_site_context(_worker_project_data)
+
+
+def build_note_in_worker(
+    task: NoteTask,
+) -> tuple[Post | None, list[tuple[str, float, str]] | None]:
+    """Build a note in a worker process set up by init_build_worker().
+
+    Args:
+        task (NoteTask): What needs to be done to build the note.
+
+    Returns:
+        tuple: The converted note, sent back to the parent process (None if the note could not be parsed),
+            and the time taken in each phase if profiling (see profiler.BuildProfile.take_samples()), None otherwise.
+    """
+    if task.post is not None:
+        task.post._notes_cache = _worker_notes_cache
+    post = build_note(
+        _worker_project_data, task.md_file_path, task.with_page, post=task.post
+    )
+    profile = get_active_profile()
+    return post, None if profile is None else profile.take_samples()
+
+
+def load_project_data(
+    project_folder_path: Path,
+    config_file_path: Path,
+    session: BuildSession | None = None,
+    store: MemoryStore | None = None,
+) -> ProjectData:
+    """Load the config of a rupantar project, along with its Jinja2 environment (every template compiled) and site-wide render context.
+
+    The environment and render context of the previous build in the session are re-used, if any.
+
+    Args:
+        project_folder_path (Path): Absolute path to the rupantar project directory.
+        config_file_path (Path): Absolute path to the config file.
+        session (BuildSession, optional): Warm state of the previous build.
+        store (MemoryStore, optional): The in-memory output, if any. Its environment has no (on-disk) bytecode cache.
+
+    Returns:
+        ProjectData: The project data.
+    """
+    # Instantiate Config object for reading and loading config data values
+    config = Config(config_file_path)
+    previous = None if session is None else session.project_data
+    project_data = ProjectData(
+        project_folder_path,
+        config,
+        (
+            create_environment(project_folder_path, store is None)
+            if previous is None
+            else previous.environment
+        ),
+    )
+    compile_templates(
+        project_data.environment,
+        config.note_template,
+        config.home_template,
+        config.feed_template,
+    )
+    load_site_context(project_data, None if previous is None else previous.site_context)
+    return project_data
+
+
+def open_manifest(
+    project_data: ProjectData, home_path: Path, session: BuildSession | None = None
+) -> BuildManifest:
+    """Open the build manifest of the directory being built into, re-using the one of the previous build in the session if it is the same.
+
+    Args:
+        project_data (ProjectData): rupantar project config data, with its output directory or in-memory store.
+        home_path (Path): The output directory (eg: public/), the build goes into a generation of it if atomic.
+        session (BuildSession, optional): Warm state of the previous build.
+
+    Returns:
+        BuildManifest: The build manifest.
+    """
+    store = project_data.store
+    manifest_path = Path(
+        get_state_dir(project_data.project_name, create=store is None),
+        # Never saved for the in-memory output, which starts out empty
+        (
+            get_manifest_name(project_data.output_path, home_path)
+            if store is None
+            else "manifest-memory.json"
+        ),
+    )
+    if (
+        session is not None
+        and session.manifest is not None
+        and session.manifest.manifest_path == manifest_path
+    ):
+        return session.manifest
+    return BuildManifest(project_data.project_name, manifest_path)
+
+
+def hash_build_inputs(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    config_file_path: Path,
+    content_index: ContentIndex,
+) -> BuildInputs:
+    """Hash the inputs of every kind of page, to tell which pages are outdated.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        config_file_path (Path): Absolute path to the config file.
+        content_index (ContentIndex): Index of every note to build.
+
+    Returns:
+        BuildInputs: The content hashes of the inputs.
+    """
+    project_folder_path, config = project_data.project_name, project_data.config
+    # Inputs that every page depends on
+    shared_inputs = manifest.hash_inputs(
+        config_file_path,
+        Path(project_folder_path, config.header_md),
+        Path(project_folder_path, config.footer_md),
+    )
+    # Home page and RSS feed list every post, so they depend on every note
+    list_inputs = {
+        **shared_inputs,
+        **manifest.hash_inputs(
+            Path(project_folder_path, config.home_md),
+            *content_index.paths(),
+            stats=content_index.stats(),
+        ),
+    }
+    return BuildInputs(
+        note_page={
+            **shared_inputs,
+            **manifest.hash_inputs(Path(project_folder_path, config.note_template)),
+        },
+        listing=list_inputs,
+        home={
+            **list_inputs,
+            **manifest.hash_inputs(Path(project_folder_path, config.home_template)),
+        },
+        feed={
+            **list_inputs,
+            **manifest.hash_inputs(Path(project_folder_path, config.feed_template)),
+        },
+    )
+
+
+def are_listings_fresh(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    listing_pages: list[str],
+    inputs: BuildInputs,
+) -> bool:
+    """Check if the home page (every page of it) and the RSS feed are up to date.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        listing_pages (list of str): Every page of the home page, as recorded by the previous build.
+        inputs (BuildInputs): Content hashes of the inputs.
+
+    Returns:
+        bool: True if neither needs to be re-rendered.
+    """
+    return all(
+        is_output_fresh(project_data, manifest, page, inputs.home)
+        for page in listing_pages
+    ) and is_output_fresh(project_data, manifest, "rss.xml", inputs.feed)
+
+
+def plan_note_tasks(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    notes: list[Path],
+    inputs: BuildInputs,
+    incremental: bool,
+    lists_fresh: bool,
+) -> list[NoteTask]:
+    """Work out every note that needs building, either for its page or for the home page and RSS feed.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        notes (list of Path): Every note of the project.
+        inputs (BuildInputs): Content hashes of the inputs.
+        incremental (bool): Whether pages that are up to date are skipped.
+        lists_fresh (bool): Whether the home page and RSS feed are up to date, so need no post details.
+
+    Returns:
+        list: What needs to be done for each note, in order.
+    """
+    tasks = []
+    for each_note_md in notes:
+        note_key = manifest.key(each_note_md)
+        note_page = get_note_url(each_note_md, project_data.notes_path).lstrip("/")
+        page_fresh = incremental and is_output_fresh(
+            project_data,
+            manifest,
+            note_page,
+            {**inputs.note_page, note_key: inputs.listing[note_key]},
+        )
+        if page_fresh and lists_fresh:
+            logger.debug(f"Skipping up-to-date page: {note_page}")
+            continue
+        tasks.append(NoteTask(each_note_md, not page_fresh, inputs.listing[note_key]))
+    return tasks
+
+
+def open_build_notes_cache(
+    project_data: ProjectData, use_cache: bool
+) -> NoteCache | None:
+    """Open the note cache for a build, or a temporary one to keep the converted notes in, if the note cache is not used.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        use_cache (bool): Whether to use the note cache.
+
+    Returns:
+        NoteCache: The note cache. None if it could not be opened, or the output is kept in memory (and converted notes along with it).
+    """
+    if project_data.store is not None:
+        # Nothing written to disk, converted notes are kept in memory along with the rest of the output
+        logger.info("Output kept in memory. Not using the note cache.")
+        return None
+    state_dir = get_state_dir(project_data.project_name)
+    if use_cache:
+        return open_note_cache(
+            Path(state_dir, "cache.sqlite3"),
+            getattr(project_data.config, "cache_max_mb", DEFAULT_CACHE_MAX_MB),
+        )
+    # Not a cache, only somewhere to keep the converted notes until the home page and RSS feed are created
+    return open_note_cache(Path(state_dir, f"notes-{getpid()}.sqlite3"), temporary=True)
+
+
+def load_known_posts(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    tasks: list[NoteTask],
+    notes_cache: NoteCache | None,
+    use_cache: bool,
+    session: BuildSession | None = None,
+) -> None:
+    """Fill in the notes that need not be converted again: those converted by the previous build in the session, or found in the note cache.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        tasks (list of NoteTask): Every note that needs building.
+        notes_cache (NoteCache, optional): The note cache of the build.
+        use_cache (bool): Whether to look notes up in the note cache.
+        session (BuildSession, optional): Warm state of the previous build.
+    """
+    if session is not None:
+        # Notes converted by the previous build in this session, and unchanged since
+        for task in tasks:
+            known = session.notes.get(manifest.key(task.md_file_path))
+            if known is not None and known[0] == task.content_hash:
+                task.post = known[1]
+        # Those not kept in memory are loaded from this build's note cache, marked as used so they are not evicted from it
+        spilled = [
+            task for task in tasks if task.post is not None and task.post._html is None
+        ]
+        in_cache = (
+            set()
+            if notes_cache is None or not spilled
+            else notes_cache.touch([task.content_hash for task in spilled])
+        )
+        for task in spilled:
+            if task.content_hash in in_cache:
+                task.post._notes_cache = notes_cache
+            else:
+                # Eg: kept in the previous build's temporary cache, deleted since
+                task.post = None
+    if not use_cache or notes_cache is None:
+        return
+    with timed("cache"):
+        cached_notes = notes_cache.get_many(
+            [task.content_hash for task in tasks if task.post is None],
+            with_html=False,
+        )
+    for task in tasks:
+        if task.post is None and task.content_hash in cached_notes:
+            metadata, _ = cached_notes[task.content_hash]
+            task.post = Post(
+                metadata,
+                None,
+                get_note_url(task.md_file_path, project_data.notes_path),
+                task.content_hash,
+                str(task.md_file_path),
+                notes_cache,
+            )
+
+
+def read_note(task: NoteTask, notes_path: Path | None = None) -> str | None:
+    """Read the markdown file of a note that needs converting, for the build pipeline (see pipeline.prefetch()).
+
+    Args:
+        task (NoteTask): What needs to be done to build the note.
+        notes_path (Path, optional): The notes directory. See get_note_url().
+
+    Returns:
+        str: The contents of the note, empty if it is converted already. None if it could not be read.
+    """
+    if task.post is not None:
+        return ""
+    with timed("read", get_profiled_note(task.md_file_path, notes_path)):
+        return md_to_str(task.md_file_path)
+
+
+def keep_post(
+    task: NoteTask,
+    post: Post | None,
+    unspilled: list[Post],
+    notes_cache: NoteCache | None,
+) -> None:
+    """Keep a newly converted note with its task, storing it in the note cache (see spill_posts()) once a batch of them is converted.
+
+    Args:
+        task (NoteTask): What was done to build the note.
+        post (Post, optional): The converted note. None if it could not be parsed.
+        unspilled (list of Post): Converted notes yet to be stored in the note cache.
+        notes_cache (NoteCache, optional): The note cache of the build.
+    """
+    if task.post is not None or post is None:
+        # Already converted (and in the note cache), or could not be parsed
+        return
+    post._content_hash = task.content_hash
+    task.post = post
+    unspilled.append(post)
+    if len(unspilled) >= SPILL_BATCH_SIZE:
+        spill_posts(unspilled, notes_cache)
+
+
+def spill_posts(unspilled: list[Post], notes_cache: NoteCache | None) -> None:
+    """Store converted notes in the note cache, and drop their HTML from memory. Kept in memory if there is no note cache.
+
+    Args:
+        unspilled (list of Post): Converted notes yet to be stored in the note cache. Cleared once they are.
+        notes_cache (NoteCache, optional): The note cache of the build.
+    """
+    if notes_cache is not None:
+        with timed("cache"):
+            notes_cache.put_many(
+                [(post._content_hash, post._metadata, post._html) for post in unspilled]
+            )
+        for post in unspilled:
+            post.spill(notes_cache)
+    unspilled.clear()
+
+
+def convert_notes(
+    project_data: ProjectData,
+    pending: list[NoteTask],
+    notes_cache: NoteCache | None,
+    config_file_path: Path,
+    jobs: int,
+    profile: BuildProfile | None = None,
+    spawn: bool = False,
+) -> None:
+    """Convert the notes that need it, and create the pages of those whose page is outdated. Each task is filled in with its converted note.
+
+    Notes are built in parallel, by a pool of worker processes, which send the converted notes back.
+    When built in this process instead, reading notes and writing pages overlap with rendering (see pipeline.py).
+
+    Note:
+        Reference: https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        pending (list of NoteTask): The notes to build.
+        notes_cache (NoteCache, optional): The note cache of the build, to store the converted notes in.
+        config_file_path (Path): Absolute path to the config file, for the worker processes to load.
+        jobs (int): Most worker processes to build notes with. 1 builds them all in this process.
+        profile (BuildProfile, optional): The build's profile, to add the timings of the worker processes to.
+        spawn (bool): Start the worker processes afresh, rather than fork them off this one. Defaults to False.
+            Needed by long-running processes with other threads (eg: `serve`), which a forked process may deadlock on the locks of.
+    """
+    store = project_data.store
+    if store is not None and jobs > 1:
+        # Pages rendered by worker processes would not make it into this process' memory
+        logger.info("Output kept in memory. Building notes in this process.")
+        jobs = 1
+    # Newly converted notes, yet to be stored in the note cache
+    unspilled = []
+    # No more worker processes than notes to build, eg: for an incremental build of a few changed notes
+    workers = min(jobs, len(pending))
+    if workers > 1:
+        logger.info(f"Building {len(pending)} notes using {workers} worker processes")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn") if spawn else None,
+            initializer=init_build_worker,
+            initargs=(
+                project_data.project_name,
+                config_file_path,
+                project_data.output_path,
+                profile is not None,
+                None if notes_cache is None else notes_cache.cache_path,
+                project_data.notes_path,
+            ),
+        ) as executor:
+            # Results come back in the same order as the tasks, same as a serial build
+            for task, (post, samples) in zip(
+                pending,
+                executor.map(
+                    build_note_in_worker,
+                    pending,
+                    chunksize=max(1, len(pending) // (workers * 4)),
+                ),
+            ):
+                keep_post(task, post, unspilled, notes_cache)
+                for sample in samples or []:
+                    profile.add(*sample)
+    else:
+        # Pipeline: notes are read ahead by reader threads while the current one is rendered here,
+        # and the rendered pages are written out by writer threads
+        with BackgroundWriter() as writer:
+            for task, md_text in prefetch(
+                partial(read_note, notes_path=project_data.notes_path), pending
+            ):
+                keep_post(
+                    task,
+                    (
+                        None
+                        if md_text is None
+                        else build_note(
+                            project_data,
+                            task.md_file_path,
+                            task.with_page,
+                            md_text,
+                            writer if store is None else None,
+                            task.post,
+                        )
+                    ),
+                    unspilled,
+                    notes_cache,
+                )
+    spill_posts(unspilled, notes_cache)
+
+
+def record_note_pages(
+    manifest: BuildManifest, tasks: list[NoteTask], inputs: BuildInputs
+) -> list[Post]:
+    """Record the inputs of every note page created in the manifest.
+
+    Args:
+        manifest (BuildManifest): The build manifest.
+        tasks (list of NoteTask): Every note that was built.
+        inputs (BuildInputs): Content hashes of the inputs.
+
+    Returns:
+        list: The converted notes, for the home page and RSS feed.
+    """
+    posts = []
+    for task in tasks:
+        post = task.post
+        if post is None:
+            continue
+        if task.with_page:
+            note_key = manifest.key(task.md_file_path)
+            manifest.record(
+                post.url.lstrip("/"),
+                note_key,
+                {**inputs.note_page, note_key: inputs.listing[note_key]},
+            )
+        posts.append(post)
+    return posts
+
+
+def remove_deleted_notes(
+    project_data: ProjectData, manifest: BuildManifest, live_notes: set[str]
+) -> None:
+    """Remove the pages of notes that have since been deleted, be it on disk or in memory.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        live_notes (set of str): Manifest keys of every note currently in the project.
+    """
+    store = project_data.store
+    removed = manifest.remove_stale(
+        live_notes, project_data.output_path if store is None else None
+    )
+    if store is not None:
+        for output in removed:
+            store.remove(output)
+
+
+def create_home_pages(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    posts: list[Post],
+    home_content: str,
+    listing_pages: list[str],
+    inputs: BuildInputs,
+) -> None:
+    """Create the home page, split into pages if 'posts_per_page' is set, and remove any pages of it no longer needed.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        posts (list of Post): Every post, newest first.
+        home_content (str): The home page's own content, in markdown.
+        listing_pages (list of str): Every page of the home page, as recorded by the previous build.
+        inputs (BuildInputs): Content hashes of the inputs.
+    """
+    config, store, output_path = (
+        project_data.config,
+        project_data.store,
+        project_data.output_path,
+    )
+    pages = paginate(posts, get_count_config(config, "posts_per_page"))
+    for page_num, page_posts in enumerate(pages, 1):
+        page_data_home = PageData(
+            config.home_template,
+            page_posts,
+            None,
+            home_content,
+            get_listing_page(page_num),
+            page_num=page_num,
+            page_count=len(pages),
+        )
+        create_page(project_data, page_data_home)
+        manifest.record(page_data_home.out_filename, None, inputs.home)
+    logger.info(f"Home page created at:  {Path(output_path, 'index.html')}")
+    if len(pages) > 1:
+        logger.info(f"Home page split into {len(pages)} pages")
+    # Pages beyond the last one, from when there were more posts (or fewer per page)
+    for page in listing_pages:
+        if LISTING_PAGE.fullmatch(page) and int(page.split("/")[1]) > len(pages):
+            logger.info(f"Removing page no longer needed: {page}")
+            manifest.outputs.pop(page, None)
+            if store is None:
+                remove_listing_page(Path(output_path, page))
+            else:
+                store.remove(page)
+
+
+def create_feed(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    posts: list[Post],
+    home_content: str,
+    inputs: BuildInputs,
+) -> None:
+    """Create the RSS feed, limited to the newest posts if 'feed_limit' is set, with only an excerpt of each if 'feed_excerpt' is.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        posts (list of Post): Every post, newest first.
+        home_content (str): The home page's own content, in markdown.
+        inputs (BuildInputs): Content hashes of the inputs.
+    """
+    config = project_data.config
+    feed_limit = get_count_config(config, "feed_limit")
+    feed_posts = posts if feed_limit is None else select_feed_posts(posts, feed_limit)
+    excerpt_length = get_excerpt_length(config)
+    if excerpt_length is not None:
+        # Only the excerpt of each note, as the feed's post.note
+        feed_posts = [
+            Post(
+                post._metadata,
+                get_excerpt(post.note, excerpt_length),
+                post.url,
+                post._content_hash,
+                post._source,
+            )
+            for post in feed_posts
+        ]
+    page_data_rss = PageData(
+        config.feed_template, feed_posts, None, home_content, "rss.xml"
+    )
+    # TODO: Check RSS content
+    rss_feed = create_page(project_data, page_data_rss)
+    manifest.record(rss_feed, None, inputs.feed)
+    logger.info(f"RSS feed created at:  {resolve_path(rss_feed)}")
+
+
+def finish_output(
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    incremental: bool,
+    gzip_level: int | None = None,
+    jobs: int | None = None,
+) -> None:
+    """Pre-compress the output, prune whatever this build did not generate, record the ETags of the output and save the manifest.
+
+    Args:
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        incremental (bool): Whether this was an incremental build, which leaves existing files alone.
+        gzip_level (int, optional): Level to pre-compress the output at. None for no pre-compression.
+        jobs (int, optional): Number of threads to pre-compress the output with.
+
+    Raises:
+        OSError: If any error reading or writing files.
+    """
+    store, output_path = project_data.store, project_data.output_path
+    compressed_files = set()
+    if gzip_level is not None:
+        # Any .gz shipped as a static asset is left alone
+        if store is None:
+            report = compress_tree(output_path, gzip_level, manifest.assets, jobs)
+        else:
+            report = compress_store(store, gzip_level, manifest.assets)
+        compressed_files = report.files
+
+    if not incremental:
+        # Clear out whatever is left in public/ from before, that was not generated or synced by this build
+        keep = manifest.assets | set(manifest.outputs) | compressed_files
+        if store is None:
+            pruned = prune_tree(output_path, keep)
+        else:
+            pruned = store.prune(keep)
+        logger.info(f"Removed {pruned} stale files from: {output_path}")
+
+    # Content hashes of the outputs, sent as their ETags by the web server
+    if store is None:
+        manifest.record_etags(output_path)
+        manifest.save()
+    else:
+        manifest.record_store_etags(store)
+
+
+def update_session(
+    session: BuildSession,
+    project_data: ProjectData,
+    manifest: BuildManifest,
+    tasks: list[NoteTask],
+    live_notes: set[str],
+) -> None:
+    """Keep the state of a build in the session, for the next build to re-use.
+
+    Args:
+        session (BuildSession): The session.
+        project_data (ProjectData): rupantar project config data
+        manifest (BuildManifest): The build manifest.
+        tasks (list of NoteTask): Every note that was built.
+        live_notes (set of str): Manifest keys of every note currently in the project.
+    """
+    session.project_data = project_data
+    session.manifest = manifest
+    session.notes.update(
+        (manifest.key(task.md_file_path), (task.content_hash, task.post))
+        for task in tasks
+        if task.post is not None
+    )
+    for note_key in session.notes.keys() - live_notes:
+        del session.notes[note_key]
+
+
+def swap_in_build(manifest: BuildManifest, home_path: Path, output_path: Path) -> None:
+    """Swap in the generation an atomic build went into, as the output directory. See swapper.py
+
+    Args:
+        manifest (BuildManifest): The build manifest, of the generation.
+        home_path (Path): The output directory (eg: public/).
+        output_path (Path): The generation the build went into (eg: .public-a).
+
+    Raises:
+        OSError: If the generation could not be swapped in.
+    """
+    if home_path.is_dir() and not home_path.is_symlink():
+        # The existing output directory is about to become the previous generation, its manifest goes with it
+        previous = next(
+            generation
+            for generation in get_generation_paths(home_path)
+            if generation != output_path
+        )
+        plain_manifest_path = Path(manifest.manifest_path.parent, "manifest.json")
+        if plain_manifest_path.exists():
+            replace(
+                plain_manifest_path,
+                Path(
+                    manifest.manifest_path.parent,
+                    get_manifest_name(previous, home_path),
+                ),
+            )
+    swap_in(home_path, output_path)
+
+
+@get_func_exec_time
+def build_project(
+    project_folder: str,
+    config_file_name: str | None,
+    incremental: bool = False,
+    jobs: int | None = None,
+    use_cache: bool = True,
+    asset_mode: str = "copy",
+    checksum_assets: bool = False,
+    atomic: bool = False,
+    session: BuildSession | None = None,
+    store: MemoryStore | None = None,
+    gzip_level: int | None = None,
+    profile: BuildProfile | None = None,
+    rescan_notes: bool = True,
+) -> None | FileNotFoundError:
+    """Build a rupantar project, using an optional config file if provided.
+
+    Generate the actual static site pages using data loaded from the config file.
+    Store the output files in a public/ directory, within the rupantar project folder, ready to serve to clients at a web server.
+    Overwrites existing public/ directory, unless building incrementally.
+    Static assets are synced into it, so only new or changed ones are copied, and the ones since deleted are removed.
+
+    Every build records the content hashes of the inputs of each output page in a build manifest (.rupantar/manifest.json).
+    An incremental build uses it to only re-render the pages whose inputs changed since the last build,
+    and to delete the pages whose source note was removed.
+
+    Notes are built in parallel, by a pool of worker processes, which send the converted notes back for the home page and RSS feed.
+    The output is identical to that of building them one after the other.
+    When built in this process instead, reading notes and writing pages overlap with rendering (see pipeline.py).
+
+    With atomic set, the site is built into a hidden sibling of the output directory (eg: .public-a) instead, and swapped in once complete,
+    by pointing the output directory (then a symbolic link) to it. The previous generation (eg: .public-b) is kept for rollback,
+    and is the one the next build goes into. See swapper.py
+
+    With a session, the Jinja2 environment, site-wide render context, build manifest and converted notes of the previous build are re-used,
+    instead of being loaded again. Used for rebuilding on changes in serve mode.
+
+    Notes are found in the notes directory and all of it's sub-directories, leaving out those matching the optional 'ignore_notes' config value
+    (a list of patterns, see indexer.ContentIndex). Pages of notes in a sub-directory go into the same sub-directory of the output directory.
+
+    Converted notes are kept in a cache (.rupantar/cache.sqlite3) across builds, so unchanged notes are neither parsed nor converted again.
+    Its maximum size, in MiB, can be set with the optional 'cache_max_mb' config value.
+
+    With a gzip level, a pre-compressed .gz sibling of every HTML, XML, CSS and JavaScript file is written too, for web servers to send as is
+    to clients that accept gzip. See compressor.py
+
+    With a profile, the time taken by each phase of the build (and by each note) is recorded to it. See profiler.py
+
+    Note:
+        Applies Jinja2 templates in order to generate the static files.
+
+    Args:
+      project_folder (str): The name of an existing rupantar project.
+      config_file_name (str): The name of the config file to load relevant project-specific configurations. Defaults to 'config.yml' that is created by creator.py when initializing a rupantar project.
+      incremental (bool): Re-use the existing output directory and only re-render outdated pages. Defaults to False.
+      jobs (int): Number of worker processes to build notes with. Defaults to the number of CPUs. 1 builds them all in this process. Also the number of threads to pre-compress the output with.
+      use_cache (bool): Use the note cache. Defaults to True.
+      asset_mode (str): How to get static assets into the output directory, one of 'copy', 'hardlink' or 'reflink'. Defaults to 'copy'.
+      checksum_assets (bool): Compare contents of static assets whose modification time changed, but not their size. Defaults to False.
+      atomic (bool): Build into a separate generation and swap it in once complete, so the site being served is never partially built. Defaults to False.
+      session (BuildSession, optional): Warm state of the previous build, to re-use. Updated with the state of this build.
+      store (MemoryStore, optional): Keep the output in this in-memory store instead of writing it to disk. Notes are then built in this process, and nothing is written to the project directory:
+        neither the manifest, the note cache nor the Jinja2 bytecode cache.
+      gzip_level (int, optional): Level, 1 to 9, to pre-compress the output at. Defaults to None i.e. no pre-compression.
+      profile (BuildProfile, optional): Record the build's timings to this profile.
+      rescan_notes (bool): List the notes directory again, even with a session whose index of it (see indexer.py) is kept up to date otherwise,
+        eg: by rebuild() in serve mode. Defaults to True.
+
+    Raises:
+      OSError: If any error opening or writing file
+      FileNotFoundError: Missing rupantar project/config file
+
+    """
+
+    activate(profile)
+    notes_cache = None
+    try:
+        print("Building project...")
+        # Get absolute paths for both the rupantar project and the config file (rather than keep 'em relative!)
+        project_folder_path = resolve_path(project_folder, strict=True)
+        logger.info(f"Rupantar project directory location: {project_folder_path}")
+        # Default values for config here instead of directly on function signature
+        config_file = "config.yml" if (config_file_name is None) else config_file_name
+        config_file_path = resolve_path(project_folder_path, config_file, strict=True)
+        logger.info(f"Config file location: {config_file_path}")
+        with timed("config"):
+            project_data = load_project_data(
+                project_folder_path, config_file_path, session, store
+            )
+        config = project_data.config
+
+        # Resource dir = Static assets (eg: static/); images, stylesheets, scrips, etc.
+        resource_path_abs = resolve_path(
+            project_folder, config.resource_path, strict=True
+        )
+        # Home dir = Files to be served (eg: public/); web-accessible (NOT created at this point)
+        home_path_abs = Path(project_folder_path, config.home_path)
+        # Output dir = Where this build writes to; the home dir itself, or the next generation of it
+        output_path = get_staging_generation(home_path_abs) if atomic else home_path_abs
+        project_data.output_path = output_path
+        project_data.store = store
+        logger.info(f"Building into: {'memory' if store is not None else output_path}")
+        manifest = open_manifest(project_data, home_path_abs, session)
+        if incremental:
+            logger.info("Incremental build. Re-using existing output directory.")
+        else:
+            # Every page is re-rendered, anything else left in public/ is pruned after
+            manifest.outputs.clear()
+        # Sync static resources into home path, only copying the new or changed ones
+        with timed("assets"):
+            sync_assets(
+                project_data, manifest, resource_path_abs, asset_mode, checksum_assets
+            )
+        logger.info(
+            f"Finish syncing static resources from {resource_path_abs}\n to output directory:  {output_path}"
+        )
+
+        # Build the pages from markdown content based out of content/notes/**/*.md
+        notes_path = resolve_path(
+            project_folder_path, config.content_path, "notes", strict=True
+        )
+        project_data.notes_path = notes_path
+        logger.info(f"Notes path: {notes_path}")
+        content_index = get_content_index(
+            notes_path, get_ignore_patterns(config), session, rescan_notes
+        )
+        notes = content_index.paths()
+        inputs = hash_build_inputs(
+            project_data, manifest, config_file_path, content_index
+        )
+        # If neither listing is outdated, post details of unchanged notes are not needed at all
+        # Unchanged inputs make for the same number of home pages, as recorded by the previous build
+        listing_pages = [
+            "index.html",
+            *(output for output in manifest.outputs if LISTING_PAGE.fullmatch(output)),
+        ]
+        lists_fresh = incremental and are_listings_fresh(
+            project_data, manifest, listing_pages, inputs
+        )
+        tasks = plan_note_tasks(
+            project_data, manifest, notes, inputs, incremental, lists_fresh
+        )
+
+        notes_cache = open_build_notes_cache(project_data, use_cache)
+        load_known_posts(project_data, manifest, tasks, notes_cache, use_cache, session)
+        jobs = (cpu_count() or 1) if jobs is None else jobs
+        # Cached notes whose page is up to date need no more work
+        convert_notes(
+            project_data,
+            [task for task in tasks if task.post is None or task.with_page],
+            notes_cache,
+            config_file_path,
+            jobs,
+            profile,
+            # A session is kept by a long-running process, with threads of its own (eg: serve's web server)
+            spawn=session is not None,
+        )
+        posts = record_note_pages(manifest, tasks, inputs)
+
+        live_notes = {manifest.key(note) for note in notes}
+        remove_deleted_notes(project_data, manifest, live_notes)
+
+        if lists_fresh:
+            logger.info("Home page and RSS feed are up to date.")
+        else:
+            # Sort all blog posts based on date in a descending order
+            posts = sorted(posts, key=lambda post: post["date"], reverse=True)
+            # Create the other pages from data in content directory
+            home_content = md_to_str(Path(project_folder_path, config.home_md))
+            create_home_pages(
+                project_data, manifest, posts, home_content, listing_pages, inputs
+            )
+            create_feed(project_data, manifest, posts, home_content, inputs)
+        if notes_cache is not None:
+            with timed("cache"):
+                notes_cache.close()
+            notes_cache = None
+
+        # Pre-compression, pruning, ETags and the manifest
+        with timed("finish"):
+            finish_output(project_data, manifest, incremental, gzip_level, jobs)
+        if session is not None:
+            update_session(session, project_data, manifest, tasks, live_notes)
+        if atomic:
+            swap_in_build(manifest, home_path_abs, output_path)
         # Finish
         print("Project built successfully.")
         logger.info(
@@ -352,3 +2134,9 @@ def build_project(
 
     except OSError as err:
         logger.exception("Error: %s", str(err))
+
+    finally:
+        if notes_cache is not None:
+            # The build failed before it was done with the note cache
+            notes_cache.close()
+        deactivate()
@@ -0,0 +1,267 @@
+from __future__ import annotations
+from hashlib import sha256
+from logging import getLogger
+from pathlib import Path
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from sqlite3 import connect, Error as SQLiteError
+from time import time
+from markdown2 import __version__ as markdown2_version
+from yaml import __version__ as yaml_version
+from rupantar import __version__ as rupantar_version
+
+logger = getLogger()
+
+# Default upper limit of the cache's size on disk, in MiB
+DEFAULT_CACHE_MAX_MB = 256
+
+
+class NoteCache:
+    """Persistent cache of parsed and converted notes, shared between builds.
+
+    Stores the front matter metadata and converted HTML of each note in a single SQLite database,
+    keyed by the hash of the note's contents along with the versions of rupantar, markdown2 and PyYAML.
+    A note whose contents did not change since it was last built is then neither parsed nor converted again.
+
+    When the cache grows beyond its maximum size, the least recently used entries are evicted.
+
+    The converted HTML is also where a build keeps the notes it converted, instead of in memory, until it is done with them (see builder.Post).
+    A temporary cache is used for that when the note cache itself is not, it starts out empty and is deleted once closed.
+
+    Note:
+        Reference: https://docs.python.org/3/library/sqlite3.html
+
+    Args:
+        cache_path (Path or str): Path to the SQLite database file. Created if it does not exist.
+        max_size_mb (int or float): Maximum size of all the cached entries, in MiB. Defaults to DEFAULT_CACHE_MAX_MB.
+        temporary (bool): Delete the database file once closed, instead of keeping it for the next build. Defaults to False.
+        read_only (bool): Only load converted notes from the cache (eg: in a build worker process), closing it leaves the entries as they are. Defaults to False.
+
+    Raises:
+        sqlite3.Error: If the database can not be opened or created.
+    """
+
+    # Bump to invalidate every existing entry if the format of the cached values changes
+    SCHEMA_VERSION = 1
+
+    def __init__(
+        self,
+        cache_path: Path | str,
+        max_size_mb: int | float = DEFAULT_CACHE_MAX_MB,
+        temporary: bool = False,
+        read_only: bool = False,
+    ) -> None:
+        self.cache_path = Path(cache_path)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.temporary = temporary
+        self.read_only = read_only
+        # Salt for the keys, so entries from other versions are never used
+        self.salt = f"{self.SCHEMA_VERSION}:{rupantar_version}:{markdown2_version}:{yaml_version}:"
+        self.hits = self.misses = 0
+        self.used_keys = set()
+
+        self.connection = connect(self.cache_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS notes (
+                key TEXT PRIMARY KEY,
+                metadata BLOB NOT NULL,
+                html TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self.connection.commit()
+        if temporary:
+            logger.info(f"Keeping converted notes at: {self.cache_path}")
+        else:
+            logger.info(f"Using note cache at: {self.cache_path}")
+
+    def key(self, content_hash: str) -> str:
+        """Get the cache key for a note, from the hash of its contents.
+
+        Args:
+            content_hash (str): Hash of the note's contents.
+
+        Returns:
+            str: The cache key.
+        """
+        return sha256((self.salt + content_hash).encode()).hexdigest()
+
+    def get_many(
+        self, content_hashes: list[str], with_html: bool = True
+    ) -> dict[str, tuple[dict[str], str | None]]:
+        """Look up several notes in the cache.
+
+        Args:
+            content_hashes (list of str): Hashes of the contents of the notes.
+            with_html (bool): Also load the converted HTML of the notes. Defaults to True.
+
+        Returns:
+            dict: Mapping of each cached note's content hash to its (metadata, HTML). HTML is None if not loaded.
+        """
+        keys = {self.key(content_hash): content_hash for content_hash in content_hashes}
+        found = {}
+        columns = "key, metadata, html" if with_html else "key, metadata, NULL"
+        for key, metadata, html in self.select(columns, list(keys)):
+            found[keys[key]] = (loads(metadata), html)
+            self.used_keys.add(key)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def touch(self, content_hashes: list[str]) -> set[str]:
+        """Mark notes as used by this build, without loading them, so they are the last to be evicted (see close()).
+
+        Eg: for converted notes kept from a previous build, whose HTML is loaded from the cache later on.
+
+        Args:
+            content_hashes (list of str): Hashes of the contents of the notes.
+
+        Returns:
+            set of str: Hashes of the notes that are in the cache.
+        """
+        keys = {self.key(content_hash): content_hash for content_hash in content_hashes}
+        found = set()
+        for (key,) in self.select("key", list(keys)):
+            found.add(keys[key])
+            self.used_keys.add(key)
+        return found
+
+    def select(self, columns: str, keys: list[str]):
+        """Look up the given columns of several entries, by their keys.
+
+        Args:
+            columns (str): The columns to select, starting with the key. Eg: 'key, html'
+            keys (list of str): The cache keys.
+
+        Yields:
+            tuple: The columns of each entry found.
+        """
+        # Stay well under SQLite's limit on the number of query parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start : start + 500]
+            yield from self.connection.execute(
+                f"SELECT {columns} FROM notes WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+
+    def get_html(self, content_hash: str) -> str | None:
+        """Load the converted HTML of a single note.
+
+        Args:
+            content_hash (str): Hash of the contents of the note.
+
+        Returns:
+            str: The converted HTML. None if the note is not in the cache, or the cache is closed already.
+        """
+        try:
+            row = self.connection.execute(
+                "SELECT html FROM notes WHERE key = ?", (self.key(content_hash),)
+            ).fetchone()
+        except SQLiteError as err:
+            logger.debug(f"Unable to look up note in the note cache: {err}")
+            return None
+        return None if row is None else row[0]
+
+    def put_many(self, entries: list[tuple[str, dict[str], str]]) -> None:
+        """Add several converted notes to the cache.
+
+        Args:
+            entries (list of tuple): The (content hash, metadata, HTML) of each note.
+        """
+        now = time()
+        rows = []
+        for content_hash, metadata, html in entries:
+            pickled_metadata = dumps(metadata, protocol=HIGHEST_PROTOCOL)
+            rows.append(
+                (
+                    self.key(content_hash),
+                    pickled_metadata,
+                    html,
+                    len(pickled_metadata) + len(html.encode()),
+                    now,
+                )
+            )
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def evict(self) -> int:
+        """Evict the least recently used entries until the cache is back under its maximum size.
+
+        Returns:
+            int: Number of entries evicted.
+        """
+        total_size = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM notes"
+        ).fetchone()[0]
+        if total_size <= self.max_size:
+            return 0
+
+        evicted = []
+        rows = self.connection.execute(
+            "SELECT key, size FROM notes ORDER BY last_used, rowid"
+        )
+        for key, size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted.append((key,))
+            total_size -= size
+        with self.connection:
+            self.connection.executemany("DELETE FROM notes WHERE key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} entries from the note cache")
+        return len(evicted)
+
+    def close(self) -> None:
+        """Record which entries were used by this build, evict entries if needed and close the cache.
+
+        A temporary cache is deleted instead, and a read-only one only closed.
+        """
+        if self.read_only:
+            self.connection.close()
+            return
+        if self.temporary:
+            self.connection.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.cache_path}{suffix}").unlink(missing_ok=True)
+            return
+        try:
+            now = time()
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE notes SET last_used = ? WHERE key = ?",
+                    ((now, key) for key in self.used_keys),
+                )
+            self.evict()
+        except SQLiteError as err:
+            logger.exception(f"Error updating the note cache: {err}")
+        finally:
+            self.connection.close()
+        logger.info(f"Note cache hits: {self.hits}, misses: {self.misses}")
+
+
+def open_note_cache(
+    cache_path: Path | str,
+    max_size_mb: int | float = DEFAULT_CACHE_MAX_MB,
+    temporary: bool = False,
+    read_only: bool = False,
+) -> NoteCache | None:
+    """Open the note cache, without failing the build if it can not be opened.
+
+    Args:
+        cache_path (Path or str): Path to the SQLite database file.
+        max_size_mb (int or float): Maximum size of all the cached entries, in MiB. Defaults to DEFAULT_CACHE_MAX_MB.
+        temporary (bool): Delete the database file once closed. Defaults to False.
+        read_only (bool): Only load converted notes from the cache. Defaults to False.
+
+    Returns:
+        NoteCache: The note cache. None if it could not be opened, in which case the build goes on without it.
+    """
+    try:
+        return NoteCache(cache_path, max_size_mb, temporary, read_only)
+    except SQLiteError as err:
+        logger.exception(
+            f"Unable to open note cache at {cache_path}, not using it: {err}"
+        )
+        return None
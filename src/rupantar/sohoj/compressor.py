@@ -0,0 +1,210 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from gzip import compress
+from logging import getLogger
+from os import cpu_count, replace, utime
+from pathlib import Path
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.syncer import iter_files, remove_empty_parents
+
+logger = getLogger()
+
+# Files worth pre-compressing, others (eg: images) are compressed already
+COMPRESSIBLE_SUFFIXES = (".html", ".htm", ".xml", ".css", ".js")
+DEFAULT_GZIP_LEVEL = 9
+
+
+@dataclass(slots=True)
+class CompressReport:
+    """Store the outcome of pre-compressing an output directory.
+
+    Attributes:
+        files (set[str]): Paths, relative to the output directory, of every .gz file now in it.
+        compressed (int): Number of files (re-)compressed.
+        unchanged (int): Number of files whose .gz was already up to date.
+        skipped (int): Number of files not compressed, as compressing them did not make them any smaller.
+    """
+
+    files: set[str] = field(default_factory=set)
+    compressed: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+
+def is_compressible(name: str) -> bool:
+    """Check if a file is worth pre-compressing, going by its name.
+
+    Args:
+        name (str): The file's name or path.
+
+    Returns:
+        bool: True for HTML, XML, CSS and JavaScript files.
+    """
+    return name.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def gzip_bytes(data: bytes, level: int = DEFAULT_GZIP_LEVEL) -> bytes | None:
+    """Compress some data with gzip, if that makes it any smaller.
+
+    The gzip header's timestamp is left out, so the same data always compresses to the same bytes.
+
+    Args:
+        data (bytes): The data to compress.
+        level (int): Compression level, 1 (fastest) to 9 (smallest). Defaults to DEFAULT_GZIP_LEVEL.
+
+    Returns:
+        bytes: The compressed data. None if it is not smaller than the data itself.
+    """
+    compressed = compress(data, compresslevel=level, mtime=0)
+    return compressed if len(compressed) < len(data) else None
+
+
+def compress_file(path: Path, level: int) -> str:
+    """Write a .gz sibling of a file, unless there is an up to date one already.
+
+    The .gz file is given the same modification time as the file, which is how it is told to be up to date.
+
+    Args:
+        path (Path): The file to compress.
+        level (int): Compression level.
+
+    Returns:
+        str: 'compressed', 'unchanged' or 'skipped' (if compressing did not make it smaller, any existing .gz is removed).
+    """
+    gz_path = Path(f"{path}.gz")
+    stats = path.stat()
+    try:
+        if gz_path.stat().st_mtime_ns == stats.st_mtime_ns:
+            return "unchanged"
+    except FileNotFoundError:
+        pass
+
+    compressed = gzip_bytes(path.read_bytes(), level)
+    if compressed is None:
+        gz_path.unlink(missing_ok=True)
+        return "skipped"
+    tmp_path = Path(f"{path}.gz.tmp")
+    tmp_path.write_bytes(compressed)
+    utime(tmp_path, ns=(stats.st_atime_ns, stats.st_mtime_ns))
+    replace(tmp_path, gz_path)
+    return "compressed"
+
+
+def compress_tree(
+    directory: Path | str,
+    level: int = DEFAULT_GZIP_LEVEL,
+    keep: set[str] | None = None,
+    threads: int | None = None,
+) -> CompressReport:
+    """Write a .gz sibling of every HTML, XML, CSS and JavaScript file in a directory, in parallel.
+
+    Files whose .gz is up to date are skipped. .gz files left behind by since deleted files are removed, along with any directories they leave empty.
+    Compression is done by a pool of threads, as zlib releases the GIL while compressing.
+
+    Note:
+        Reference: https://docs.python.org/3/library/gzip.html#gzip.compress
+
+    Args:
+        directory (Path or str): The output directory (eg: public/).
+        level (int): Compression level, 1 (fastest) to 9 (smallest). Defaults to DEFAULT_GZIP_LEVEL.
+        keep (set of str, optional): Relative paths of .gz files not to be removed even if orphaned (eg: ones shipped as static assets).
+        threads (int, optional): Number of threads to compress with. Defaults to the number of CPUs.
+
+    Returns:
+        CompressReport: What was compressed.
+
+    Raises:
+        OSError: If any error reading or writing files.
+    """
+    directory = Path(directory)
+    report = CompressReport()
+    sources, gz_files = [], []
+    for entry in iter_files(directory):
+        if entry.name.endswith(".gz"):
+            gz_files.append(Path(entry.path))
+        elif is_compressible(entry.name):
+            sources.append(Path(entry.path))
+
+    with ThreadPoolExecutor(max_workers=threads or cpu_count() or 1) as pool:
+        for source, outcome in zip(
+            sources, pool.map(lambda path: compress_file(path, level), sources)
+        ):
+            if outcome == "skipped":
+                report.skipped += 1
+                continue
+            report.files.add(f"{source.relative_to(directory).as_posix()}.gz")
+            if outcome == "compressed":
+                report.compressed += 1
+            else:
+                report.unchanged += 1
+
+    for gz_path in gz_files:
+        name = gz_path.relative_to(directory).as_posix()
+        if name not in report.files and name not in (keep or set()):
+            logger.debug(f"Removing orphaned: {gz_path}")
+            gz_path.unlink(missing_ok=True)
+            remove_empty_parents(gz_path, directory)
+
+    logger.info(
+        f"Pre-compressed {directory}: {report.compressed} compressed, {report.unchanged} unchanged, {report.skipped} not smaller"
+    )
+    return report
+
+
+def compress_store(
+    store: MemoryStore,
+    level: int = DEFAULT_GZIP_LEVEL,
+    keep: set[str] | None = None,
+    threads: int | None = None,
+) -> CompressReport:
+    """Add a .gz variant of every HTML, XML, CSS and JavaScript file to an in-memory output directory, in parallel.
+
+    Counterpart of compress_tree() for the in-memory output directory.
+
+    Args:
+        store (MemoryStore): The in-memory output directory.
+        level (int): Compression level, 1 (fastest) to 9 (smallest). Defaults to DEFAULT_GZIP_LEVEL.
+        keep (set of str, optional): .gz files not to be removed even if orphaned.
+        threads (int, optional): Number of threads to compress with. Defaults to the number of CPUs.
+
+    Returns:
+        CompressReport: What was compressed.
+    """
+    report = CompressReport()
+    outdated = []
+    for name in list(store):
+        if not is_compressible(name):
+            continue
+        compressed = store.get(f"{name}.gz")
+        if compressed is not None and compressed.mtime >= store.get(name).mtime:
+            report.files.add(f"{name}.gz")
+            report.unchanged += 1
+        else:
+            outdated.append(name)
+
+    with ThreadPoolExecutor(max_workers=threads or cpu_count() or 1) as pool:
+        results = pool.map(
+            lambda name: gzip_bytes(store.get(name).contents, level), outdated
+        )
+        for name, compressed in zip(outdated, results):
+            if compressed is None:
+                store.remove(f"{name}.gz")
+                report.skipped += 1
+            else:
+                store.write(f"{name}.gz", compressed)
+                report.files.add(f"{name}.gz")
+                report.compressed += 1
+
+    for name in list(store):
+        if (
+            name.endswith(".gz")
+            and name not in report.files
+            and name not in (keep or set())
+        ):
+            store.remove(name)
+
+    logger.info(
+        f"Pre-compressed in memory: {report.compressed} compressed, {report.unchanged} unchanged, {report.skipped} not smaller"
+    )
+    return report
@@ -75,9 +75,12 @@ footer_md : content/footer.md   # Footer
 
 # Optional (Custom configs included here)
 site_title : Demo Page Title
-css : demo.css
+css : /demo.css  # Absolute path, for pages in sub-directories too
 desc : {desc}   # page description
 mail : some@mail.com
+# posts_per_page : 10   # Split the home page's list of posts into pages of this many
+# feed_limit : 20   # Only the newest posts in the RSS feed
+# feed_excerpt : true   # Only an excerpt of each post in the RSS feed, up to <!--more--> or this many characters (500 if true)
 """
             conf_file.write(conf_data)
             logger.debug(f"Created {config_file_path.name} at: {config_file_path}")
@@ -137,6 +140,12 @@ def create_home_template(project_folder: str) -> None | OSError:
     {% endif %}
     {% endfor %}
     </ul>
+    {% if prevpage or nextpage %}
+    <nav>
+    {% if prevpage %}<a href="{{ prevpage }}">&larr; newer posts</a>{% endif %}
+    {% if nextpage %}<a href="{{ nextpage }}">older posts &rarr;</a>{% endif %}
+    </nav>
+    {% endif %}
     </section>
 
     <!--
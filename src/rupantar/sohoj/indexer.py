@@ -0,0 +1,164 @@
+from __future__ import annotations
+from fnmatch import fnmatchcase
+from logging import getLogger
+from os import scandir, stat
+from pathlib import Path
+from stat import S_ISDIR, S_ISREG
+from typing import Iterable
+
+logger = getLogger()
+
+# Extension of the notes' markdown files
+NOTE_SUFFIX = ".md"
+
+
+class ContentIndex:
+    """Index of every note in a project's notes directory (eg: content/notes/) and its sub-directories.
+
+    Built with os.scandir(), recording the size and modification time of each note as it is listed.
+    The build manifest then re-uses those to tell if a note changed, instead of fetching them again (see BuildManifest.hash_inputs()).
+
+    Kept by a serve session across builds, the index is refreshed with just the paths that changed (see refresh()),
+    so only they are looked at again, instead of walking the whole tree on every change.
+
+    Files and directories matching any of the ignore patterns are left out. A pattern is matched (see fnmatch) against
+    both the name of each file or directory, and its path relative to the notes directory. Eg: 'drafts', '2019/*', '*.draft.md'
+
+    Note:
+        Reference: https://docs.python.org/3/library/os.html#os.scandir
+
+    Args:
+        notes_path (Path or str): Absolute path to the notes directory.
+        ignore (iterable of str, optional): Patterns of files and directories to leave out.
+    """
+
+    def __init__(
+        self, notes_path: Path | str, ignore: Iterable[str] | None = None
+    ) -> None:
+        self.notes_path = Path(notes_path)
+        self.ignore = tuple(ignore or ())
+        # (modification time, size) of every note, by it's path relative to the notes directory, in POSIX form
+        self.notes: dict[str, tuple[int, int]] = {}
+
+    def is_ignored(self, relative_path: str) -> bool:
+        """Check if a file or directory matches any of the ignore patterns.
+
+        Args:
+            relative_path (str): Its path relative to the notes directory, in POSIX form.
+
+        Returns:
+            bool: True if it is to be left out.
+        """
+        name = relative_path.rpartition("/")[2]
+        return any(
+            fnmatchcase(name, pattern) or fnmatchcase(relative_path, pattern)
+            for pattern in self.ignore
+        )
+
+    def scan(self, relative_dir: str = "") -> int:
+        """(Re-)index a directory, and all of it's sub-directories. The whole notes directory by default.
+
+        Args:
+            relative_dir (str): The directory, relative to the notes directory. Defaults to the notes directory itself.
+
+        Returns:
+            int: Number of notes found.
+
+        Raises:
+            OSError: If any error listing the notes directory.
+        """
+        self.forget(relative_dir)
+        found = 0
+        pending = [relative_dir]
+        while pending:
+            current = pending.pop()
+            try:
+                entries = scandir(Path(self.notes_path, current))
+            except (FileNotFoundError, NotADirectoryError):
+                if current == relative_dir:
+                    raise
+                # Removed since it was listed
+                continue
+            with entries:
+                for entry in entries:
+                    relative_path = f"{current}/{entry.name}" if current else entry.name
+                    if self.is_ignored(relative_path):
+                        continue
+                    if entry.is_dir():
+                        pending.append(relative_path)
+                    elif entry.name.endswith(NOTE_SUFFIX) and entry.is_file():
+                        stats = entry.stat()
+                        self.notes[relative_path] = (stats.st_mtime_ns, stats.st_size)
+                        found += 1
+        logger.debug(f"Indexed {found} notes in: {Path(self.notes_path, relative_dir)}")
+        return found
+
+    def forget(self, relative_path: str) -> None:
+        """Drop a note, or every note in a directory, from the index.
+
+        Args:
+            relative_path (str): The note or directory, relative to the notes directory. Empty for the notes directory itself.
+        """
+        if not relative_path:
+            self.notes.clear()
+            return
+        self.notes.pop(relative_path, None)
+        prefix = f"{relative_path}/"
+        for note in [note for note in self.notes if note.startswith(prefix)]:
+            del self.notes[note]
+
+    def refresh(self, changed_paths: Iterable[Path | str]) -> bool:
+        """Update the index for a set of changed paths, eg: as reported by watchfiles in serve mode.
+
+        Only the changed paths are looked at: a note is stat-ed again, a directory is re-scanned, and anything gone is dropped.
+
+        Args:
+            changed_paths (iterable of Path or str): Absolute paths of the files and directories that changed. Ones outside the notes directory are skipped.
+
+        Returns:
+            bool: True if any of the paths was within the notes directory.
+        """
+        touched = False
+        for changed_path in changed_paths:
+            changed_path = Path(changed_path)
+            if not changed_path.is_relative_to(self.notes_path):
+                continue
+            touched = True
+            relative_path = changed_path.relative_to(self.notes_path).as_posix()
+            if relative_path == ".":
+                self.scan()
+                continue
+            # Within an ignored directory, or ignored itself
+            parts = relative_path.split("/")
+            if any(
+                self.is_ignored("/".join(parts[:depth]))
+                for depth in range(1, len(parts) + 1)
+            ):
+                continue
+            try:
+                stats = stat(changed_path)
+            except OSError:
+                # Deleted (or moved away)
+                self.forget(relative_path)
+                continue
+            if S_ISDIR(stats.st_mode):
+                self.scan(relative_path)
+            elif S_ISREG(stats.st_mode) and relative_path.endswith(NOTE_SUFFIX):
+                self.notes[relative_path] = (stats.st_mtime_ns, stats.st_size)
+        return touched
+
+    def paths(self) -> list[Path]:
+        """Get the paths of every indexed note.
+
+        Returns:
+            list of Path: Absolute paths of the notes, sorted by their path relative to the notes directory.
+        """
+        return [Path(self.notes_path, note) for note in sorted(self.notes)]
+
+    def stats(self) -> dict[Path, tuple[int, int]]:
+        """Get the size and modification time of every indexed note, for the build manifest to re-use.
+
+        Returns:
+            dict: Mapping of each note's absolute path to it's (modification time in nanoseconds, size).
+        """
+        return {Path(self.notes_path, note): stats for note, stats in self.notes.items()}
@@ -0,0 +1,275 @@
+from __future__ import annotations
+from hashlib import sha256
+from json import dumps, load, JSONDecodeError
+from logging import getLogger
+from os import replace
+from pathlib import Path
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.syncer import file_digest, iter_files, remove_empty_parents
+
+logger = getLogger()
+
+
+class BuildManifest:
+    """Record of what every generated output was built from, persisted between builds.
+
+    For each output (eg: 'example_blog.html'), the manifest stores the source note it was generated from
+    along with the content hash of every input that went into rendering it (note markdown, template, config, header/footer...).
+    On an incremental build, an output only needs to be re-rendered if any of those hashes changed.
+
+    File hashes are memoized against the file's size and modification time, so unchanged inputs are not re-hashed on every build.
+    The same goes for the content hash of every file in the output directory, sent as its ETag by the web server (see record_etags()).
+
+    Note:
+        All paths stored in the manifest are relative to the rupantar project directory, in POSIX form.
+
+    Args:
+        project_folder_path (Path or str): Absolute path to the rupantar project directory.
+        manifest_path (Path or str): Absolute path to the manifest JSON file. Need not exist yet.
+
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, project_folder_path: Path | str, manifest_path: Path | str
+    ) -> None:
+        self.project_folder_path = Path(project_folder_path)
+        self.manifest_path = Path(manifest_path)
+        self.files: dict[str, list] = {}
+        self.outputs: dict[str, dict] = {}
+        # Static assets synced into the output directory, relative to it
+        self.assets: set[str] = set()
+        # (modification time, size, content hash) of every file in the output directory, relative to it
+        self.etags: dict[str, list] = {}
+        # Memoized keys of paths, as deriving them through pathlib adds up over every note of every build
+        self.keys: dict[Path | str, str] = {}
+
+        try:
+            with open(self.manifest_path) as manifest_file:
+                data = load(manifest_file)
+            if data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+                self.outputs = data.get("outputs", {})
+                self.assets = set(data.get("assets", []))
+                self.etags = data.get("etags", {})
+                logger.info(f"Loaded build manifest from: {self.manifest_path}")
+            else:
+                logger.warning(
+                    f"Build manifest at {self.manifest_path} is of an older version. Ignoring it."
+                )
+        except FileNotFoundError:
+            logger.info(f"No build manifest found at: {self.manifest_path}")
+        except (OSError, JSONDecodeError) as err:
+            logger.warning(f"Unable to read build manifest {self.manifest_path}: {err}")
+
+    def key(self, path: Path | str) -> str:
+        """Get the manifest key of a given path i.e. the path relative to the project directory.
+
+        Args:
+            path (Path or str): Absolute path, or path relative to the project directory.
+
+        Returns:
+            str: The project-relative path, in POSIX form.
+        """
+        file_key = self.keys.get(path)
+        if file_key is None:
+            relative_path = Path(path)
+            if relative_path.is_absolute():
+                relative_path = relative_path.relative_to(self.project_folder_path)
+            file_key = self.keys[path] = relative_path.as_posix()
+        return file_key
+
+    def file_hash(self, path: Path | str, stats: tuple[int, int] | None = None) -> str:
+        """Get the SHA-256 content hash of a file, re-using the memoized hash if the file is unchanged since.
+
+        Args:
+            path (Path or str): Path to the file.
+            stats (tuple, optional): The file's (modification time in nanoseconds, size), if known already. Fetched otherwise.
+
+        Returns:
+            str: Hex digest of the file contents. Empty string if the file does not exist.
+        """
+        file_key = self.key(path)
+        if stats is None:
+            try:
+                file_stats = Path(self.project_folder_path, file_key).stat()
+            except FileNotFoundError:
+                self.files.pop(file_key, None)
+                return ""
+            stats = (file_stats.st_mtime_ns, file_stats.st_size)
+
+        memo = self.files.get(file_key)
+        if memo and memo[0] == stats[0] and memo[1] == stats[1]:
+            return memo[2]
+
+        try:
+            with open(Path(self.project_folder_path, file_key), "rb") as infile:
+                digest = sha256(infile.read()).hexdigest()
+        except FileNotFoundError:
+            # Deleted since it's stats were fetched
+            self.files.pop(file_key, None)
+            return ""
+        self.files[file_key] = [stats[0], stats[1], digest]
+        return digest
+
+    def hash_inputs(
+        self, *paths: Path | str, stats: dict[Path, tuple[int, int]] | None = None
+    ) -> dict[str, str]:
+        """Hash several input files at once.
+
+        Args:
+            *paths (Path or str): Paths to the input files.
+            stats (dict, optional): Mapping of input paths to their (modification time in nanoseconds, size), if known already (see indexer.ContentIndex).
+
+        Returns:
+            dict: Mapping of each input's manifest key to its content hash.
+        """
+        if stats is None:
+            return {self.key(path): self.file_hash(path) for path in paths}
+        return {self.key(path): self.file_hash(path, stats.get(path)) for path in paths}
+
+    def is_fresh(
+        self, output: str, inputs: dict[str, str], output_path: Path | None
+    ) -> bool:
+        """Check if an output is up to date i.e. it exists and was built from exactly these inputs.
+
+        Args:
+            output (str): The output's name, relative to the output directory.
+            inputs (dict): Current hashes of every input of the output.
+            output_path (Path or None): Where the output is expected to be located. None to leave checking that it exists to the caller (eg: output kept in memory).
+
+        Returns:
+            bool: True if the output does not need to be re-rendered.
+        """
+        entry = self.outputs.get(output)
+        return (
+            entry is not None
+            and entry["inputs"] == inputs
+            and (output_path is None or output_path.exists())
+        )
+
+    def record(self, output: str, source: str | None, inputs: dict[str, str]) -> None:
+        """Record the inputs an output was (re-)built from.
+
+        Args:
+            output (str): The output's name, relative to the output directory.
+            source (str or None): Manifest key of the note the output was generated from. None for site-wide pages (eg: index.html).
+            inputs (dict): Hashes of every input of the output.
+        """
+        self.outputs[output] = {"source": source, "inputs": inputs}
+
+    def remove_stale(self, live_sources: set[str], output_dir: Path | None) -> list[str]:
+        """Delete outputs whose source note no longer exists, and drop them from the manifest.
+
+        Directories of the output directory left empty by it (eg: public/2024/) are removed too.
+
+        Args:
+            live_sources (set of str): Manifest keys of all notes currently in the project.
+            output_dir (Path or None): The output directory (eg: public/). None to leave deleting the outputs to the caller.
+
+        Returns:
+            list: Names of the outputs that were removed.
+        """
+        stale = [
+            output
+            for output, entry in self.outputs.items()
+            if entry["source"] is not None and entry["source"] not in live_sources
+        ]
+        for output in stale:
+            logger.info(f"Source of {output} is gone. Removing it.")
+            if output_dir is not None:
+                Path(output_dir, output).unlink(missing_ok=True)
+                remove_empty_parents(Path(output_dir, output), output_dir)
+            self.files.pop(self.outputs.pop(output)["source"], None)
+        return stale
+
+    def record_etags(self, output_dir: Path) -> int:
+        """Record the content hash of every file in the output directory, for the web server to send as its (strong) ETag.
+
+        Only files new or changed since they were last hashed, going by their size and modification time, are hashed again.
+        Entries are updated in place, so a web server can keep reading them while they are.
+
+        Note:
+            Reference: https://httpwg.org/specs/rfc9110.html#field.etag
+
+        Args:
+            output_dir (Path): The output directory (eg: public/).
+
+        Returns:
+            int: Number of files hashed.
+
+        Raises:
+            OSError: If any error reading files.
+        """
+        prefix = len(str(output_dir)) + 1
+        names = set()
+        hashed = 0
+        for entry in iter_files(output_dir):
+            name = entry.path[prefix:].replace("\\", "/")
+            names.add(name)
+            stats = entry.stat()
+            memo = self.etags.get(name)
+            if memo and memo[0] == stats.st_mtime_ns and memo[1] == stats.st_size:
+                continue
+            self.etags[name] = [
+                stats.st_mtime_ns,
+                stats.st_size,
+                file_digest(Path(entry.path)),
+            ]
+            hashed += 1
+        for name in self.etags.keys() - names:
+            del self.etags[name]
+        logger.info(f"Hashed {hashed} new or changed files in: {output_dir}")
+        return hashed
+
+    def record_store_etags(self, store: MemoryStore) -> int:
+        """Record the content hash of every file in an in-memory output directory, see record_etags().
+
+        Args:
+            store (MemoryStore): The in-memory output directory.
+
+        Returns:
+            int: Number of files hashed.
+        """
+        hashed = 0
+        for name in list(store):
+            stored = store.get(name)
+            memo = self.etags.get(name)
+            if memo and memo[0] == stored.mtime and memo[1] == len(stored.contents):
+                continue
+            self.etags[name] = [
+                stored.mtime,
+                len(stored.contents),
+                sha256(stored.contents).hexdigest(),
+            ]
+            hashed += 1
+        for name in self.etags.keys() - set(store):
+            del self.etags[name]
+        return hashed
+
+    def save(self) -> None:
+        """Write the manifest to disk.
+
+        Written to a temporary file first and then moved in place, so an interrupted build never leaves a truncated manifest behind.
+
+        Raises:
+            OSError: If any error writing the manifest file.
+        """
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as manifest_file:
+            # Encoded in one go, json.dump() encodes it piece by piece (in Python) instead
+            manifest_file.write(
+                dumps(
+                    {
+                        "version": self.VERSION,
+                        "files": self.files,
+                        "outputs": self.outputs,
+                        "assets": sorted(self.assets),
+                        "etags": self.etags,
+                    }
+                )
+            )
+        replace(tmp_path, self.manifest_path)
+        logger.info(f"Saved build manifest to: {self.manifest_path}")
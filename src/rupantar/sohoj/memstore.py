@@ -0,0 +1,154 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from logging import getLogger
+from os import utime
+from pathlib import Path
+from time import time
+from typing import Iterator
+from rupantar.sohoj.syncer import iter_files, prune_tree
+
+logger = getLogger()
+
+
+@dataclass(slots=True, frozen=True)
+class StoredFile:
+    """Store a file of the in-memory output directory.
+
+    Attributes:
+        contents (bytes): The file's contents.
+        mtime (float): When the file was last written, in seconds since the epoch. Served as Last-Modified.
+    """
+
+    contents: bytes
+    mtime: float
+
+
+class MemoryStore:
+    """Output directory kept in memory, instead of on disk.
+
+    Maps the path of each output (eg: 'index.html', 'css/style.css'), relative to the output directory, to its contents.
+    Used when previewing a site, so that builds write nothing to disk and the web server serves pages straight from memory.
+    Can be written out to an actual directory on demand, see persist().
+    """
+
+    def __init__(self) -> None:
+        self.files: dict[str, StoredFile] = {}
+        # (modification time in ns, size) of the source of each static asset, to tell if it needs to be read again
+        self.asset_sources: dict[str, tuple[int, int]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def get(self, name: str) -> StoredFile | None:
+        """Get a file.
+
+        Args:
+            name (str): Path of the file, relative to the output directory.
+
+        Returns:
+            StoredFile: The file. None if there is no such file.
+        """
+        return self.files.get(name)
+
+    def write(self, name: str, contents: bytes) -> None:
+        """Add a file, replacing any existing one.
+
+        Args:
+            name (str): Path of the file, relative to the output directory.
+            contents (bytes): The file's contents.
+        """
+        self.files[name] = StoredFile(contents, time())
+
+    def remove(self, name: str) -> None:
+        """Remove a file, if it exists.
+
+        Args:
+            name (str): Path of the file, relative to the output directory.
+        """
+        self.files.pop(name, None)
+        self.asset_sources.pop(name, None)
+
+    def load_tree(
+        self, source_dir: Path | str, previous_files: set[str] | None = None
+    ) -> set[str]:
+        """Load a directory of static assets into the store, only reading files that are new or changed.
+
+        Counterpart of syncer.sync_tree() for the in-memory output directory.
+
+        Args:
+            source_dir (Path or str): The directory to load (eg: static/).
+            previous_files (set of str, optional): Relative paths of the files loaded last time.
+
+        Returns:
+            set of str: Relative paths of every file now loaded.
+
+        Raises:
+            OSError: If any error reading files.
+        """
+        source_dir = Path(source_dir)
+        files = set()
+        loaded = 0
+        for entry in iter_files(source_dir):
+            name = Path(entry.path).relative_to(source_dir).as_posix()
+            files.add(name)
+            stats = entry.stat()
+            source = (stats.st_mtime_ns, stats.st_size)
+            if name in self.files and self.asset_sources.get(name) == source:
+                continue
+            with open(entry.path, "rb") as infile:
+                self.write(name, infile.read())
+            self.asset_sources[name] = source
+            loaded += 1
+
+        for name in (previous_files or set()) - files:
+            self.remove(name)
+        logger.info(
+            f"Loaded {loaded} new or changed static files from {source_dir} into memory"
+        )
+        return files
+
+    def prune(self, keep: set[str]) -> int:
+        """Remove every file other than the ones to keep.
+
+        Args:
+            keep (set of str): Relative paths of the files to keep.
+
+        Returns:
+            int: Number of files removed.
+        """
+        stale = self.files.keys() - keep
+        for name in stale:
+            self.remove(name)
+        return len(stale)
+
+    def persist(self, directory: Path | str) -> int:
+        """Write the store out to a directory, which then mirrors it exactly.
+
+        Files not in the store are removed from the directory.
+
+        Args:
+            directory (Path or str): The directory to write to (eg: public/). Created if it does not exist.
+
+        Returns:
+            int: Number of files written.
+
+        Raises:
+            OSError: If any error writing files.
+        """
+        directory = Path(directory)
+        for name, stored in list(self.files.items()):
+            path = Path(directory, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Replace, rather than write through, any existing (possibly hard-linked) file
+            path.unlink(missing_ok=True)
+            path.write_bytes(stored.contents)
+            utime(path, (stored.mtime, stored.mtime))
+        prune_tree(directory, set(self.files))
+        logger.info(f"Wrote {len(self.files)} files from memory to: {directory}")
+        return len(self.files)
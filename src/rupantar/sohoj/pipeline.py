@@ -0,0 +1,116 @@
+"""This module provides the building blocks for running a build as a pipeline of overlapping stages.
+
+A build reads notes from disk, renders them (CPU-bound) and writes the pages back to disk.
+Instead of doing all three one note at a time, the reading and writing are handed off to small pools of threads,
+joined to the rendering by bounded queues, so that disk latency is hidden behind rendering.
+The bounds keep memory usage in check if one stage is much faster than the others.
+"""
+
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from queue import Queue
+from threading import Thread
+from typing import Any, Callable, Iterable, Iterator
+
+logger = getLogger()
+
+# Defaults for the size of the thread pools and queues between stages
+STAGE_THREADS = 4
+QUEUE_DEPTH = 64
+
+
+def prefetch(
+    function: Callable,
+    items: Iterable,
+    threads: int = STAGE_THREADS,
+    depth: int = QUEUE_DEPTH,
+) -> Iterator[tuple[Any, Any]]:
+    """Apply a function to each item using a pool of threads, staying ahead of the consumer by at most `depth` items.
+
+    Results are yielded in the same order as the items, regardless of which finishes first.
+
+    Args:
+        function (callable): The function to apply, eg: reading a file.
+        items (iterable): The items to apply the function to.
+        threads (int): Number of threads to use. Defaults to STAGE_THREADS.
+        depth (int): Maximum number of items being processed or waiting to be consumed. Defaults to QUEUE_DEPTH.
+
+    Yields:
+        tuple: Each item along with the result of the function for it.
+
+    Raises:
+        Exception: Whatever the function raised for an item, when that item's result is reached.
+    """
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="reader") as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(function, item)))
+            if len(pending) >= depth:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        while pending:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+
+
+class BackgroundWriter:
+    """Run functions (eg: writing files) in a pool of threads, fed from a bounded queue.
+
+    Submitting blocks once `depth` calls are waiting, so that the producer can never get too far ahead of the disk.
+    Used as a context manager; leaving the context waits for all submitted calls to complete.
+
+    Args:
+        threads (int): Number of threads to use. Defaults to STAGE_THREADS.
+        depth (int): Maximum number of calls waiting to run. Defaults to QUEUE_DEPTH.
+
+    Raises:
+        Exception: The first error raised by any of the calls, re-raised when leaving the context.
+    """
+
+    def __init__(self, threads: int = STAGE_THREADS, depth: int = QUEUE_DEPTH) -> None:
+        self.queue = Queue(maxsize=depth)
+        self.errors = []
+        self.threads = [
+            Thread(target=self._work, name=f"writer-{num}", daemon=True)
+            for num in range(threads)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _work(self) -> None:
+        while True:
+            call = self.queue.get()
+            if call is None:
+                break
+            function, args = call
+            try:
+                function(*args)
+            except Exception as err:
+                logger.exception(f"Error in background call {function.__name__}: {err}")
+                self.errors.append(err)
+
+    def submit(self, function: Callable, *args: Any) -> None:
+        """Queue a function call, blocking while the queue is full.
+
+        Args:
+            function (callable): The function to call.
+            *args: Arguments to call it with.
+        """
+        self.queue.put((function, args))
+
+    def close(self) -> None:
+        """Wait for all queued calls to complete and stop the threads."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def __enter__(self) -> BackgroundWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        if self.errors and exc_info[0] is None:
+            raise self.errors[0]
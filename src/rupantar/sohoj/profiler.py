@@ -0,0 +1,306 @@
+"""This module provides a phase-level timing profile of a build, see `rupantar build --profile`.
+
+The build is split into phases (eg: markdown conversion, template rendering), and the time spent in each is recorded
+along with the note it was spent on, if any. Phases run concurrently (eg: pages are written by background threads,
+notes are built by worker processes), so the phase totals add up to more than the build's wall time.
+
+Timing is off unless a profile is active, in which case the timers cost next to nothing.
+"""
+
+from __future__ import annotations
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from json import dumps
+from logging import getLogger
+from math import ceil
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import IO, Iterable
+
+logger = getLogger()
+
+# Phases of a build, in the order they (first) happen
+PHASES = {
+    "config": "Config load",
+    "assets": "Asset copy",
+    "cache": "Note cache",
+    "read": "Note read",
+    "front_matter": "Front matter parse",
+    "markdown": "Markdown conversion",
+    "render": "Template render",
+    "write": "Write",
+    "finish": "Finish",
+}
+# Number of the slowest notes reported
+SLOWEST_NOTES = 20
+
+# The profile being recorded to, if any
+_active_profile: BuildProfile | None = None
+# Stands in for a timer when not profiling
+_NOT_TIMED = nullcontext()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Get a percentile of some values, by the nearest-rank method.
+
+    Args:
+        values (list of float): The values, sorted in ascending order.
+        fraction (float): The percentile, as a fraction (eg: 0.95).
+
+    Returns:
+        float: The smallest value that at least the given fraction of values are less than or equal to. 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    return values[max(0, ceil(fraction * len(values)) - 1)]
+
+
+def summarize(values: Iterable[float]) -> dict[str, float]:
+    """Get the count, total, median, 95th percentile and maximum of some durations.
+
+    Args:
+        values (iterable of float): The durations, in seconds.
+
+    Returns:
+        dict: The summary.
+    """
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+class BuildProfile:
+    """Timings of a build, per phase and per note.
+
+    Attributes:
+        phases (dict): Mapping of each phase to the duration of each time it was run, in seconds.
+        notes (dict): Mapping of each note (by the name of its page, eg: 'example_blog.html') to the time spent on it in each phase.
+        wall_time (float): Duration of the whole build, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list[float]] = {phase: [] for phase in PHASES}
+        self.notes: dict[str, dict[str, float]] = {}
+        self.wall_time = 0.0
+        self.started = 0.0
+        self.lock = Lock()
+
+    def add(self, phase: str, seconds: float, note: str | None = None) -> None:
+        """Record time spent in a phase. Safe to call from any thread.
+
+        Args:
+            phase (str): The phase, one of PHASES.
+            seconds (float): Time spent.
+            note (str, optional): The note it was spent on, if any.
+        """
+        with self.lock:
+            self.phases[phase].append(seconds)
+            if note is not None:
+                note_phases = self.notes.setdefault(note, {})
+                note_phases[phase] = note_phases.get(phase, 0.0) + seconds
+
+    def take_samples(self) -> list[tuple[str, float, str | None]]:
+        """Take every per-note time recorded so far, leaving the profile empty. Used to send them from a worker process to the parent.
+
+        Returns:
+            list of tuple: The (phase, seconds, note) of each recorded time.
+        """
+        with self.lock:
+            samples = [
+                (phase, seconds, note)
+                for note, note_phases in self.notes.items()
+                for phase, seconds in note_phases.items()
+            ]
+            self.phases = {phase: [] for phase in PHASES}
+            self.notes = {}
+        return samples
+
+    def summary(self) -> dict:
+        """Summarize the profile.
+
+        Returns:
+            dict: Wall time, summary of each phase (see summarize()), summary of the per-note totals, and the SLOWEST_NOTES slowest notes.
+        """
+        note_totals = {note: sum(phases.values()) for note, phases in self.notes.items()}
+        slowest = sorted(note_totals, key=note_totals.get, reverse=True)[:SLOWEST_NOTES]
+        return {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_time": self.wall_time,
+            "phases": {phase: summarize(times) for phase, times in self.phases.items()},
+            "notes": summarize(note_totals.values()),
+            "slowest_notes": [
+                {"note": note, "total": note_totals[note], "phases": self.notes[note]}
+                for note in slowest
+            ],
+        }
+
+    def format_table(self) -> str:
+        """Format the profile as a plain text table.
+
+        Returns:
+            str: The table.
+        """
+        summary = self.summary()
+        lines = [
+            f"Build profile, {summary['wall_time'] * 1000:.0f} ms wall time",
+            "",
+            f"{'Phase':<22}{'Total ms':>10}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'Max ms':>10}",
+        ]
+        rows = [(PHASES[phase], stats) for phase, stats in summary["phases"].items()]
+        rows.append(("Per note", summary["notes"]))
+        for label, stats in rows:
+            lines.append(
+                f"{label:<22}{stats['total'] * 1000:>10.1f}{stats['count']:>8}"
+                f"{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}{stats['max'] * 1000:>10.2f}"
+            )
+        if summary["slowest_notes"]:
+            lines += ["", f"Slowest {len(summary['slowest_notes'])} notes:"]
+            for slow in summary["slowest_notes"]:
+                lines.append(f"{slow['total'] * 1000:>10.2f} ms  {slow['note']}")
+        return "\n".join(lines)
+
+    def write_json(self, json_path: Path | str) -> None:
+        """Write the profile's summary to a JSON file, eg: to chart build times over time.
+
+        Args:
+            json_path (Path or str): Where to write it.
+
+        Raises:
+            OSError: If any error writing the file.
+        """
+        Path(json_path).write_text(dumps(self.summary(), indent=2))
+        logger.info(f"Wrote build profile to: {json_path}")
+
+
+class PhaseTimer:
+    """Context manager timing a phase, for the active profile."""
+
+    __slots__ = ("profile", "phase", "note", "started")
+
+    def __init__(self, profile: BuildProfile, phase: str, note: str | None) -> None:
+        self.profile = profile
+        self.phase = phase
+        self.note = note
+
+    def __enter__(self) -> PhaseTimer:
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profile.add(self.phase, perf_counter() - self.started, self.note)
+
+
+class TimedWriter:
+    """File wrapper measuring the time spent writing to it. Used to tell rendering and writing apart when a page is streamed to its file.
+
+    Args:
+        file (file object): The file to write to.
+    """
+
+    __slots__ = ("file", "elapsed")
+
+    def __init__(self, file: IO) -> None:
+        self.file = file
+        self.elapsed = 0.0
+
+    def write(self, data) -> None:
+        started = perf_counter()
+        self.file.write(data)
+        self.elapsed += perf_counter() - started
+
+    def writelines(self, lines: Iterable) -> None:
+        for line in lines:
+            self.write(line)
+
+
+def report(profile: BuildProfile, json_path: Path | str | None = None) -> None:
+    """Print a profile as a table and, optionally, write it to a JSON file.
+
+    Args:
+        profile (BuildProfile): The profile.
+        json_path (Path or str, optional): Where to write the JSON file, if at all.
+
+    Raises:
+        OSError: If any error writing the JSON file. Logged, not re-raised.
+    """
+    print(profile.format_table())
+    if json_path is None:
+        return
+    try:
+        profile.write_json(json_path)
+        print(f"Build profile written to: {json_path}")
+    except OSError as err:
+        logger.exception(f"Error writing build profile to {json_path}: {err}")
+
+
+def activate(profile: BuildProfile | None) -> None:
+    """Start recording to a profile, in this process.
+
+    Args:
+        profile (BuildProfile): The profile. None to stop profiling.
+    """
+    global _active_profile
+    _active_profile = profile
+    if profile is not None:
+        profile.started = perf_counter()
+
+
+def deactivate() -> None:
+    """Stop recording to the active profile, if any, noting the build's wall time."""
+    global _active_profile
+    if _active_profile is not None:
+        _active_profile.wall_time = perf_counter() - _active_profile.started
+    _active_profile = None
+
+
+def get_active_profile() -> BuildProfile | None:
+    """Get the profile being recorded to.
+
+    Returns:
+        BuildProfile: The active profile. None if not profiling.
+    """
+    return _active_profile
+
+
+def timed(phase: str, note: str | None = None) -> PhaseTimer | nullcontext:
+    """Time a phase of the build, for the active profile. Eg: `with timed("markdown", "example_blog.html"): ...`
+
+    Args:
+        phase (str): The phase, one of PHASES.
+        note (str, optional): The note the phase is run for, if any.
+
+    Returns:
+        PhaseTimer: A context manager timing its block. Does nothing if not profiling.
+    """
+    if _active_profile is None:
+        return _NOT_TIMED
+    return PhaseTimer(_active_profile, phase, note)
+
+
+def dump_stream(stream, output_file: IO, note: str | None = None) -> None:
+    """Stream a rendered Jinja2 template to a file, timing the rendering and writing separately if profiling.
+
+    Args:
+        stream (jinja2.environment.TemplateStream): The template stream.
+        output_file (file object): The file to write to.
+        note (str, optional): The note the page is for, if any.
+    """
+    profile = _active_profile
+    if profile is None:
+        stream.dump(output_file)
+        return
+    writer = TimedWriter(output_file)
+    started = perf_counter()
+    stream.dump(writer)
+    # Whatever is still buffered would otherwise be written out, untimed, once the file is closed
+    flush_started = perf_counter()
+    output_file.flush()
+    writer.elapsed += perf_counter() - flush_started
+    profile.add("write", writer.elapsed, note)
+    profile.add("render", perf_counter() - started - writer.elapsed, note)
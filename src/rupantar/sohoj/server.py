@@ -1,132 +1,870 @@
+from __future__ import annotations
+from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler
-from socket import SOL_SOCKET, SO_REUSEADDR
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatchcase
+from io import BytesIO
+from os import fstat
+from re import ASCII, compile as re_compile
+from secrets import token_hex
+from queue import Queue
 from socketserver import TCPServer
 from functools import partial
+import posixpath
+from threading import Condition, Thread
+from urllib.parse import unquote, urlsplit
 from pathlib import Path
+from typing import Sequence
 from random import randint
 from logging import getLogger
 import webbrowser as wb
 
+from rupantar.sohoj.compressor import is_compressible
 from rupantar.sohoj.configger import Config
-from rupantar.sohoj.utils import validate_network_address, resolve_path
-from rupantar.sohoj.builder import build_project
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.utils import validate_network_address
 
 logger = getLogger()
 
 
+# Default number of threads handling connections
+DEFAULT_WORKERS = 16
+# Seconds an idle persistent connection is kept open for, before its worker moves on to other connections
+KEEP_ALIVE_TIMEOUT = 5
+# Cache-Control policy of every file, unless configured otherwise: cache, but re-validate on every use (cheap, with ETags)
+DEFAULT_CACHE_CONTROL = (("*", "no-cache"),)
+# Most ranges served for a single request, a Range header asking for more is ignored and the whole file is sent instead
+MAX_RANGES = 16
+# A range of a Range header (eg: '0-499', '500-', '-500')
+BYTE_RANGE = re_compile(r"(\d*)-(\d*)", ASCII)
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Check if a client accepts gzip encoded responses, going by its Accept-Encoding request header.
+
+    Note:
+        Reference: https://httpwg.org/specs/rfc9110.html#field.accept-encoding
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header (eg: 'gzip, deflate, br'). None if not sent.
+
+    Returns:
+        bool: True if gzip, or any encoding, is accepted with a non-zero quality.
+    """
+    qualities = {}
+    for coding in (accept_encoding or "").split(","):
+        name, *params = coding.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str | None,
+    mtime: float,
+) -> bool:
+    """Check if a client's cached copy of a file is still valid, going by its conditional request headers.
+
+    If-None-Match takes precedence over If-Modified-Since, which is ignored if both are sent.
+
+    Note:
+        Reference: https://httpwg.org/specs/rfc9110.html#evaluation
+
+    Args:
+        if_none_match (str): Value of the If-None-Match header (eg: '"abc", "def"'). None if not sent.
+        if_modified_since (str): Value of the If-Modified-Since header (eg: 'Sun, 06 Nov 1994 08:49:37 GMT'). None if not sent.
+        etag (str): Current ETag of the file, quoted. None if unknown.
+        mtime (float): Current modification time of the file, in seconds since the epoch.
+
+    Returns:
+        bool: True if a 304 (Not Modified) response is to be sent instead of the file.
+    """
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        # Weak comparison, as it is for If-None-Match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified is only sent to the second
+        return int(mtime) <= since.timestamp()
+    return False
+
+
+def parse_byte_ranges(range_header: str, size: int) -> list[tuple[int, int]] | None:
+    """Parse the Range header of a request, for a file of the given size.
+
+    Note:
+        Reference: https://httpwg.org/specs/rfc9110.html#field.range
+
+    Args:
+        range_header (str): Value of the Range header (eg: 'bytes=0-499, -500').
+        size (int): Size of the file, in bytes.
+
+    Returns:
+        list of tuple: (first, last) byte positions, inclusive, of each satisfiable range, in the order asked for.
+            Empty if none of them is satisfiable. None if the header is to be ignored (eg: invalid, or asks for too many ranges).
+    """
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    count = 0
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        count += 1
+        match = BYTE_RANGE.fullmatch(spec)
+        if match is None or count > MAX_RANGES:
+            return None
+        first, last = match.groups()
+        if first:
+            if last and int(last) < int(first):
+                return None
+            if int(first) < size:
+                ranges.append(
+                    (int(first), min(int(last), size - 1) if last else size - 1)
+                )
+        elif last:
+            # Suffix range i.e. the last N bytes
+            if int(last) > 0 and size > 0:
+                ranges.append((max(0, size - int(last)), size - 1))
+        else:
+            return None
+    return ranges if count else None
+
+
 class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """Request handler serving files from a directory, without logging every request.
+
+    Beyond SimpleHTTPRequestHandler, it:
+        - Sends the pre-compressed (.gz) variant of a file to clients accepting gzip, if there is one (see compressor.py)
+        - Sends strong ETags, from the content hashes recorded at build time (see manifest.BuildManifest.record_etags())
+        - Answers conditional requests (If-None-Match/If-Modified-Since) with 304 (Not Modified), if the client's copy is still valid
+        - Sends a Cache-Control header, from the first policy whose pattern matches the file's path within the directory
+        - Answers Range requests with 206 (Partial Content), with a multipart/byteranges body for several ranges
+        - Sends files with sendfile(2) where available, so their contents never pass through Python
+
+    Args:
+        etags (dict, optional): Mapping of path, relative to the directory, to (modification time, size, content hash) of each file.
+        cache_control (sequence of tuple, optional): Ordered (pattern, Cache-Control value) policies. Defaults to DEFAULT_CACHE_CONTROL.
+    """
+
     # log_message() of BaseHTTPRequestHandler class
     # https://stackoverflow.com/a/53422952
     # https://docs.python.org/3/library/http.server.html#http.server.SimpleHTTPRequestHandler
 
+    # Persistent connections, so a page and all its assets are fetched over one connection
+    protocol_version = "HTTP/1.1"
+    timeout = KEEP_ALIVE_TIMEOUT
+    # Headers and body are written separately, don't let the body wait on the ACK of the headers
+    disable_nagle_algorithm = True
+
+    # Whether the response to the current request depends on its Accept-Encoding, set per request
+    vary_encoding = False
+    # Parts of the body of the current response, as (header, offset, byte count) of each range of the file. None for the whole file
+    body_parts: list[tuple[bytes, int, int]] | None = None
+    # Sent after the last part, closing a multipart body
+    body_end = b""
+    # Separates the parts of a multipart body
+    multipart_boundary = ""
+
+    def __init__(
+        self,
+        *args,
+        etags: dict[str, list] | None = None,
+        cache_control: Sequence[tuple[str, str]] | None = None,
+        **kwargs,
+    ) -> None:
+        # Set before handling the request, which the base class does on init
+        self.etags = {} if etags is None else etags
+        self.cache_control = (
+            DEFAULT_CACHE_CONTROL if cache_control is None else cache_control
+        )
+        super().__init__(*args, **kwargs)
+
     def log_message(self, format, *args):
         # Don't do anything in the log_message method to suppress output
         pass
 
+    def parse_request(self) -> bool:
+        self.vary_encoding = False
+        self.body_parts, self.body_end = None, b""
+        return super().parse_request()
+
+    def copyfile(self, source, outputfile) -> None:
+        """Send the body of the response, or the requested ranges of it.
+
+        Files are sent with socket.sendfile(), which uses sendfile(2) where the platform and socket allow it (eg: not over TLS),
+        and falls back to sending them piece by piece otherwise. In-memory bodies (eg: pages with live reload) are written out as is.
+
+        Note:
+            Reference: https://docs.python.org/3/library/socket.html#socket.socket.sendfile
+
+        Args:
+            source (file object): The body, as returned by send_head().
+            outputfile (file object): Where to write it i.e. the connection.
+        """
+        for header, offset, count in self.body_parts or [(b"", 0, None)]:
+            if header:
+                outputfile.write(header)
+            try:
+                source.fileno()
+            except OSError:
+                # Not backed by a file (eg: io.BytesIO)
+                source.seek(offset)
+                outputfile.write(source.read(count))
+                continue
+            outputfile.flush()
+            self.connection.sendfile(source, offset, count)
+        if self.body_end:
+            outputfile.write(self.body_end)
+
+    def plan_ranges(
+        self, etag: str | None, last_modified: str, size: int, content_type: str
+    ) -> list[tuple[int, int]] | None:
+        """Work out which ranges of a file to send, going by the Range and If-Range request headers.
+
+        Sets body_parts (and body_end) for copyfile() to send them.
+
+        Args:
+            etag (str): The quoted ETag of the file. None if unknown.
+            last_modified (str): The file's Last-Modified header value.
+            size (int): Size of the file.
+            content_type (str): The file's Content-Type, sent with each part of a multipart body.
+
+        Returns:
+            list of tuple: (first, last) byte positions of each range to send. Empty if none is satisfiable. None to send the whole file.
+        """
+        range_header = self.headers.get("Range")
+        if range_header is None or self.command != "GET":
+            return None
+        if_range = self.headers.get("If-Range")
+        # Only the ranges of the file as the client has it, else the whole file
+        if if_range is not None and if_range.strip() not in (etag, last_modified):
+            return None
+        ranges = parse_byte_ranges(range_header, size)
+        if not ranges:
+            return ranges
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            self.body_parts = [(b"", first, last - first + 1)]
+            return ranges
+        boundary = token_hex(16)
+        self.body_parts = [
+            (
+                f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {first}-{last}/{size}\r\n\r\n".encode(),
+                first,
+                last - first + 1,
+            )
+            for first, last in ranges
+        ]
+        self.body_end = f"\r\n--{boundary}--\r\n".encode()
+        self.multipart_boundary = boundary
+        return ranges
+
+    def end_headers(self) -> None:
+        if self.vary_encoding:
+            # So caches keep the compressed and uncompressed responses apart
+            self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
+    def get_etag(self, name: str, mtime: float, size: int) -> str | None:
+        """Get the ETag of a file, from the content hash recorded for it at build time.
+
+        Args:
+            name (str): Path of the file, relative to the served directory.
+            mtime (float or int): The file's current modification time, as recorded (ns on disk, s in memory).
+            size (int): The file's current size.
+
+        Returns:
+            str: The quoted ETag. None if no hash was recorded for the file as it is now (eg: changed since).
+        """
+        memo = self.etags.get(name)
+        if memo is None or memo[0] != mtime or memo[1] != size:
+            return None
+        return f'"{memo[2]}"'
+
+    def get_cache_control(self, name: str) -> str | None:
+        """Get the Cache-Control policy of a file, from the first pattern its path matches.
+
+        Args:
+            name (str): Path of the file, relative to the served directory.
+
+        Returns:
+            str: The Cache-Control header value. None if no pattern matches.
+        """
+        for pattern, value in self.cache_control:
+            if fnmatchcase(name, pattern):
+                return value
+        return None
+
+    def send_file_head(
+        self,
+        name: str,
+        size: int,
+        mtime: float,
+        etag: str | None,
+        encoding: str | None = None,
+        cache_control: str | None = None,
+    ) -> bool:
+        """Send the headers for a file, or a 304 (Not Modified) response if the client's cached copy is still valid.
+
+        For a Range request, only the requested ranges are sent (206), or a 416 (Range Not Satisfiable) response if none can be.
+
+        Args:
+            name (str): Path of the file, relative to the served directory.
+            size (int): Size of the whole body.
+            mtime (float): The file's modification time, in seconds since the epoch.
+            etag (str): The quoted ETag of the body. None if unknown.
+            encoding (str, optional): Content-Encoding of the body (eg: 'gzip').
+            cache_control (str, optional): Cache-Control header value. Defaults to the policy matching the file's path.
+
+        Returns:
+            bool: True if the body is to be sent.
+        """
+        modified = not is_not_modified(
+            self.headers.get("If-None-Match"),
+            self.headers.get("If-Modified-Since"),
+            etag,
+            mtime,
+        )
+        last_modified = self.date_time_string(mtime)
+        content_type = self.guess_type(name)
+        ranges = (
+            self.plan_ranges(etag, last_modified, size, content_type)
+            if modified
+            else None
+        )
+        if ranges == []:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return False
+
+        if not modified:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+        elif ranges is None:
+            self.send_response(HTTPStatus.OK)
+        else:
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        cache_control = cache_control or self.get_cache_control(name)
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        if modified:
+            self.send_header("Accept-Ranges", "bytes")
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            if ranges is None:
+                self.send_header("Content-type", content_type)
+                self.send_header("Content-Length", str(size))
+            elif len(ranges) == 1:
+                first, last = ranges[0]
+                self.send_header("Content-type", content_type)
+                self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+                self.send_header("Content-Length", str(last - first + 1))
+            else:
+                self.send_header(
+                    "Content-type",
+                    f"multipart/byteranges; boundary={self.multipart_boundary}",
+                )
+                self.send_header(
+                    "Content-Length",
+                    str(
+                        sum(len(header) + count for header, _, count in self.body_parts)
+                        + len(self.body_end)
+                    ),
+                )
+        self.end_headers()
+        return modified
+
+    def get_file_path(self) -> Path | None:
+        """Get the file a request is for, resolving a directory to its index.html.
+
+        Returns:
+            Path: The file. None if the request is not for a file (eg: a directory listing, a redirect, or a missing file).
+        """
+        path = Path(self.translate_path(self.path))
+        url_path = urlsplit(self.path).path
+        if path.is_dir():
+            path = Path(path, "index.html")
+            if not url_path.endswith("/"):
+                return None
+        elif url_path.endswith("/"):
+            return None
+        return path if path.is_file() else None
+
+    def send_head(self):
+        """Send the response headers, picking the pre-compressed (.gz) variant of the file if there is one and the client accepts gzip.
+
+        Returns:
+            file object: The body to send. None if there is none (eg: a HEAD request, a 304 response, or an error).
+        """
+        path = self.get_file_path()
+        if path is None:
+            # Redirects, directory listings and errors
+            return super().send_head()
+        name = path.relative_to(self.directory).as_posix()
+        file_path, encoding = path, None
+        if is_compressible(name):
+            self.vary_encoding = True
+            gz_path = Path(f"{path}.gz")
+            try:
+                # Not if older than the file itself, left behind by a build without pre-compression
+                if (
+                    accepts_gzip(self.headers.get("Accept-Encoding"))
+                    and gz_path.stat().st_mtime >= path.stat().st_mtime
+                ):
+                    file_path, encoding = gz_path, "gzip"
+            except OSError:
+                pass
+        try:
+            infile = open(file_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            stats = fstat(infile.fileno())
+            etag = self.get_etag(
+                file_path.relative_to(self.directory).as_posix(),
+                stats.st_mtime_ns,
+                stats.st_size,
+            )
+            if self.send_file_head(name, stats.st_size, stats.st_mtime, etag, encoding):
+                return infile
+        except Exception:
+            infile.close()
+            raise
+        infile.close()
+        return None
+
+
+# Path of the server-sent events endpoint that live reload clients listen to
+LIVE_RELOAD_PATH = "/__rupantar/events"
+# Seconds between keep-alive comments sent to idle live reload clients, which also detect the ones that went away
+LIVE_RELOAD_HEARTBEAT = 15
+# Injected into every HTML page served in watch mode
+# Reloads the page when told to, or only re-fetches the stylesheets if only they changed
+LIVE_RELOAD_SCRIPT = f"""<script>
+(() => {{
+  const events = new EventSource("{LIVE_RELOAD_PATH}");
+  events.addEventListener("reload", () => location.reload());
+  events.addEventListener("css", () => {{
+    for (const link of document.querySelectorAll('link[rel="stylesheet"]')) {{
+      const url = new URL(link.href);
+      url.searchParams.set("rupantar", Date.now());
+      link.href = url.href;
+    }}
+  }});
+}})();
+</script>
+""".encode()
+
+
+class ReloadBroadcaster:
+    """Tell every connected live reload client that a re-build finished.
+
+    Each client (a thread serving its event stream) waits on a shared condition, and is woken up when an event is published,
+    so events are pushed to all the clients at once without any polling.
+
+    Note:
+        Reference: https://developer.mozilla.org/en-US/docs/Web/API/Server-sent_events/Using_server-sent_events
+    """
+
+    def __init__(self) -> None:
+        self.condition = Condition()
+        self.count = 0
+        self.kind = "reload"
+        self.closed = False
+
+    def publish(self, kind: str = "reload") -> None:
+        """Send an event to every client.
+
+        Args:
+            kind (str): 'reload' to reload the page, or 'css' to only re-fetch its stylesheets. Defaults to 'reload'.
+        """
+        with self.condition:
+            self.count += 1
+            self.kind = kind
+            self.condition.notify_all()
 
-def run_web_server(
-    HOST: str, PORT: int, serving_url: str, serving_dir: str, openURL: bool
-) -> None:
-    """Run a HTTP web server at the given host and port, serving files from the given directory.
+    def wait(self, seen: int, timeout: float) -> tuple[int, str] | None:
+        """Wait for an event newer than the last one seen by a client.
+
+        Args:
+            seen (int): Number of the last event seen by the client.
+            timeout (float): Seconds to wait for.
+
+        Returns:
+            tuple: Number and kind of the newest event. None if there was none before the timeout.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.count != seen or self.closed, timeout)
+            if self.count == seen:
+                return None
+            # Missed a few, a full reload covers whatever they were
+            return self.count, (self.kind if self.count == seen + 1 else "reload")
+
+    def close(self) -> None:
+        """Stop serving events, letting every client go."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+def inject_live_reload(page: bytes) -> bytes:
+    """Add the live reload client script to a HTML page, at the end of its body.
+
+    Args:
+        page (bytes): The HTML page.
+
+    Returns:
+        bytes: The HTML page with the script added.
+    """
+    body_end = page.rfind(b"</body>")
+    if body_end == -1:
+        return page + LIVE_RELOAD_SCRIPT
+    return page[:body_end] + LIVE_RELOAD_SCRIPT + page[body_end:]
+
+
+class LiveReloadHTTPRequestHandler(QuietHTTPRequestHandler):
+    """Request handler that also streams re-build events to the served pages, which reload on them.
+
+    Serves a server-sent events stream at LIVE_RELOAD_PATH, and injects a script listening to it into every HTML page served.
+
+    Args:
+        broadcaster (ReloadBroadcaster): Source of the re-build events.
+    """
+
+    def __init__(self, *args, broadcaster: ReloadBroadcaster, **kwargs) -> None:
+        # Set before handling the request, which the base class does on init
+        self.broadcaster = broadcaster
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == LIVE_RELOAD_PATH:
+            self.send_events()
+        else:
+            super().do_GET()
+
+    def send_events(self) -> None:
+        """Start streaming re-build events to the client, in a thread of its own.
+
+        The connection is handed off to that thread (see WorkerPoolHTTPServer.hand_off()),
+        so a page left open never holds on to one of the workers serving every other request.
+        """
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+        self.server.hand_off(self.request)
+        Thread(
+            target=self.stream_events,
+            args=(self.request, self.broadcaster.count),
+            name="live-reload",
+            daemon=True,
+        ).start()
+
+    def stream_events(self, request, seen: int) -> None:
+        """Stream re-build events to the client, until it goes away or the server stops. Closes the connection once done.
+
+        Args:
+            request (socket): The client's connection.
+            seen (int): Number of the last event the client has seen.
+        """
+        try:
+            while not self.broadcaster.closed:
+                event = self.broadcaster.wait(seen, LIVE_RELOAD_HEARTBEAT)
+                if event is None:
+                    # A comment, ignored by the client
+                    request.sendall(b": heartbeat\n\n")
+                else:
+                    seen, kind = event
+                    request.sendall(f"event: {kind}\ndata: {seen}\n\n".encode())
+        except OSError:
+            logger.debug("Live reload client disconnected")
+        finally:
+            self.server.shutdown_request(request)
+
+    def send_head(self):
+        path = self.get_file_path()
+        if path is None or path.suffix not in (".html", ".htm"):
+            return super().send_head()
+        try:
+            with open(path, "rb") as infile:
+                stats = fstat(infile.fileno())
+                page = inject_live_reload(infile.read())
+        except OSError:
+            return super().send_head()
+        name = path.relative_to(self.directory).as_posix()
+        etag = self.get_etag(name, stats.st_mtime_ns, stats.st_size)
+        if etag is not None:
+            # Not the file as is, but the file with the live reload script injected
+            etag = f'{etag[:-1]}-live"'
+        # Always re-validated, as it changes on every re-build
+        if self.send_file_head(
+            name, len(page), stats.st_mtime, etag, cache_control="no-cache"
+        ):
+            return BytesIO(page)
+        return None
+
+
+class MemoryHTTPRequestHandler(LiveReloadHTTPRequestHandler):
+    """Request handler serving files straight from an in-memory output directory (see memstore.py), with live reload.
+
+    Args:
+        store (MemoryStore): The in-memory output directory.
+        broadcaster (ReloadBroadcaster): Source of the re-build events.
+    """
+
+    def __init__(self, *args, store: MemoryStore, **kwargs) -> None:
+        # Set before handling the request, which the base class does on init
+        self.store = store
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        url_path = unquote(urlsplit(self.path).path)
+        # Normalized first, so '..' can never go above the output directory
+        name = posixpath.normpath(url_path).lstrip("/")
+        if url_path.endswith("/"):
+            name = posixpath.join(name, "index.html")
+        stored = self.store.get(name)
+        if stored is None:
+            if posixpath.join(name, "index.html") in self.store:
+                # A directory, redirect to it with the trailing slash (same as SimpleHTTPRequestHandler)
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        etag = self.get_etag(name, stored.mtime, len(stored.contents))
+        contents, encoding, cache_control = stored.contents, None, None
+        if name.endswith((".html", ".htm")):
+            contents = inject_live_reload(contents)
+            if etag is not None:
+                etag = f'{etag[:-1]}-live"'
+            cache_control = "no-cache"
+        elif is_compressible(name):
+            self.vary_encoding = True
+            compressed = self.store.get(f"{name}.gz")
+            if (
+                compressed is not None
+                and compressed.mtime >= stored.mtime
+                and accepts_gzip(self.headers.get("Accept-Encoding"))
+            ):
+                contents, encoding = compressed.contents, "gzip"
+                etag = self.get_etag(f"{name}.gz", compressed.mtime, len(contents))
+        if self.send_file_head(
+            name, len(contents), stored.mtime, etag, encoding, cache_control
+        ):
+            return BytesIO(contents)
+        return None
+
+
+class WorkerPoolHTTPServer(TCPServer):
+    """TCP server that handles connections concurrently, in a fixed-size pool of worker threads.
+
+    Accepted connections are queued up for the workers, so at most `workers` are handled at once
+    and a burst of clients never spawns an unbounded number of threads.
+    A worker serves every request of a persistent connection, until the client closes it or it idles for KEEP_ALIVE_TIMEOUT.
+    Long-lived connections (eg: live reload event streams) are handed off by their handler instead, see hand_off().
+
+    Note:
+        Reference: https://docs.python.org/3/library/socketserver.html#asynchronous-mixins
+
+    Args:
+        server_address (tuple): The (host, port) to bind to.
+        handler (callable): The request handler class.
+        workers (int): Number of worker threads. Defaults to DEFAULT_WORKERS.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(
+        self, server_address: tuple[str, int], handler, workers: int = DEFAULT_WORKERS
+    ) -> None:
+        super().__init__(server_address, handler)
+        self.connections = Queue()
+        # Connections handed off by their handler, to be closed elsewhere
+        self.handed_off = set()
+        self.workers = [
+            Thread(target=self._work, name=f"http-{num}", daemon=True)
+            for num in range(max(1, workers))
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def _work(self) -> None:
+        while True:
+            connection = self.connections.get()
+            if connection is None:
+                break
+            request, client_address = connection
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if request in self.handed_off:
+                    self.handed_off.discard(request)
+                else:
+                    self.shutdown_request(request)
+
+    def process_request(self, request, client_address) -> None:
+        self.connections.put((request, client_address))
+
+    def hand_off(self, request) -> None:
+        """Take a connection away from the worker handling it, which then moves on to other connections, leaving it open.
+
+        Whoever it was handed off to serves it from then on, and closes it with shutdown_request() once done.
+
+        Args:
+            request (socket): The connection.
+        """
+        self.handed_off.add(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        for _ in self.workers:
+            self.connections.put(None)
+
+
+def create_web_server(
+    HOST: str,
+    PORT: int,
+    serving_dir: str,
+    broadcaster: ReloadBroadcaster | None = None,
+    workers: int = DEFAULT_WORKERS,
+    store: MemoryStore | None = None,
+    etags: dict[str, list] | None = None,
+    cache_control: Sequence[tuple[str, str]] | None = None,
+) -> TCPServer:
+    """Create (and bind) a HTTP/1.1 web server at the given host and port, serving files from the given directory.
+
+    Connections are handled concurrently by a pool of worker threads.
+    With a broadcaster, served pages live reload on re-builds.
+    With a broadcaster and an in-memory store, files are served from the store instead of the directory.
+
+    Note:
+        The event stream of every page open with live reload is served by a thread of its own, outside the pool.
 
     Args:
         HOST (str): The hostname to use for the web server.
         PORT (int): The port number to use for the web server.
-        serving_url (str): The URL where the web server will be available at.
         serving_dir (Path or str): The directory from which files will be served.
-        openURL (bool): If True, opens the serving URL in a new tab of the default browser.
+        broadcaster (ReloadBroadcaster, optional): Source of re-build events, for live reload.
+        workers (int): Number of connections handled at once. Defaults to DEFAULT_WORKERS.
+        store (MemoryStore, optional): The in-memory output directory to serve from, if any.
+        etags (dict, optional): Content hashes of the served files, recorded at build time, see manifest.BuildManifest.etags. Kept up to date by re-builds.
+        cache_control (sequence of tuple, optional): Ordered (pattern, Cache-Control value) policies, see load_cache_control(). Defaults to DEFAULT_CACHE_CONTROL.
+
+    Returns:
+        TCPServer: The web server, not serving yet.
 
     Raises:
-        KeyboardInterrupt: If the web server is stopped by user intervention (pressing Ctrl + C or Delete) i.e. SIGINT.
-        Exception: If any other error while serving the web server.
+        OSError: If unable to bind to the given host and port.
+    """
+    # stackoverflow.com/a/69088143
+    options = {"directory": serving_dir, "etags": etags, "cache_control": cache_control}
+    if broadcaster is None:
+        handler = partial(QuietHTTPRequestHandler, **options)
+    elif store is not None:
+        handler = partial(
+            MemoryHTTPRequestHandler, broadcaster=broadcaster, store=store, **options
+        )
+    else:
+        handler = partial(
+            LiveReloadHTTPRequestHandler, broadcaster=broadcaster, **options
+        )
+    return WorkerPoolHTTPServer((HOST, PORT), handler, workers)
+
+
+def load_cache_control(config: Config) -> tuple[tuple[str, str], ...] | None:
+    """Get the Cache-Control policies of a rupantar project, from its optional 'cache_control' config value.
+
+    It maps glob patterns, matched against the path of each file within the output directory, to the Cache-Control header value to send for it.
+    The first matching pattern applies. Eg:
+        cache_control:
+          "*.html": "no-cache"
+          "fonts/*": "public, max-age=31536000, immutable"
+          "*": "public, max-age=3600"
 
+    Args:
+        config (Config): The project's configuration.
+
+    Returns:
+        tuple: The (pattern, value) policies, in order. None if not configured (or invalid).
     """
-    try:
-        # stackoverflow.com/a/69088143
-        handler = partial(QuietHTTPRequestHandler, directory=serving_dir)
-        with TCPServer((HOST, PORT), handler) as httpd:
-            # Allow immediate socket re-use
-            httpd.socket.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
-            print(f"Web server available at: {serving_url}")
-            print("Press Ctrl + C to stop!")
-            # If ran with `-O/--open`, open the URL in a new tab of the default browser
-            # https://docs.python.org/3/library/webbrowser.html#webbrowser.open_new_tab
-            if openURL:
-                browser = wb.get()
-                logger.debug(f"Using system default web browser: {str(browser)}")
-                browser.open_new_tab(serving_url)
-
-            httpd.serve_forever()
-
-    except KeyboardInterrupt:
-        print("Stopping server...")
-        httpd.server_close()
-
-    except Exception as err:
-        logger.exception(f"Error while serving the server: {err}")
-
-
-def start_server(
-    project_folder: str,
-    config_file_name: str,
-    port: int,
-    interface_address: str,
-    openURL=False,
-) -> None:
-    """Start a basic HTTP server to serve the static files of a existing rupantar project.
-
-    Ideal for testing the pages locally on any machine.
-    Change the current working directory to the given project folder, reads and loads the configuration data,
-    and start the HTTP server at the given network address and port.
+    policies = getattr(config, "cache_control", None)
+    if policies is None:
+        return None
+    if not isinstance(policies, dict):
+        logger.warning(
+            f"Ignoring 'cache_control' config value, expected a mapping of patterns to header values, got: {policies}"
+        )
+        return None
+    return tuple((str(pattern), str(value)) for pattern, value in policies.items())
+
+
+def open_in_browser(serving_url: str) -> None:
+    """Open a URL in a new tab of the default browser.
+
+    Note:
+        Reference: https://docs.python.org/3/library/webbrowser.html#webbrowser.open_new_tab
 
     Args:
-        project_folder (str): The path to the rupantar project folder where the 'content' and 'notes' directories are located.
-        config_file_name (str): The name of the configuration file. Defaults to config.yml if not explicitly provided.
-        port (int): The port number to use for the server. If the port is None or in the range 0-1024, a random port in the range 49152-65535 is used as default.
-        interface_address (str): The network address to use for the server. If the address is not valid, '127.0.0.1' i.e. localhost is used as default.
-        openURL (bool): If True, opens the serving URL in a new tab of the default browser.
+        serving_url (str): The URL to open.
+    """
+    browser = wb.get()
+    logger.debug(f"Using system default web browser: {str(browser)}")
+    browser.open_new_tab(serving_url)
 
 
-    Raises:
-        Exception: If any error starting the HTTP server or while serving the files.
+def get_server_address(port: int, interface_address: str) -> tuple[str, int, str]:
+    """Get the network address to serve at, falling back to defaults for missing or invalid values.
 
+    Args:
+        port (int): The port number to use. If the port is None or in the range 0-1024, a random port in the range 49152-65535 is used as default.
+        interface_address (str): The network address to use. If the address is not valid, '127.0.0.1' i.e. localhost is used as default.
+
+    Returns:
+        tuple: The host, port and URL to serve at.
     """
-    try:
-        config_file = "config.yml" if (config_file_name is None) else config_file_name
-        # Ephemeral/dynamic/private ports, think good for temporary stuff
-        PORT = (
-            randint(49152, 65535)
-            if ((port is None) or (port in range(0, 1024)))
-            else port
-        )
-        logger.info("Using port: %s", PORT)
-        HOST = (
-            interface_address
-            if (validate_network_address(interface_address))
-            else "127.0.0.1"
-        )
-        serving_url = f"http://{HOST}:{PORT}"
-        logger.info("Using network address: %s", HOST)
-        logger.info(f"Web server address: {serving_url}")
-
-        project_folder_path = resolve_path(project_folder, strict=True)
-        logger.info(f"Rupantar project directory location: {project_folder_path}")
-        # Location of config file, assumed to be in abovementioned project folder
-        config_file_path = resolve_path(project_folder_path, config_file, strict=True)
-        logger.info(f"Config file location: {config_file_path}")
-        # Instantiate Config object for reading and loading config data values
-        config = Config(config_file_path)
-
-        # Build the rupantar project prior to serving the files
-        # TODO: Keep as Default behavior?
-        build_project(project_folder, "config.yml")
-
-        # Define the dir which contains the (built) static sites, and serve out of that instead of the cwd
-        serving_dir = Path(project_folder_path, config.home_path)
-        logger.info(f"Serving out of directory:  {serving_dir}")
-
-        # print(f"Listening for changes in: {project_folder_path}")
-        run_web_server(HOST, PORT, serving_url, str(serving_dir), openURL)
-
-    except Exception as err:
-        logger.exception("Error starting server: %s", str(err))
+    # Ephemeral/dynamic/private ports, think good for temporary stuff
+    PORT = randint(49152, 65535) if ((port is None) or (port in range(0, 1024))) else port
+    logger.info("Using port: %s", PORT)
+    HOST = (
+        interface_address
+        if (validate_network_address(interface_address))
+        else "127.0.0.1"
+    )
+    serving_url = f"http://{HOST}:{PORT}"
+    logger.info("Using network address: %s", HOST)
+    logger.info(f"Web server address: {serving_url}")
+    return HOST, PORT, serving_url
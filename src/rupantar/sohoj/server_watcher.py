@@ -1,10 +1,25 @@
+from __future__ import annotations
 from typing import Sequence
-from watchfiles import run_process, DefaultFilter
+from threading import Thread
+from time import perf_counter
+from watchfiles import watch, DefaultFilter
+from watchfiles.main import FileChange
 from logging import getLogger
 from pathlib import Path
-from rupantar.sohoj.server import start_server
-from rupantar.sohoj.utils import watch_dir_v2, resolve_path
+from rupantar.sohoj.builder import BuildSession, build_project, sync_assets
+from rupantar.sohoj.compressor import compress_store, compress_tree
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.server import (
+    DEFAULT_WORKERS,
+    ReloadBroadcaster,
+    create_web_server,
+    get_server_address,
+    load_cache_control,
+    open_in_browser,
+)
+from rupantar.sohoj.utils import watch_dir_v2, resolve_path, STATE_DIR_NAME
 from rupantar.sohoj.configger import Config
+from rupantar.sohoj.swapper import get_generation_paths, get_swap_link_path
 
 logger = getLogger()
 
@@ -29,29 +44,95 @@ class OutputDirFilter(DefaultFilter):
         super().__init__(ignore_dirs=exclude_dirs)
 
 
+def rebuild(
+    project_folder: str,
+    config_file_name: str,
+    session: BuildSession,
+    changes: set[FileChange],
+    gzip_level: int | None = None,
+) -> str:
+    """Rebuild a rupantar project after a set of changes, only re-doing what the changes affect.
+
+    The session's index of the notes directory is refreshed for just the changed paths, rather than listing the whole directory again.
+    Changes only to static assets are synced into the output directory (or the in-memory store), nothing else is rebuilt.
+    Otherwise, the project is built incrementally re-using the warm state of the session, so that only the outputs
+    whose inputs changed are re-rendered (eg: a note's page, the home page and the RSS feed, for a change to that note).
+
+    Args:
+        project_folder (str): The path to the rupantar project folder.
+        config_file_name (str): The name of the configuration file.
+        session (BuildSession): Warm state of the previous build.
+        changes (set of FileChange): The changes, as reported by watchfiles.
+        gzip_level (int, optional): Level to pre-compress the output at. Defaults to None i.e. no pre-compression.
+
+    Returns:
+        str: The live reload event for the change, 'css' if only stylesheets changed, 'reload' otherwise.
+    """
+    start_time = perf_counter()
+    resource_path = Path(
+        session.project_data.project_name, session.project_data.config.resource_path
+    )
+    event = "reload"
+    store = session.project_data.store
+    if session.content_index is not None:
+        # Kept up to date with every change, even if the re-build it triggers fails
+        session.content_index.refresh(path for _, path in changes)
+    if all(Path(path).is_relative_to(resource_path) for _, path in changes):
+        if all(path.endswith(".css") for _, path in changes):
+            event = "css"
+        sync_assets(session.project_data, session.manifest, resource_path)
+        if gzip_level is not None:
+            if store is None:
+                compress_tree(
+                    session.project_data.output_path, gzip_level, session.manifest.assets
+                )
+            else:
+                compress_store(store, gzip_level, session.manifest.assets)
+        if store is None:
+            session.manifest.record_etags(session.project_data.output_path)
+            session.manifest.save()
+        else:
+            session.manifest.record_store_etags(store)
+    else:
+        build_project(
+            project_folder,
+            config_file_name,
+            incremental=True,
+            session=session,
+            store=store,
+            gzip_level=gzip_level,
+            rescan_notes=False,
+        )
+    print(f"Re-built in: {(perf_counter() - start_time) * 1000:.0f} ms")
+    return event
+
+
 def start_watchful_server(
     project_folder: str,
     config_file_name: str,
     port: int,
     interface_address: str,
     open_url=False,
+    workers: int = DEFAULT_WORKERS,
+    in_memory: bool = False,
+    persist: bool = False,
+    gzip_level: int | None = None,
 ) -> None:
-    """Start a HTTP web server to serve generated files of a rupantar project, re-builds and then re-serves on changes to the project.
+    """Start a HTTP web server to serve generated files of a rupantar project, re-builds on changes to the project.
 
-    Ideal for testing the site locally on any machine without pressing Ctrl + F5 on browser on every change.
+    Ideal for testing the site locally on any machine without re-running the build on every change.
     Here's how it currently 'flows':
-        1. The start_server() is invoked by run_process() # Runs a process
-        2. This consequently also calls build_project() and generates a output directory, within the monitored directory, containing the built site.
-        3. The HTTP web server is started
-        4. Monitor provided directory for changes
-        5. If a change is detected, process from 1. is restarted
-        6. Consequently 2. - 3. is repeated, with the new changes reflected in a new browser tab.
-        7. Repeat until a KeyboardInterrupt is received # Ctrl + C
+        1. The project is built, keeping the build's warm state (Jinja2 environment, converted notes, etc.) in a session
+        2. The HTTP web server is started, in a background thread
+        3. Monitor provided directory for changes
+        4. If a change is detected, only the outputs affected by it are re-built, re-using the session (see rebuild())
+        5. The web server keeps running throughout, and tells every open page to reload once re-built (see server.ReloadBroadcaster)
+        6. Repeat 3. - 5. until a KeyboardInterrupt is received # Ctrl + C
 
     Note:
-        Reference for watchfile's run_process: https://watchfiles.helpmanual.io/api/run_process/#watchfiles.run_process
-        This does NOT hot-reload changes on the same browser tab that is open.
-        That would require some client-side .JS code for communicating with this web server.
+        Reference for watchfile's watch: https://watchfiles.helpmanual.io/api/watch/
+        Pages are reloaded by a small script injected into them, listening to server-sent events.
+        If only stylesheets changed, they are swapped in place instead.
 
     Args:
         project_folder (str): The path to the rupantar project folder where the 'content' and 'notes' directories are located.
@@ -59,6 +140,10 @@ def start_watchful_server(
         port (int): The port number to use for the web server. If the port is None or in the range 0-1024, a random port in the range 49152-65535 is used as default.
         interface_address (str): The network address to use for the web server. If the address is not valid, '127.0.0.1' i.e. localhost is used as default.
         open_url (bool): If True, opens the serving URL in a new tab of the default browser. Defaults to False.
+        workers (int): Number of connections the web server handles at once. Defaults to DEFAULT_WORKERS.
+        in_memory (bool): Keep the built site in memory and serve it from there, writing nothing to the output directory. Defaults to False.
+        persist (bool): With in_memory, write the built site out to the output directory when the server stops. Defaults to False.
+        gzip_level (int, optional): Level to pre-compress the output at, for the web server to send to clients accepting gzip. Defaults to None i.e. no pre-compression.
 
     Raises:
         Exception: If any error starting the web server (or while serving the files...).
@@ -70,20 +155,79 @@ def start_watchful_server(
         config_file_path = resolve_path(project_folder_path, config_file, strict=True)
         # Instantiate Config object for reading and loading config data values
         config = Config(config_file_path)
-        # Ignore changes in the output directory where rendered pages will be located
+        # Ignore changes in the output directory where rendered pages will be located, and in the build state directory
         exclude_dir = Path(project_folder_path, config.home_path)
 
-        print(
-            f"Listening for changes in: {project_folder_path} except in the: {exclude_dir.name} directory"
+        # Build the rupantar project prior to serving the files, keeping its state warm for re-builds
+        session = BuildSession()
+        store = MemoryStore() if in_memory else None
+        build_project(
+            project_folder,
+            config_file_name,
+            session=session,
+            store=store,
+            gzip_level=gzip_level,
         )
+        if session.project_data is None:
+            # Build failed before it got going, already logged
+            return
 
-        run_process(
-            project_folder,
-            target=start_server,
-            args=(project_folder, config_file_name, port, interface_address, open_url),
-            callback=watch_dir_v2,
-            watch_filter=OutputDirFilter(exclude_dirs=[config.home_path]),
+        HOST, PORT, serving_url = get_server_address(port, interface_address)
+        logger.info(
+            f"Serving out of directory:  {'memory' if store is not None else exclude_dir}"
         )
+        broadcaster = ReloadBroadcaster()
+        with create_web_server(
+            HOST,
+            PORT,
+            str(exclude_dir),
+            broadcaster,
+            workers,
+            store,
+            session.manifest.etags,
+            load_cache_control(config),
+        ) as httpd:
+            Thread(target=httpd.serve_forever, name="web-server", daemon=True).start()
+            print(f"Web server available at: {serving_url}")
+            print("Press Ctrl + C to stop!")
+            if open_url:
+                open_in_browser(serving_url)
+
+            print(
+                f"Listening for changes in: {project_folder_path} except in the: {exclude_dir.name} directory"
+            )
+            for changes in watch(
+                project_folder_path,
+                watch_filter=OutputDirFilter(
+                    exclude_dirs=[
+                        config.home_path,
+                        STATE_DIR_NAME,
+                        get_swap_link_path(exclude_dir).name,
+                        *(
+                            generation.name
+                            for generation in get_generation_paths(exclude_dir)
+                        ),
+                    ]
+                ),
+                raise_interrupt=False,
+            ):
+                watch_dir_v2(changes)
+                try:
+                    broadcaster.publish(
+                        rebuild(
+                            project_folder, config_file_name, session, changes, gzip_level
+                        )
+                    )
+                except Exception as err:
+                    # Eg: a template with a syntax error, keep serving the last good build until it is fixed
+                    logger.exception(f"Error re-building: {err}")
+
+            print("Stopping server...")
+            broadcaster.close()
+            httpd.shutdown()
+            if store is not None and persist:
+                store.persist(exclude_dir)
+                print(f"Built site written to: {exclude_dir}")
     except Exception as err:
         logger.exception(f"Error: {err}")
 
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from logging import getLogger
+from os import replace, symlink
+from pathlib import Path
+from shutil import rmtree
+from rupantar.sohoj.configger import Config
+from rupantar.sohoj.utils import resolve_path
+
+logger = getLogger()
+
+# Suffixes of the two generations of the output directory, used in turns
+GENERATION_SLOTS = ("a", "b")
+
+
+def get_generation_paths(home_path: Path) -> tuple[Path, ...]:
+    """Get the paths of both generations of an output directory.
+
+    They are hidden siblings of the output directory. Eg: .public-a and .public-b for public/
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        tuple of Path: The path of each generation.
+    """
+    return tuple(
+        Path(home_path.parent, f".{home_path.name}-{slot}") for slot in GENERATION_SLOTS
+    )
+
+
+def get_swap_link_path(home_path: Path) -> Path:
+    """Get the path of the temporary link created while swapping in a generation. Eg: .public.swap for public/
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        Path: The temporary link's path.
+    """
+    return Path(home_path.parent, f".{home_path.name}.swap")
+
+
+def get_live_generation(home_path: Path) -> Path | None:
+    """Get the generation currently being served i.e. the one the output directory links to.
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        Path: The live generation. None if the output directory is not a link to one (eg: built without --atomic, or not built yet).
+    """
+    if not home_path.is_symlink():
+        return None
+    target = Path(home_path.parent, home_path.readlink())
+    for generation in get_generation_paths(home_path):
+        if target == generation:
+            return generation
+    return None
+
+
+def get_staging_generation(home_path: Path) -> Path:
+    """Get the generation to build into next i.e. the one that is not live.
+
+    It holds the generation before the live one, if any, so building into it is cheap when done incrementally.
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        Path: The staging generation. Not necessarily existing yet.
+    """
+    first, second = get_generation_paths(home_path)
+    return second if get_live_generation(home_path) == first else first
+
+
+def get_manifest_name(output_path: Path, home_path: Path) -> str:
+    """Get the name of the build manifest for an output directory.
+
+    Each generation has a manifest of its own, since each holds the output of a different build.
+
+    Args:
+        output_path (Path): The directory being built into, a generation or the output directory itself.
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        str: Filename of the manifest, within the build state directory.
+    """
+    if output_path == home_path:
+        output_path = get_live_generation(home_path) or home_path
+    for slot, generation in zip(GENERATION_SLOTS, get_generation_paths(home_path)):
+        if output_path == generation:
+            return f"manifest-{slot}.json"
+    return "manifest.json"
+
+
+def swap_in(home_path: Path, generation: Path) -> None:
+    """Make a freshly built generation the live one, atomically.
+
+    The output directory is a symbolic link to the live generation. A new link to the given generation is created next to it,
+    and moved over the output directory in one rename(2) call, so anything serving the output directory sees either
+    the complete previous generation or the complete new one, never a partially built site.
+
+    If the output directory is still a regular directory (eg: from a build without --atomic), it is moved aside
+    to become the previous generation. That move is the only time the output directory briefly does not exist.
+
+    Note:
+        Reference: https://docs.python.org/3/library/os.html#os.replace
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+        generation (Path): The generation to swap in.
+
+    Raises:
+        OSError: If symbolic links can not be created (eg: on Windows without the required privilege), or any error moving files.
+    """
+    link_path = get_swap_link_path(home_path)
+    link_path.unlink(missing_ok=True)
+    # Relative target, so the project directory can be moved around
+    symlink(generation.name, link_path, target_is_directory=True)
+
+    if home_path.is_dir() and not home_path.is_symlink():
+        previous = next(
+            other for other in get_generation_paths(home_path) if other != generation
+        )
+        logger.warning(
+            f"Moving existing output directory {home_path} to {previous}, to be replaced by a link to {generation}"
+        )
+        if previous.exists():
+            rmtree(previous)
+        replace(home_path, previous)
+
+    replace(link_path, home_path)
+    logger.info(f"Swapped in {generation} as: {home_path}")
+
+
+def rollback(home_path: Path) -> Path:
+    """Swap the previous generation back in.
+
+    Note:
+        The previous generation is only intact until the next build with --atomic starts, as it is built into.
+
+    Args:
+        home_path (Path): Absolute path to the output directory.
+
+    Returns:
+        Path: The generation now live.
+
+    Raises:
+        FileNotFoundError: If there is no previous generation to roll back to.
+    """
+    live = get_live_generation(home_path)
+    previous = get_staging_generation(home_path)
+    if live is None or not previous.is_dir():
+        raise FileNotFoundError(f"No previous generation of {home_path} to roll back to")
+    swap_in(home_path, previous)
+    return previous
+
+
+def rollback_project(project_folder: str, config_file_name: str | None) -> None:
+    """Roll a rupantar project's output directory back to the generation before the current one.
+
+    Only for projects built with --atomic.
+
+    Args:
+        project_folder (str): The name of an existing rupantar project.
+        config_file_name (str): The name of the config file. Defaults to 'config.yml'.
+
+    Raises:
+        FileNotFoundError: Missing rupantar project/config file, or no previous generation. Logged, not re-raised.
+        OSError: If any error swapping the generations. Logged, not re-raised.
+    """
+    try:
+        project_folder_path = resolve_path(project_folder, strict=True)
+        config_file = "config.yml" if (config_file_name is None) else config_file_name
+        config = Config(resolve_path(project_folder_path, config_file, strict=True))
+        generation = rollback(Path(project_folder_path, config.home_path))
+        print(f"Rolled back to: {generation}")
+
+    except OSError as err:
+        logger.exception("Error: %s", str(err))
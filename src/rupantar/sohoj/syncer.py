@@ -0,0 +1,255 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from errno import EXDEV
+from hashlib import sha256
+from logging import getLogger
+from os import DirEntry, link, scandir, stat_result, walk
+from pathlib import Path
+from shutil import copy2, copystat
+from sys import platform
+from typing import Iterator
+
+logger = getLogger()
+
+# Ways of getting a static asset into the output directory
+SYNC_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request for cloning a file on Linux filesystems that support it (Btrfs, XFS, ...)
+# https://man7.org/linux/man-pages/man2/ioctl_ficlone.2.html
+FICLONE = 0x40049409
+
+
+@dataclass(slots=True)
+class SyncReport:
+    """Store the outcome of syncing a directory.
+
+    Attributes:
+        files (set[str]): Paths, relative to the synced directories, of every file now in sync.
+        copied (int): Number of files that were new or changed, and so copied (or linked).
+        unchanged (int): Number of files that were already up to date.
+        removed (int): Number of files removed as they are no longer in the source directory.
+    """
+
+    files: set[str] = field(default_factory=set)
+    copied: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+
+def iter_files(directory: Path | str) -> Iterator[DirEntry]:
+    """Recursively list every file in a directory.
+
+    Built on os.scandir(), so the stats gathered while listing a directory are re-used rather than fetched again per file.
+
+    Args:
+        directory (Path or str): The directory to list.
+
+    Yields:
+        DirEntry: Each file in the directory and its sub-directories, in no particular order.
+    """
+    pending = [directory]
+    while pending:
+        with scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+
+def file_digest(path: Path) -> str:
+    """Get the SHA-256 hash of a file's contents, reading it in chunks.
+
+    Args:
+        path (Path): Path to the file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = sha256()
+    with open(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_unchanged(
+    source: Path, source_stats: stat_result, dest: Path, mode: str, checksum: bool
+) -> bool:
+    """Check if a file in the output directory is still up to date with its source.
+
+    Args:
+        source (Path): The source file.
+        source_stats (stat_result): The source file's stats.
+        dest (Path): The file in the output directory.
+        mode (str): How the file was synced, one of SYNC_MODES.
+        checksum (bool): Compare contents if size matches but modification time does not.
+
+    Returns:
+        bool: True if the file does not need to be copied again.
+    """
+    try:
+        dest_stats = dest.stat()
+    except FileNotFoundError:
+        return False
+    if mode == "hardlink" and (dest_stats.st_ino, dest_stats.st_dev) == (
+        source_stats.st_ino,
+        source_stats.st_dev,
+    ):
+        return True
+    if dest_stats.st_size != source_stats.st_size:
+        return False
+    if dest_stats.st_mtime_ns == source_stats.st_mtime_ns:
+        return True
+    if checksum and file_digest(source) == file_digest(dest):
+        # Same contents, only touched. Update the mtime so it is not hashed again next time
+        copystat(source, dest)
+        return True
+    return False
+
+
+def reflink(source: Path, dest: Path) -> None:
+    """Clone a file with copy-on-write i.e. without copying any data, falling back to a regular copy if not supported.
+
+    Args:
+        source (Path): The file to clone.
+        dest (Path): The clone.
+    """
+    if platform.startswith("linux"):
+        from fcntl import ioctl
+
+        try:
+            with open(source, "rb") as src_file, open(dest, "wb") as dest_file:
+                ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+            copystat(source, dest)
+            return
+        except OSError as err:
+            logger.debug(f"Unable to reflink {source}, copying instead: {err}")
+    copy2(source, dest)
+
+
+def sync_file(source: Path, dest: Path, mode: str) -> None:
+    """Copy or link a single file into place, replacing whatever was there.
+
+    Args:
+        source (Path): The source file.
+        dest (Path): Where to copy/link it.
+        mode (str): One of SYNC_MODES.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Never write through an existing (possibly hard-linked) file, replace it instead
+    dest.unlink(missing_ok=True)
+    if mode == "hardlink":
+        try:
+            link(source, dest)
+            return
+        except OSError as err:
+            if err.errno != EXDEV:
+                logger.debug(f"Unable to hardlink {source}, copying instead: {err}")
+            # Not on the same filesystem, fallback to a copy
+    elif mode == "reflink":
+        reflink(source, dest)
+        return
+    copy2(source, dest)
+
+
+def sync_tree(
+    source_dir: Path | str,
+    dest_dir: Path | str,
+    previous_files: set[str] | None = None,
+    mode: str = "copy",
+    checksum: bool = False,
+) -> SyncReport:
+    """Sync a directory (eg: static/) into another (eg: public/), only copying files that are new or changed.
+
+    Files are compared by size and modification time, and optionally their contents.
+    Files that were synced previously, but are no longer in the source directory, are removed from the destination.
+    Anything else in the destination directory (eg: generated pages) is left alone.
+
+    With the 'hardlink' and 'reflink' modes, files are linked/cloned instead of copied, so that unchanged assets cost no copying at all.
+
+    Args:
+        source_dir (Path or str): The directory to sync from.
+        dest_dir (Path or str): The directory to sync to. Created if it does not exist.
+        previous_files (set of str, optional): Relative paths of the files synced last time, as reported by the previous sync.
+        mode (str): How to get files into place, one of SYNC_MODES. Defaults to 'copy'.
+        checksum (bool): Also compare file contents when size matches but modification time does not. Defaults to False.
+
+    Returns:
+        SyncReport: What was synced.
+
+    Raises:
+        ValueError: If the mode is not one of SYNC_MODES.
+        OSError: If any error reading or writing files.
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode: {mode}. Expected one of {SYNC_MODES}")
+    source_dir, dest_dir = Path(source_dir), Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    report = SyncReport()
+
+    for entry in iter_files(source_dir):
+        source = Path(entry.path)
+        relative_path = source.relative_to(source_dir).as_posix()
+        dest = Path(dest_dir, relative_path)
+        report.files.add(relative_path)
+        if is_unchanged(source, entry.stat(), dest, mode, checksum):
+            report.unchanged += 1
+        else:
+            sync_file(source, dest, mode)
+            report.copied += 1
+
+    for relative_path in (previous_files or set()) - report.files:
+        logger.debug(f"Removing deleted asset: {relative_path}")
+        Path(dest_dir, relative_path).unlink(missing_ok=True)
+        report.removed += 1
+
+    logger.info(
+        f"Synced {source_dir} to {dest_dir}: {report.copied} copied, {report.unchanged} unchanged, {report.removed} removed"
+    )
+    return report
+
+
+def remove_empty_parents(path: Path | str, root: Path | str) -> None:
+    """Remove the directories a since deleted file was in, up to (but not including) a root directory, for as long as they are empty.
+
+    Args:
+        path (Path or str): The deleted file.
+        root (Path or str): The directory to stop at, eg: the output directory.
+    """
+    root = Path(root)
+    parent = Path(path).parent
+    while parent != root and parent.is_relative_to(root):
+        try:
+            parent.rmdir()
+        except OSError:
+            # Not empty (or already gone along with it's parent)
+            break
+        logger.debug(f"Removed empty directory: {parent}")
+        parent = parent.parent
+
+
+def prune_tree(dest_dir: Path | str, keep: set[str]) -> int:
+    """Remove every file from a directory, other than the ones to keep. Empty sub-directories are removed as well.
+
+    Args:
+        dest_dir (Path or str): The directory to prune.
+        keep (set of str): Paths, relative to the directory, of the files to keep.
+
+    Returns:
+        int: Number of files removed.
+    """
+    dest_dir = Path(dest_dir)
+    removed = 0
+    for dir_path, dir_names, file_names in walk(dest_dir, topdown=False):
+        for file_name in file_names:
+            dest = Path(dir_path, file_name)
+            if dest.relative_to(dest_dir).as_posix() not in keep:
+                logger.debug(f"Removing stale output: {dest}")
+                dest.unlink()
+                removed += 1
+        for dir_name in dir_names:
+            sub_dir = Path(dir_path, dir_name)
+            if not sub_dir.is_symlink() and not any(sub_dir.iterdir()):
+                sub_dir.rmdir()
+    return removed
@@ -1,12 +1,13 @@
 from time import perf_counter
 from logging import getLogger
-from ipaddress import ip_address
 from pathlib import Path
-from watchfiles import watch
 from datetime import datetime
 
 logger = getLogger()
 
+# Name of the directory, within a rupantar project, that stores build state between runs
+STATE_DIR_NAME = ".rupantar"
+
 
 def resolve_path(*args: str | Path, strict: bool = False) -> Path | FileNotFoundError:
     """Resolve the (absolute) path to a file or directory.
@@ -43,6 +44,24 @@ def resolve_path(*args: str | Path, strict: bool = False) -> Path | FileNotFound
         raise
 
 
+def get_state_dir(project_folder: str | Path, create: bool = True) -> Path:
+    """Get the directory where rupantar keeps its build state (manifest, caches, etc.) for a given project.
+
+    Located at the root of the rupantar project and created if it does not exist yet.
+
+    Args:
+        project_folder (str or Path): Path to the rupantar project directory.
+        create (bool): Create the directory if it does not exist yet. Defaults to True.
+
+    Returns:
+        Path: The resolved path to the project's state directory.
+    """
+    state_dir = resolve_path(project_folder, STATE_DIR_NAME)
+    if create:
+        state_dir.mkdir(exist_ok=True)
+    return state_dir
+
+
 def get_func_exec_time(function):
     """Simple decorator function to get a function's execution time, start to finish.
 
@@ -98,6 +117,9 @@ def validate_network_address(interface_address: str) -> bool:
         bool: True if the given network address is a valid, non-link-local, non-multicast IP address. False otherwise.
 
     """
+    # Imported here, only serve needs it
+    from ipaddress import ip_address
+
     try:
         ip = ip_address(interface_address)
         if ip.is_link_local or ip.is_multicast:
@@ -135,6 +157,9 @@ def watch_dir(
         monitored_dir (Path or str): Directory to be watched for changes.
 
     """
+    # Imported here, as watchfiles takes a while to import and only serve needs it
+    from watchfiles import watch
+
     print(f"Listening for changes in: {monitored_dir}")
     for changes in watch(monitored_dir, raise_interrupt=False):
         # FileChange = Tuple[Change, str]; 'changes' = FileChange
@@ -152,10 +177,9 @@ def watch_dir(
 def watch_dir_v2(changes):
     """Print/log information based on file/directory changes.
 
-    Currently used as a callback for watchfiles.run_process()
+    Currently used to report each set of changes picked up in serve mode, before re-building.
 
     Note:
-        https://watchfiles.helpmanual.io/api/run_process/#watchfiles.run_process
         https://watchfiles.helpmanual.io/api/watch/#watchfiles.main.FileChange
 
     Args:
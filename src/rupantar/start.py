@@ -1,8 +1,31 @@
-from argparse import ArgumentParser
+from argparse import SUPPRESS, Action, ArgumentParser
 import sys
 from xdg_base_dirs import xdg_data_home
-from rupantar.sohoj import builder, creator, logger, server_watcher
-from rupantar import __version__
+
+# Modules of each command are imported only once it is run, as some of them pull in (slow to import) dependencies
+# that other commands do not need. Eg: `new` needs neither Jinja2, markdown2 nor watchfiles
+
+
+class VersionAction(Action):
+    """argparse action printing rupantar's version and exiting, same as the built-in 'version' action.
+
+    The version is only looked up when asked for, as that takes a while (see rupantar.__getattr__).
+    """
+
+    def __init__(self, option_strings, dest=SUPPRESS, default=SUPPRESS, help=None):
+        super().__init__(
+            option_strings=option_strings,
+            dest=dest,
+            default=default,
+            nargs=0,
+            help="show program's version number and exit" if help is None else help,
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from rupantar import __version__
+
+        print(__version__)
+        parser.exit()
 
 
 def main(args=sys.argv[1:]):
@@ -12,7 +35,7 @@ def main(args=sys.argv[1:]):
         prog="rupantar",
         description="Easily configurable static website generator with a focus on minimalism.",
     )
-    parser.add_argument("-v", "--version", action="version", version=f"{__version__}")
+    parser.add_argument("-v", "--version", action=VersionAction)
     parser.add_argument(
         "-l",
         "--log",
@@ -59,7 +82,7 @@ def main(args=sys.argv[1:]):
 
     parser_build = subparsers.add_parser(
         "build",
-        help="Build a rupantar project, generate the static pages. Deletes pre-existing output directory and creates a new one.",
+        help="Build a rupantar project, generate the static pages. Anything in the output directory not generated by the build is removed, unless building incrementally.",
     )
     parser_build.add_argument(
         "project",
@@ -71,6 +94,77 @@ def main(args=sys.argv[1:]):
         nargs="?",
         help="Name of the config file to use. Path to this file is relative to the project directory. Default `config.yml`",
     )
+    parser_build.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only re-render pages whose inputs (notes, templates, config, header/footer) changed since the last build. Pages of deleted notes are removed.",
+    )
+    parser_build.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes to build notes with, in parallel. Default number of CPUs. 1 to build without any worker processes.",
+    )
+    parser_build.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Do not use (or update) the cache of parsed and converted notes kept across builds.",
+    )
+    parser_build.add_argument(
+        "--asset-mode",
+        choices=["copy", "hardlink", "reflink"],
+        default="copy",
+        help="How static assets get into the output directory. Only new or changed assets are copied/linked. `hardlink` and `reflink` avoid copying any data, falling back to copying where not supported. Default `copy`.",
+    )
+    parser_build.add_argument(
+        "--checksum-assets",
+        action="store_true",
+        help="Compare the contents of static assets whose modification time changed, instead of re-copying them.",
+    )
+    parser_build.add_argument(
+        "-a",
+        "--atomic",
+        action="store_true",
+        help="Build into a hidden copy of the output directory and swap it in once complete, so the site being served is never partially built. The previous build is kept for `rollback`.",
+    )
+
+    parser_build.add_argument(
+        "-z",
+        "--gzip",
+        nargs="?",
+        type=int,
+        const=9,
+        choices=range(1, 10),
+        metavar="LEVEL",
+        help="Also write a pre-compressed .gz copy of every HTML, XML, CSS and JavaScript file, for web servers to send as is. Files that do not get any smaller are skipped. Optional compression level, 1 (fastest) to 9 (smallest). Default 9.",
+    )
+    parser_build.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each phase of the build (config load, asset copy, front matter parse, markdown conversion, template render, write) and each note, and print a report.",
+    )
+    parser_build.add_argument(
+        "--profile-json",
+        metavar="FILE",
+        help="Also write the `--profile` report to this JSON file. Implies `--profile`.",
+    )
+
+    parser_rollback = subparsers.add_parser(
+        "rollback",
+        help="Swap the previous build of a rupantar project, built with `build --atomic`, back in.",
+    )
+    parser_rollback.add_argument(
+        "project",
+        help="Name of rupantar project. Path is relative to the current directory.",
+    )
+    parser_rollback.add_argument(
+        "-c",
+        "--config",
+        nargs="?",
+        help="Name of the config file to use. Path to this file is relative to the project directory. Default `config.yml`",
+    )
 
     parser_serve = subparsers.add_parser(
         "serve",
@@ -103,13 +197,46 @@ def main(args=sys.argv[1:]):
         action="store_true",
         help="Open the generated site using the default browser. Tries to do so in a new tab.",
     )
+    parser_serve.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=16,
+        help="Maximum number of connections handled at once. Default 16.",
+    )
+    parser_serve.add_argument(
+        "-m",
+        "--in-memory",
+        dest="in_memory",
+        action="store_true",
+        help="Keep the built site in memory and serve it from there, without writing anything to the output directory.",
+    )
+    parser_serve.add_argument(
+        "--persist",
+        action="store_true",
+        help="With `--in-memory`, write the built site to the output directory once the server is stopped.",
+    )
+    parser_serve.add_argument(
+        "-z",
+        "--gzip",
+        nargs="?",
+        type=int,
+        const=9,
+        choices=range(1, 10),
+        metavar="LEVEL",
+        help="Pre-compress the built site, see `build --gzip`. Served to clients accepting gzip.",
+    )
 
     args = parser.parse_args(args)
 
     # Configure logging, log level based on input
+    from rupantar.sohoj import logger
+
     logger.setup_logging(args.loglevel)
 
     if args.type == "init" and args.project:
+        from rupantar.sohoj import creator
+
         # Interactive prompts for setting some default config.yml fields
         if args.skip:
             creator.create_project(args.project, [None, None, None])
@@ -132,12 +259,44 @@ def main(args=sys.argv[1:]):
             user_prompts.append(need_custom)
             creator.create_project(args.project, user_prompts)
     elif args.type == "new" and args.project and args.name:
+        from rupantar.sohoj import creator
+
         creator.create_note(args.project, args.name, args.show_home)
     elif args.type == "build" and args.project:
-        builder.build_project(args.project, args.config)
+        from rupantar.sohoj import builder, profiler
+
+        profile = profiler.BuildProfile() if (args.profile or args.profile_json) else None
+        builder.build_project(
+            args.project,
+            args.config,
+            args.incremental,
+            args.jobs,
+            args.use_cache,
+            args.asset_mode,
+            args.checksum_assets,
+            args.atomic,
+            gzip_level=args.gzip,
+            profile=profile,
+        )
+        if profile is not None:
+            profiler.report(profile, args.profile_json)
+    elif args.type == "rollback" and args.project:
+        from rupantar.sohoj import swapper
+
+        swapper.rollback_project(args.project, args.config)
     elif args.type == "serve" and args.project:
+        from rupantar.sohoj import server_watcher
+
         server_watcher.start_watchful_server(
-            args.project, args.config, args.port, args.interface, args.open
+            args.project,
+            args.config,
+            args.port,
+            args.interface,
+            args.open,
+            args.workers,
+            args.in_memory,
+            args.persist,
+            args.gzip,
         )
     else:
         parser.print_help()
@@ -1,5 +1,29 @@
-from rupantar.sohoj.builder import build_project, md_to_str, parse_md
-from rupantar.sohoj.creator import create_project
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from shutil import copytree
+from types import SimpleNamespace
+from jinja2 import Environment
+from rupantar.sohoj.builder import (
+    BuildSession,
+    PageData,
+    Post,
+    ProjectData,
+    build_project,
+    create_page,
+    get_excerpt,
+    get_excerpt_length,
+    load_site_context,
+    md_to_str,
+    parse_md,
+    paginate,
+    render_note,
+    render_page,
+    select_feed_posts,
+)
+from rupantar.sohoj.configger import Config
+from rupantar.sohoj.creator import create_note, create_project
+from rupantar.sohoj.memstore import MemoryStore
 import pytest
 
 
@@ -30,3 +54,287 @@ class TestBuilder:
         nonexistent_markdown_file = "abcd.gibberishformat"
         with pytest.raises(FileNotFoundError, match="File not found"):
             parse_md(nonexistent_markdown_file)
+
+    def test_render_note_converts_once_into_post(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        post = render_note(Path("yo", "content", "notes", "example_blog.md"))
+        assert post.url == "/example_blog.html"
+        assert post["title"] == "Sample Blog."
+        assert post.get("showInHome") is None
+        assert "<h1>This is a heading" in post.note
+
+    def test_post_front_matter_not_hidden_in_templates(self):
+        post = Post(
+            {"source": "wiki", "metadata": "m", "html": "h"}, "<p>x</p>", "/a.html"
+        )
+        template = Environment().from_string(
+            "{{ post.source }} {{ post.metadata }} {{ post.html }} {{ post.url }} {{ post.note }}"
+        )
+        assert template.render(post=post) == "wiki m h /a.html <p>x</p>"
+        assert post["url"] == post.get("url") == "/a.html"
+
+    def test_build_project_compiles_each_template_once(
+        self, setup_test_directory, mocker
+    ):
+        create_project("yo", [None, None, None])
+        for num in range(3):
+            create_note("yo", f"note_{num}", True)
+        compile_spy = mocker.spy(Environment, "compile")
+        build_project("yo", None, jobs=1)
+        compiled = [call.args[2] for call in compile_spy.call_args_list]
+        assert sorted(compiled) == [
+            "templates/feed_template.xml.jinja",
+            "templates/home_template.html.jinja",
+            "templates/note_template.html.jinja",
+        ]
+        # Loaded from the bytecode cache by the next build
+        compile_spy.reset_mock()
+        build_project("yo", None, jobs=1)
+        assert compile_spy.call_count == 0
+
+    def test_load_site_context_invalidated_on_changes(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        project_folder_path = Path("yo").resolve()
+        project_data = ProjectData(
+            project_folder_path, Config(Path(project_folder_path, "config.yml"))
+        )
+        site_context = load_site_context(project_data)
+        assert load_site_context(project_data, site_context) is site_context
+
+        header = Path("yo", "content", "header.md")
+        header.write_text("# Changed header\n")
+        changed_header = load_site_context(project_data, site_context)
+        assert changed_header is not site_context
+        assert "Changed header" in changed_header.header
+        assert "Changed header" in project_data.environment.globals["header"]
+
+        config = Path("yo", "config.yml")
+        config.write_text(config.read_text().replace("Demo Page Title", "Changed title"))
+        project_data.config = Config(config.resolve())
+        changed_config = load_site_context(project_data, changed_header)
+        assert changed_config is not changed_header
+        assert changed_config.config["site_title"] == "Changed title"
+
+    def test_create_page_streams_same_as_render(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        note = Path("yo", "content", "notes", "example_blog.md")
+        # Much larger than the write buffer, so it is streamed in several chunks
+        note.write_text(note.read_text() + "\n\nSome *long* paragraph.\n" * 10000)
+        project_folder_path = Path("yo").resolve()
+        project_data = ProjectData(
+            project_folder_path,
+            Config(Path(project_folder_path, "config.yml")),
+            output_path=Path(project_folder_path, "public"),
+        )
+        project_data.output_path.mkdir()
+        post = render_note(note.resolve())
+        note_page = PageData(
+            project_data.config.note_template, [], post._metadata, None, note, post
+        )
+        home_page = PageData(
+            project_data.config.home_template, [post], None, "# Home", "index.html"
+        )
+        for page_data in (note_page, home_page):
+            page_path, page_contents = render_page(project_data, page_data)
+            create_page(project_data, page_data)
+            assert page_path.read_bytes() == page_contents.encode()
+        assert Path("yo", "public", "example_blog.html").stat().st_size > 256 * 1024
+
+    def test_render_note_nonexistent_markdown_file(self, setup_test_directory):
+        assert render_note("abcd.md") is None
+
+    def test_build_project_session_rebuilds_changes(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        session = BuildSession()
+        build_project("yo", None, jobs=1, session=session)
+        environment = session.project_data.environment
+        assert set(session.notes) == {"content/notes/example_blog.md"}
+
+        note = Path("yo", "content", "notes", "example_blog.md")
+        note.write_text(note.read_text().replace("Sample Blog.", "Changed Blog."))
+        build_project("yo", None, incremental=True, session=session)
+        assert session.project_data.environment is environment
+        assert (
+            session.notes["content/notes/example_blog.md"][1]["title"] == "Changed Blog."
+        )
+        assert "changed blog." in Path("yo", "public", "index.html").read_text()
+
+    def test_build_project_parallel_same_as_serial(self, setup_test_directory):
+        create_project("serial", [None, None, None])
+        notes = Path("serial", "content", "notes")
+        Path(notes, "2024").mkdir()
+        example = Path(notes, "example_blog.md").read_text()
+        for num in range(6):
+            Path(notes, "2024" if num % 2 else "", f"note_{num}.md").write_text(
+                example.replace("Sample Blog.", f"Note {num}.")
+            )
+        copytree("serial", "parallel")
+        build_project("serial", None, jobs=1)
+        build_project("parallel", None, jobs=2)
+        serial, parallel = Path("serial", "public"), Path("parallel", "public")
+        pages = sorted(path.relative_to(serial) for path in serial.rglob("*.*"))
+        assert pages == sorted(
+            path.relative_to(parallel) for path in parallel.rglob("*.*")
+        )
+        assert Path("2024", "note_1.html") in pages
+        for page in pages:
+            assert Path(serial, page).read_bytes() == Path(parallel, page).read_bytes()
+
+    def test_build_project_session_spawns_workers(self, setup_test_directory, mocker):
+        create_project("yo", [None, None, None])
+        create_note("yo", "second_blog", True)
+        pool = mocker.patch(
+            "rupantar.sohoj.builder.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        )
+        build_project("yo", None, jobs=2, session=BuildSession())
+        assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+        assert Path("yo", "public", "second_blog.html").exists()
+
+    @pytest.mark.parametrize("use_cache", [True, False])
+    def test_build_project_keeps_converted_notes_out_of_memory(
+        self, setup_test_directory, use_cache
+    ):
+        create_project("yo", [None, None, None])
+        session = BuildSession()
+        build_project("yo", None, jobs=1, use_cache=use_cache, session=session)
+        post = session.notes["content/notes/example_blog.md"][1]
+        assert post._html is None
+        # The RSS feed has every note's HTML, loaded back as it was rendered
+        assert "<h1>This is a heading" in Path("yo", "public", "rss.xml").read_text()
+        assert list(Path("yo", ".rupantar").glob("notes-*")) == []
+
+    @pytest.mark.parametrize("use_cache", [True, False])
+    def test_build_project_session_loads_unchanged_notes(
+        self, setup_test_directory, caplog, use_cache
+    ):
+        create_project("yo", [None, None, None])
+        create_note("yo", "second_blog", True)
+        session = BuildSession()
+        build_project("yo", None, jobs=1, use_cache=use_cache, session=session)
+        post = session.notes["content/notes/example_blog.md"][1]
+
+        note = Path("yo", "content", "notes", "second_blog.md")
+        note.write_text(note.read_text() + "\nOne more line.\n")
+        build_project("yo", None, incremental=True, use_cache=use_cache, session=session)
+        # Kept from the first build only if its converted note could be found again
+        assert (session.notes["content/notes/example_blog.md"][1] is post) == use_cache
+        assert "Converted note not found" not in caplog.text
+        assert "<h1>This is a heading" in Path("yo", "public", "rss.xml").read_text()
+
+    def test_paginate_lists_posts_shown_in_home(self):
+        posts = [Post({"showInHome": num != 1}, None, f"/{num}.html") for num in range(5)]
+        assert paginate(posts, None) == [posts]
+        assert paginate(posts, 2) == [[posts[0], posts[2]], [posts[3], posts[4]]]
+        assert paginate([], 2) == [[]]
+
+    def test_build_project_paginates_home_page(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        create_note("yo", "second_blog", True)
+        config = Path("yo", "config.yml")
+        config.write_text(config.read_text() + "posts_per_page : 1\n")
+        build_project("yo", None, jobs=1)
+        second_page = Path("yo", "public", "page", "2", "index.html")
+        assert 'href="/page/2/"' in Path("yo", "public", "index.html").read_text()
+        assert 'href="/"' in second_page.read_text()
+
+        config.write_text(config.read_text().replace("posts_per_page : 1", ""))
+        build_project("yo", None, incremental=True, jobs=1)
+        assert not second_page.exists()
+        assert (
+            "page/2/index.html"
+            not in Path("yo", ".rupantar", "manifest.json").read_text()
+        )
+
+    def test_get_excerpt_up_to_marker_or_length(self):
+        assert get_excerpt("<p>One</p>\n<!--more-->\n<p>Two</p>", 2) == "<p>One</p>"
+        # Written inline, within a paragraph
+        assert (
+            get_excerpt("<p>Intro <em>text</em> <!--more--> rest.</p>\n<p>Two</p>", 2)
+            == "<p>Intro <em>text</em></p>"
+        )
+        assert (
+            get_excerpt("<blockquote>\n<p>A<br/>b <!--more--> c</p>\n</blockquote>", 2)
+            == "<blockquote>\n<p>A<br/>b</p></blockquote>"
+        )
+        assert get_excerpt("<p>Short &amp; sweet</p>", 50) == "Short &amp; sweet"
+        assert get_excerpt("<p>Cut at a word</p>", 9) == "Cut at a…"
+        assert get_excerpt("<p>Fish &amp; chips</p>", 8) == "Fish…"
+
+    def test_get_excerpt_length(self, caplog):
+        config = SimpleNamespace(feed_excerpt=True)
+        assert get_excerpt_length(config) == 500
+        config.feed_excerpt = 80
+        assert get_excerpt_length(config) == 80
+        config.feed_excerpt = False
+        assert get_excerpt_length(config) is None
+        assert "Invalid" not in caplog.text
+        config.feed_excerpt = -1
+        assert get_excerpt_length(config) is None
+        assert "Invalid feed_excerpt" in caplog.text
+
+    def test_select_feed_posts_newest_shown(self):
+        posts = [
+            Post({"date": date(2024, 1, day % 3 + 1)}, None, f"/{day}.html")
+            for day in range(10)
+        ]
+        posts.append(
+            Post({"date": date(2025, 1, 1), "showInHome": False}, None, "/x.html")
+        )
+        newest = sorted(posts, key=lambda post: post["date"], reverse=True)
+        assert select_feed_posts(newest, 4) == newest[1:5]
+        assert select_feed_posts(newest, 20) == newest[1:]
+
+    def test_build_project_bounded_feed(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        create_note("yo", "second_blog", True)
+        config = Path("yo", "config.yml")
+        config.write_text(config.read_text() + "feed_limit : 1\nfeed_excerpt : 20\n")
+        build_project("yo", None, jobs=1)
+        feed = Path("yo", "public", "rss.xml").read_text()
+        assert feed.count("<item>") == 1
+        assert "<h1>" not in feed
+
+    def test_build_project_limited_feed_without_shown_posts(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        Path("yo", "content", "notes", "example_blog.md").unlink()
+        create_note("yo", "hidden_blog", False)
+        config = Path("yo", "config.yml")
+        config.write_text(config.read_text() + "feed_limit : 5\n")
+        build_project("yo", None, jobs=1)
+        feed = Path("yo", "public", "rss.xml").read_text()
+        assert "<channel>" in feed
+        assert "<item>" not in feed
+        assert Path("yo", "public", "hidden_blog.html").exists()
+
+    def test_build_project_mirrors_note_sub_directories(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        notes = Path("yo", "content", "notes")
+        Path(notes, "2024").mkdir()
+        Path(notes, "drafts").mkdir()
+        Path(notes, "example_blog.md").rename(Path(notes, "2024", "example_blog.md"))
+        Path(notes, "drafts", "draft.md").write_text(
+            Path(notes, "2024", "example_blog.md").read_text()
+        )
+        config = Path("yo", "config.yml")
+        config.write_text(config.read_text() + "ignore_notes : drafts\n")
+        build_project("yo", None, jobs=1)
+        nested_page = Path("yo", "public", "2024", "example_blog.html")
+        # Static assets are linked from the site root, not the page's sub-directory
+        assert 'href="/demo.css"' in nested_page.read_text()
+        assert not Path("yo", "public", "drafts").exists()
+        assert (
+            'href="/2024/example_blog.html"'
+            in Path("yo", "public", "index.html").read_text()
+        )
+
+    def test_build_project_in_memory(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        project_files = {path: path.stat().st_mtime_ns for path in Path("yo").rglob("*")}
+        store = MemoryStore()
+        build_project("yo", None, jobs=2, store=store)
+        assert {"index.html", "rss.xml", "example_blog.html"} <= set(store)
+        assert b"<h1>This is a heading" in store.get("example_blog.html").contents
+        # Nothing written to the project directory, not even build state (.rupantar/)
+        assert {
+            path: path.stat().st_mtime_ns for path in Path("yo").rglob("*")
+        } == project_files
@@ -0,0 +1,77 @@
+from datetime import date
+from pathlib import Path
+from rupantar.sohoj.cache import NoteCache
+
+
+class TestNoteCache:
+    def test_put_and_get_many_round_trip(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"))
+        metadata = {"title": "Hi", "date": date(2024, 1, 31), "showInHome": True}
+        cache.put_many([("abc", metadata, "<p>hi</p>")])
+        assert cache.get_many(["abc", "def"]) == {"abc": (metadata, "<p>hi</p>")}
+        assert (cache.hits, cache.misses) == (1, 1)
+        cache.close()
+
+    def test_entries_persist_across_instances(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"))
+        cache.put_many([("abc", {"title": "Hi"}, "<p>hi</p>")])
+        cache.close()
+        assert "abc" in NoteCache(Path("cache.sqlite3")).get_many(["abc"])
+
+    def test_entries_of_other_versions_are_ignored(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"))
+        cache.put_many([("abc", {"title": "Hi"}, "<p>hi</p>")])
+        cache.close()
+        other_version = NoteCache(Path("cache.sqlite3"))
+        other_version.salt = "some-other-markdown2-version:"
+        assert other_version.get_many(["abc"]) == {}
+
+    def test_evict_least_recently_used(self, setup_test_directory):
+        # Room for just about two of the entries below
+        cache = NoteCache(Path("cache.sqlite3"), max_size_mb=2.5 / 1024)
+        for num in range(3):
+            cache.put_many([(f"note{num}", {}, "x" * 1024)])
+        cache.get_many(["note0"])
+        cache.close()
+
+        cache = NoteCache(Path("cache.sqlite3"))
+        assert set(cache.get_many(["note0", "note1", "note2"])) == {"note0", "note2"}
+
+    def test_touched_entries_are_not_evicted(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"), max_size_mb=2.5 / 1024)
+        for num in range(3):
+            cache.put_many([(f"note{num}", {}, "x" * 1024)])
+        assert cache.touch(["note0", "note3"]) == {"note0"}
+        cache.close()
+
+        cache = NoteCache(Path("cache.sqlite3"))
+        assert set(cache.get_many(["note0", "note1", "note2"])) == {"note0", "note2"}
+
+    def test_read_only_cache_is_left_as_is_once_closed(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"))
+        for num in range(3):
+            cache.put_many([(f"note{num}", {}, "x" * 1024)])
+        cache.close()
+        cache = NoteCache(Path("cache.sqlite3"), max_size_mb=1 / 1024, read_only=True)
+        assert cache.get_html("note2") == "x" * 1024
+        cache.close()
+
+        cache = NoteCache(Path("cache.sqlite3"))
+        assert len(cache.get_many(["note0", "note1", "note2"])) == 3
+
+    def test_get_many_without_html_and_get_html(self, setup_test_directory):
+        cache = NoteCache(Path("cache.sqlite3"))
+        cache.put_many([("abc", {"title": "Hi"}, "<p>hi</p>")])
+        assert cache.get_many(["abc"], with_html=False) == {
+            "abc": ({"title": "Hi"}, None)
+        }
+        assert cache.get_html("abc") == "<p>hi</p>"
+        assert cache.get_html("def") is None
+        cache.close()
+        assert cache.get_html("abc") is None
+
+    def test_temporary_cache_is_deleted_once_closed(self, setup_test_directory):
+        cache = NoteCache(Path("notes.sqlite3"), temporary=True)
+        cache.put_many([("abc", {"title": "Hi"}, "<p>hi</p>")])
+        cache.close()
+        assert list(Path().glob("notes.sqlite3*")) == []
@@ -0,0 +1,48 @@
+from gzip import decompress
+from os import utime
+from pathlib import Path
+from rupantar.sohoj.compressor import compress_store, compress_tree
+from rupantar.sohoj.memstore import MemoryStore
+
+
+class TestCompressTree:
+    def test_compress_tree(self, setup_test_directory):
+        Path("public", "css").mkdir(parents=True)
+        page = b"<p>Lorem ipsum dolor sit amet.</p>" * 50
+        Path("public", "index.html").write_bytes(page)
+        Path("public", "css", "style.css").write_bytes(b"p { margin: 0; }\n" * 50)
+        # Not any smaller once compressed
+        Path("public", "tiny.js").write_bytes(b"x")
+        Path("public", "logo.png").write_bytes(bytes(1000))
+        report = compress_tree("public", 6)
+        assert report.files == {"index.html.gz", "css/style.css.gz"}
+        assert (report.compressed, report.skipped) == (2, 1)
+        assert decompress(Path("public", "index.html.gz").read_bytes()) == page
+        assert not Path("public", "tiny.js.gz").exists()
+        assert not Path("public", "logo.png.gz").exists()
+
+        # Up to date ones are left alone, orphaned ones removed unless kept
+        Path("public", "css", "style.css").unlink()
+        Path("public", "shipped.js.gz").write_bytes(b"as is")
+        report = compress_tree("public", 6, keep={"shipped.js.gz"})
+        assert (report.compressed, report.unchanged) == (0, 1)
+        assert not Path("public", "css", "style.css.gz").exists()
+        assert Path("public", "shipped.js.gz").exists()
+
+        # Re-compressed once changed
+        Path("public", "index.html").write_bytes(page * 2)
+        utime(Path("public", "index.html"), (1, 1))
+        assert compress_tree("public", 6).compressed == 1
+        assert decompress(Path("public", "index.html.gz").read_bytes()) == page * 2
+
+    def test_compress_store(self):
+        store = MemoryStore()
+        store.write("index.html", b"<p>hi</p>" * 50)
+        store.write("tiny.css", b"p{}")
+        store.write("feed.xml.gz", b"orphaned")
+        report = compress_store(store, 6)
+        assert report.files == {"index.html.gz"}
+        assert decompress(store.get("index.html.gz").contents) == b"<p>hi</p>" * 50
+        assert "tiny.css.gz" not in store
+        assert "feed.xml.gz" not in store
+        assert compress_store(store, 6).unchanged == 1
@@ -0,0 +1,43 @@
+from yaml import safe_load
+from rupantar.sohoj.builder import load_front_matter, parse_front_matter
+import pytest
+
+
+FRONT_MATTERS = [
+    # As generated by `rupantar new`
+    'title : "Title"\nsubtitle : "Subtitle"\nshowInHome : False\ndate : 2024-01-31\n',
+    "title : Plain title here\ndesc : 'single quoted'\ncount : 42\nneg : -7\n",
+    "flag : yes\nother : Off\nnothing : ~\nempty_null : null\n",
+    "version : 1.5\nwhen : 2024-01-31 10:00:00\noctal : 012\n",
+    "link : see#anchor\nnote : x # comment\nurl : http://a.b/c\n",
+    "title : \"escaped \\\" quote\"\nsub : 'it''s'\n",
+    "tags :\n  - one\n  - two\nmeta : {a: 1}\n",
+    "on : key is a bool\n",
+    "title : dup\ntitle : last wins\n",
+    "showInHome :   \ntitle : empty value\n",
+    "showInHome :  \n",
+    "\n\ntitle : blank lines around\n\n",
+    "",
+    "   \n",
+]
+
+
+class TestFrontMatter:
+    @pytest.mark.parametrize("front_matter", FRONT_MATTERS)
+    def test_load_front_matter_same_as_yaml(self, front_matter):
+        assert load_front_matter(front_matter) == safe_load(front_matter)
+
+    @pytest.mark.parametrize("front_matter", FRONT_MATTERS)
+    def test_load_front_matter_same_types_as_yaml(self, front_matter):
+        loaded, expected = load_front_matter(front_matter), safe_load(front_matter)
+        if expected is not None:
+            assert [type(val) for val in loaded.values()] == [
+                type(val) for val in expected.values()
+            ]
+
+    def test_parse_front_matter_splits_contents(self):
+        metadata, contents = parse_front_matter(
+            "---\ntitle : Hi\n---\n\n# Heading\n\n--- not front matter\n"
+        )
+        assert metadata == {"title": "Hi"}
+        assert contents == "# Heading\n\n--- not front matter"
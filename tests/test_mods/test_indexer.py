@@ -0,0 +1,61 @@
+from pathlib import Path
+from shutil import rmtree
+from rupantar.sohoj.indexer import ContentIndex
+
+
+def make_notes():
+    Path("notes", "2024", "drafts").mkdir(parents=True)
+    Path("notes", "first.md").write_text("first")
+    Path("notes", "2024", "second.md").write_text("second")
+    Path("notes", "2024", "drafts", "third.md").write_text("third")
+    Path("notes", "2024", "image.png").write_bytes(b"png")
+
+
+class TestContentIndex:
+    def test_scan_finds_notes_recursively(self, setup_test_directory):
+        make_notes()
+        index = ContentIndex(Path("notes").resolve())
+        assert index.scan() == 3
+        # Sorted by path relative to the notes directory
+        assert [path.name for path in index.paths()] == [
+            "third.md",
+            "second.md",
+            "first.md",
+        ]
+        stats = index.stats()[Path("notes", "first.md").resolve()]
+        assert stats[1] == len("first")
+
+    def test_ignore_patterns(self, setup_test_directory):
+        make_notes()
+        index = ContentIndex(Path("notes").resolve(), ["drafts", "first.*"])
+        index.scan()
+        assert set(index.notes) == {"2024/second.md"}
+
+    def test_refresh_only_changed_paths(self, setup_test_directory):
+        make_notes()
+        notes_path = Path("notes").resolve()
+        index = ContentIndex(notes_path, ["drafts"])
+        index.scan()
+
+        Path("notes", "2024", "second.md").write_text("changed second")
+        Path("notes", "first.md").unlink()
+        Path("notes", "2025").mkdir()
+        Path("notes", "2025", "fourth.md").write_text("fourth")
+        Path("notes", "2024", "drafts", "fifth.md").write_text("fifth")
+        touched = index.refresh(
+            [
+                Path(notes_path, "2024", "second.md"),
+                Path(notes_path, "first.md"),
+                Path(notes_path, "2025"),
+                Path(notes_path, "2024", "drafts", "fifth.md"),
+                Path("elsewhere.md").resolve(),
+            ]
+        )
+        assert touched
+        assert set(index.notes) == {"2024/second.md", "2025/fourth.md"}
+        assert index.notes["2024/second.md"][1] == len("changed second")
+
+        rmtree(Path("notes", "2024"))
+        index.refresh([Path(notes_path, "2024")])
+        assert set(index.notes) == {"2025/fourth.md"}
+        assert not index.refresh([Path("elsewhere.md").resolve()])
@@ -0,0 +1,73 @@
+from pathlib import Path
+from rupantar.sohoj.manifest import BuildManifest
+
+
+class TestBuildManifest:
+    def test_file_hash_changes_with_contents(self, setup_test_directory):
+        note = Path("note.md")
+        note.write_text("hello")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        first_hash = manifest.file_hash(note.resolve())
+        note.write_text("hello there")
+        assert manifest.file_hash(note.resolve()) != first_hash
+
+    def test_file_hash_missing_file(self, setup_test_directory):
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        assert manifest.file_hash(Path("nope.md").resolve()) == ""
+
+    def test_is_fresh_after_save_and_reload(self, setup_test_directory):
+        Path("note.md").write_text("hello")
+        Path("note.html").write_text("<p>hello</p>")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        inputs = manifest.hash_inputs(Path("note.md").resolve())
+        manifest.record("note.html", "note.md", inputs)
+        manifest.save()
+
+        reloaded = BuildManifest(Path.cwd(), Path("manifest.json"))
+        assert reloaded.is_fresh("note.html", inputs, Path("note.html"))
+        Path("note.md").write_text("bye")
+        new_inputs = reloaded.hash_inputs(Path("note.md").resolve())
+        assert not reloaded.is_fresh("note.html", new_inputs, Path("note.html"))
+
+    def test_remove_stale_deletes_orphaned_outputs(self, setup_test_directory):
+        Path("out").mkdir()
+        Path("out", "gone.html").write_text("bye")
+        Path("out", "index.html").write_text("home")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        manifest.record("gone.html", "gone.md", {})
+        manifest.record("index.html", None, {})
+        assert manifest.remove_stale(set(), Path("out")) == ["gone.html"]
+        assert not Path("out", "gone.html").exists()
+        assert Path("out", "index.html").exists()
+
+    def test_remove_stale_removes_emptied_directories(self, setup_test_directory):
+        Path("out", "2024", "x").mkdir(parents=True)
+        Path("out", "2024", "x", "deep.html").write_text("bye")
+        Path("out", "2024", "kept.html").write_text("hi")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        manifest.record("2024/x/deep.html", "2024/x/deep.md", {})
+        manifest.remove_stale(set(), Path("out"))
+        assert not Path("out", "2024", "x").exists()
+        assert Path("out", "2024", "kept.html").exists()
+
+        Path("out", "2024", "kept.html").unlink()
+        manifest.record("2024/gone.html", "2024/gone.md", {})
+        manifest.remove_stale(set(), Path("out"))
+        assert not Path("out", "2024").exists()
+        assert Path("out").is_dir()
+
+    def test_record_etags_only_hashes_changed(self, setup_test_directory):
+        Path("public", "css").mkdir(parents=True)
+        Path("public", "index.html").write_text("<p>hi</p>")
+        Path("public", "css", "style.css").write_text("p {}")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        assert manifest.record_etags(Path.cwd() / "public") == 2
+        assert set(manifest.etags) == {"index.html", "css/style.css"}
+        etag = manifest.etags["index.html"][2]
+
+        Path("public", "index.html").write_text("<p>bye</p>")
+        Path("public", "css", "style.css").unlink()
+        assert manifest.record_etags(Path.cwd() / "public") == 1
+        assert set(manifest.etags) == {"index.html"}
+        assert manifest.etags["index.html"][2] != etag
+        assert manifest.record_etags(Path.cwd() / "public") == 0
@@ -0,0 +1,35 @@
+from os import utime
+from pathlib import Path
+from rupantar.sohoj.memstore import MemoryStore
+
+
+class TestMemoryStore:
+    def test_load_tree_only_reads_new_or_changed(self, setup_test_directory):
+        Path("static", "img").mkdir(parents=True)
+        Path("static", "style.css").write_text("body {}")
+        Path("static", "img", "logo.svg").write_text("<svg/>")
+        store = MemoryStore()
+        files = store.load_tree("static")
+        assert files == {"style.css", "img/logo.svg"}
+        logo = store.get("img/logo.svg")
+        assert logo.contents == b"<svg/>"
+
+        Path("static", "style.css").write_text("body { margin: 0 }")
+        utime(Path("static", "style.css"), (1, 1))
+        Path("static", "img", "logo.svg").unlink()
+        assert store.load_tree("static", files) == {"style.css"}
+        assert store.get("style.css").contents == b"body { margin: 0 }"
+        assert "img/logo.svg" not in store
+
+    def test_persist_mirrors_store(self, setup_test_directory):
+        store = MemoryStore()
+        store.write("index.html", b"<p>hi</p>")
+        store.write("posts/a.html", b"<p>a</p>")
+        Path("public").mkdir()
+        Path("public", "stale.html").write_text("old")
+        assert store.persist("public") == 2
+        assert Path("public", "posts", "a.html").read_bytes() == b"<p>a</p>"
+        assert not Path("public", "stale.html").exists()
+
+        assert store.prune({"index.html"}) == 1
+        assert list(store) == ["index.html"]
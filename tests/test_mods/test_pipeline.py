@@ -0,0 +1,50 @@
+import time
+from random import random
+from threading import Lock
+from rupantar.sohoj.pipeline import BackgroundWriter, prefetch
+import pytest
+
+
+class TestPipeline:
+    # prefetch()
+
+    def test_prefetch_keeps_order(self):
+        def slow_square(num):
+            time.sleep(random() / 100)
+            return num * num
+
+        results = list(prefetch(slow_square, range(20), threads=4, depth=5))
+        assert results == [(num, num * num) for num in range(20)]
+
+    def test_prefetch_stays_bounded(self):
+        started = []
+
+        def record(num):
+            started.append(num)
+            return num
+
+        for num, _ in prefetch(record, range(50), threads=2, depth=3):
+            # Never more than `depth` items ahead of the consumer
+            assert len(started) <= num + 3
+
+    # BackgroundWriter
+
+    def test_background_writer_runs_every_call(self):
+        done, lock = [], Lock()
+
+        def append(num):
+            with lock:
+                done.append(num)
+
+        with BackgroundWriter(threads=3, depth=2) as writer:
+            for num in range(30):
+                writer.submit(append, num)
+        assert sorted(done) == list(range(30))
+
+    def test_background_writer_reraises_errors(self):
+        def fail():
+            raise OSError("disk full")
+
+        with pytest.raises(OSError, match="disk full"):
+            with BackgroundWriter(threads=1) as writer:
+                writer.submit(fail)
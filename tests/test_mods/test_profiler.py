@@ -0,0 +1,62 @@
+from json import loads
+from pathlib import Path
+from rupantar.sohoj.builder import build_project
+from rupantar.sohoj.creator import create_project
+from rupantar.sohoj.profiler import (
+    PHASES,
+    BuildProfile,
+    get_active_profile,
+    percentile,
+    summarize,
+    timed,
+)
+
+
+class TestBuildProfile:
+    def test_summarize(self):
+        assert percentile([], 0.5) == 0.0
+        assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+        assert summarize([3.0, 1.0, 2.0]) == {
+            "count": 3,
+            "total": 6.0,
+            "p50": 2.0,
+            "p95": 3.0,
+            "max": 3.0,
+        }
+
+    def test_slowest_notes(self):
+        profile = BuildProfile()
+        for num in range(25):
+            profile.add("markdown", num / 1000, f"note{num}.html")
+            profile.add("render", num / 1000, f"note{num}.html")
+        profile.add("config", 0.5)
+        summary = profile.summary()
+        assert summary["notes"]["count"] == 25
+        assert summary["notes"]["max"] == 0.048
+        assert [slow["note"] for slow in summary["slowest_notes"][:2]] == [
+            "note24.html",
+            "note23.html",
+        ]
+        assert len(summary["slowest_notes"]) == 20
+        assert "Slowest 20 notes:" in profile.format_table()
+
+    def test_not_timed_unless_active(self):
+        assert get_active_profile() is None
+        with timed("markdown", "note.html"):
+            pass
+
+    def test_build_project_profile(self, setup_test_directory):
+        create_project("yo", [None, None, None])
+        for jobs in (1, 2):
+            profile = BuildProfile()
+            build_project("yo", None, jobs=jobs, use_cache=False, profile=profile)
+            summary = profile.summary()
+            assert get_active_profile() is None
+            assert summary["wall_time"] > 0
+            for phase in ("config", "assets", "markdown", "render", "write", "finish"):
+                assert summary["phases"][phase]["count"] >= 1
+            assert [slow["note"] for slow in summary["slowest_notes"]] == [
+                "example_blog.html"
+            ]
+        profile.write_json("profile.json")
+        assert set(loads(Path("profile.json").read_text())["phases"]) == set(PHASES)
@@ -0,0 +1,260 @@
+from gzip import compress
+from http.client import HTTPConnection
+from pathlib import Path
+from threading import Thread
+from rupantar.sohoj.manifest import BuildManifest
+from rupantar.sohoj.memstore import MemoryStore
+from rupantar.sohoj.server import (
+    LIVE_RELOAD_PATH,
+    LIVE_RELOAD_SCRIPT,
+    ReloadBroadcaster,
+    accepts_gzip,
+    create_web_server,
+    inject_live_reload,
+    is_not_modified,
+    parse_byte_ranges,
+)
+
+
+class TestWebServer:
+    def test_persistent_connections(self, setup_test_directory):
+        Path("index.html").write_text("<p>hi</p>")
+        with create_web_server("127.0.0.1", 0, ".", workers=2) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            connection = HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+            responses, sockets = [], []
+            for _ in range(2):
+                connection.request("GET", "/index.html")
+                response = connection.getresponse()
+                responses.append((response.version, response.read()))
+                sockets.append(connection.sock)
+            assert responses == [(11, b"<p>hi</p>")] * 2
+            # Same connection for both requests
+            assert sockets[0] is sockets[1]
+            connection.close()
+            httpd.shutdown()
+
+    def test_serve_from_memory(self, setup_test_directory):
+        store = MemoryStore()
+        store.write("index.html", b"<body>home</body>")
+        store.write("posts/index.html", b"<body>posts</body>")
+        with create_web_server(
+            "127.0.0.1", 0, ".", ReloadBroadcaster(), workers=2, store=store
+        ) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            connection = HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+            statuses = {}
+            for path in ("/", "/posts", "/../index.html", "/nope.html"):
+                connection.request("GET", path)
+                response = connection.getresponse()
+                statuses[path] = (response.status, response.read())
+            connection.close()
+            httpd.shutdown()
+        assert statuses["/"] == (200, inject_live_reload(b"<body>home</body>"))
+        assert statuses["/posts"] == (301, b"")
+        assert statuses["/../index.html"][0] == 200
+        assert statuses["/nope.html"][0] == 404
+
+    def test_event_streams_do_not_hold_workers(self, setup_test_directory):
+        Path("index.html").write_text("<body>hi</body>")
+        broadcaster = ReloadBroadcaster()
+        with create_web_server("127.0.0.1", 0, ".", broadcaster, workers=2) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            port = httpd.server_address[1]
+            streams = []
+            # More open pages than there are workers
+            for _ in range(4):
+                stream = HTTPConnection("127.0.0.1", port, timeout=5)
+                stream.request("GET", LIVE_RELOAD_PATH)
+                streams.append(stream.getresponse())
+                assert streams[-1].status == 200
+            connection = HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/index.html")
+            response = connection.getresponse()
+            assert (response.status, response.read()) == (
+                200,
+                inject_live_reload(b"<body>hi</body>"),
+            )
+            broadcaster.publish()
+            assert streams[0].readline() == b"event: reload\n"
+            connection.close()
+            broadcaster.close()
+            for stream in streams:
+                stream.close()
+            httpd.shutdown()
+
+    def test_serve_pre_compressed(self, setup_test_directory):
+        Path("style.css").write_bytes(b"p { margin: 0; }\n" * 50)
+        Path("style.css.gz").write_bytes(compress(Path("style.css").read_bytes()))
+        with create_web_server("127.0.0.1", 0, ".", workers=2) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            connection = HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+            responses = {}
+            for encoding in ("gzip, deflate", "identity"):
+                connection.request(
+                    "GET", "/style.css", headers={"Accept-Encoding": encoding}
+                )
+                response = connection.getresponse()
+                responses[encoding] = (
+                    response.getheader("Content-Encoding"),
+                    response.getheader("Vary"),
+                    response.getheader("Content-Type"),
+                    response.read(),
+                )
+            connection.close()
+            httpd.shutdown()
+        assert responses["gzip, deflate"] == (
+            "gzip",
+            "Accept-Encoding",
+            "text/css",
+            Path("style.css.gz").read_bytes(),
+        )
+        assert responses["identity"] == (
+            None,
+            "Accept-Encoding",
+            "text/css",
+            Path("style.css").read_bytes(),
+        )
+
+    def test_conditional_requests(self, setup_test_directory):
+        Path("public").mkdir()
+        Path("public", "index.html").write_text("<p>hi</p>")
+        Path("public", "logo.svg").write_text("<svg/>")
+        manifest = BuildManifest(Path.cwd(), Path("manifest.json"))
+        manifest.record_etags(Path.cwd() / "public")
+        policies = (("*.html", "no-cache"), ("*", "public, max-age=3600"))
+        with create_web_server(
+            "127.0.0.1",
+            0,
+            "public",
+            workers=2,
+            etags=manifest.etags,
+            cache_control=policies,
+        ) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            connection = HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+
+            def get(path, **headers):
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                return response, response.read()
+
+            response, body = get("/")
+            etag = response.getheader("ETag")
+            assert etag == f'"{manifest.etags["index.html"][2]}"'
+            assert response.getheader("Cache-Control") == "no-cache"
+            response, body = get("/", **{"If-None-Match": f'"nope", {etag}'})
+            assert (response.status, body) == (304, b"")
+            assert response.getheader("ETag") == etag
+            response, body = get(
+                "/logo.svg",
+                **{"If-Modified-Since": response.getheader("Last-Modified")},
+            )
+            assert (response.status, body) == (304, b"")
+            assert response.getheader("Cache-Control") == "public, max-age=3600"
+            # Changed since it was hashed, so no ETag
+            Path("public", "index.html").write_text("<p>bye</p>")
+            response, body = get("/", **{"If-None-Match": etag})
+            assert (response.status, body) == (200, b"<p>bye</p>")
+            assert response.getheader("ETag") is None
+            connection.close()
+            httpd.shutdown()
+
+    def test_range_requests(self, setup_test_directory, mocker):
+        video = bytes(range(256)) * 40
+        Path("video.mp4").write_bytes(video)
+        with create_web_server("127.0.0.1", 0, ".", workers=2) as httpd:
+            Thread(target=httpd.serve_forever, daemon=True).start()
+            connection = HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+
+            def get(**headers):
+                connection.request("GET", "/video.mp4", headers=headers)
+                response = connection.getresponse()
+                return response, response.read()
+
+            sendfile = mocker.spy(httpd.socket.__class__, "sendfile")
+            response, body = get()
+            assert (response.status, body) == (200, video)
+            assert response.getheader("Accept-Ranges") == "bytes"
+            assert sendfile.call_count == 1
+
+            response, body = get(Range="bytes=100-199")
+            assert (response.status, body) == (206, video[100:200])
+            assert response.getheader("Content-Range") == f"bytes 100-199/{len(video)}"
+
+            response, body = get(Range="bytes=0-9, -5")
+            content_type = response.getheader("Content-Type")
+            assert response.status == 206
+            assert content_type.startswith("multipart/byteranges; boundary=")
+            boundary = content_type.split("=")[1].encode()
+            parts = body.split(b"--" + boundary)
+            assert parts[1].endswith(b"\r\n\r\n" + video[:10] + b"\r\n")
+            assert (
+                f"Content-Range: bytes {len(video) - 5}-{len(video) - 1}".encode()
+                in parts[2]
+            )
+            assert parts[2].endswith(video[-5:] + b"\r\n")
+            assert parts[3] == b"--\r\n"
+
+            response, body = get(Range=f"bytes={len(video)}-")
+            assert (response.status, body) == (416, b"")
+            assert response.getheader("Content-Range") == f"bytes */{len(video)}"
+            # Ranges of a since changed file are not sent
+            response, body = get(Range="bytes=0-9", **{"If-Range": '"stale"'})
+            assert (response.status, body) == (200, video)
+            connection.close()
+            httpd.shutdown()
+
+    def test_parse_byte_ranges(self):
+        assert parse_byte_ranges("bytes=0-499", 1000) == [(0, 499)]
+        assert parse_byte_ranges("bytes=500-, -100", 1000) == [(500, 999), (900, 999)]
+        assert parse_byte_ranges("bytes=900-2000", 1000) == [(900, 999)]
+        assert parse_byte_ranges("bytes=1000-", 1000) == []
+        assert parse_byte_ranges("bytes=5-1", 1000) is None
+        assert parse_byte_ranges("items=0-1", 1000) is None
+        assert parse_byte_ranges("bytes=" + ",".join(["0-1"] * 17), 1000) is None
+
+    def test_is_not_modified(self):
+        last_modified = "Sun, 06 Nov 1994 08:49:37 GMT"
+        assert is_not_modified('W/"a", "b"', None, '"a"', 0)
+        assert is_not_modified("*", None, '"a"', 0)
+        assert not is_not_modified('"b"', last_modified, '"a"', 0)
+        assert is_not_modified(None, last_modified, None, 784111777.5)
+        assert not is_not_modified(None, last_modified, None, 784111778)
+        assert not is_not_modified(None, "yesterday", None, 0)
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip("gzip, deflate, br")
+        assert accepts_gzip("br;q=1.0, *;q=0.5")
+        assert not accepts_gzip("*, gzip;q=0")
+        assert not accepts_gzip("identity")
+        assert not accepts_gzip(None)
+
+
+class TestLiveReload:
+    def test_inject_live_reload_before_body_end(self):
+        page = inject_live_reload(b"<html><body><p>hi</p></body></html>")
+        assert page == b"<html><body><p>hi</p>" + LIVE_RELOAD_SCRIPT + b"</body></html>"
+        assert inject_live_reload(b"<p>hi</p>") == b"<p>hi</p>" + LIVE_RELOAD_SCRIPT
+
+    def test_broadcaster_wakes_every_client(self):
+        broadcaster = ReloadBroadcaster()
+        received = []
+        clients = [
+            Thread(target=lambda: received.append(broadcaster.wait(0, 5)))
+            for _ in range(3)
+        ]
+        for client in clients:
+            client.start()
+        broadcaster.publish("css")
+        for client in clients:
+            client.join()
+        assert received == [(1, "css")] * 3
+
+    def test_broadcaster_missed_events_reload(self):
+        broadcaster = ReloadBroadcaster()
+        assert broadcaster.wait(0, 0) is None
+        broadcaster.publish("reload")
+        broadcaster.publish("css")
+        assert broadcaster.wait(0, 0) == (2, "reload")
+        assert broadcaster.wait(1, 0) == (2, "css")
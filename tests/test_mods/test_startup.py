@@ -0,0 +1,58 @@
+from os import environ
+from re import compile as re_compile
+from subprocess import run
+from sys import executable
+import pytest
+from rupantar.sohoj.creator import create_project
+
+# A line of `python -X importtime` output: "import time: <self us> | <cumulative us> | <module>"
+IMPORT_TIME_LINE = re_compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+# For each command: dependencies it must not import, and the most time (ms) it may spend importing modules,
+# on top of what the interpreter imports on it's own. Budgets are a few times what each command takes, so as to
+# only catch the likes of a heavy dependency being imported at start up again.
+COMMANDS = {
+    "-v": (["jinja2", "markdown2", "yaml", "watchfiles", "http.server"], 200),
+    "init -s other": (["jinja2", "markdown2", "yaml", "watchfiles", "http.server"], 150),
+    "new yo note": (["jinja2", "markdown2", "yaml", "watchfiles", "http.server"], 150),
+    "rollback yo": (["jinja2", "markdown2", "watchfiles", "http.server"], 250),
+    "build yo -j 1": (["watchfiles", "http.server"], 600),
+    "serve missing": ([], 800),
+}
+
+
+def get_import_times(code):
+    result = run(
+        [executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        # Keep the logs of the commands run out of the actual data directory
+        env={**environ, "XDG_DATA_HOME": "data"},
+    )
+    return {
+        match.group(2): int(match.group(1))
+        for match in map(IMPORT_TIME_LINE.match, result.stderr.splitlines())
+        if match
+    }
+
+
+class TestStartupImports:
+    @pytest.mark.parametrize("command", COMMANDS)
+    def test_command_imports_within_budget(self, setup_test_directory, command):
+        create_project("yo", [None, None, None])
+        forbidden, budget_ms = COMMANDS[command]
+        imports = get_import_times(
+            "from rupantar.start import main\n"
+            "try:\n"
+            f"    main({command.split()!r})\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+        assert "rupantar.start" in imports
+        assert [module for module in forbidden if module in imports] == []
+
+        interpreter_imports = get_import_times("pass")
+        import_time_ms = (
+            sum(imports.values()) - sum(interpreter_imports.values())
+        ) / 1000
+        assert import_time_ms < budget_ms
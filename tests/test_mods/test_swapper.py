@@ -0,0 +1,51 @@
+from pathlib import Path
+import pytest
+from rupantar.sohoj.swapper import (
+    get_live_generation,
+    get_manifest_name,
+    get_staging_generation,
+    rollback,
+    swap_in,
+)
+
+
+def build_generation(home_path: Path, contents: str) -> Path:
+    generation = get_staging_generation(home_path)
+    generation.mkdir(exist_ok=True)
+    Path(generation, "index.html").write_text(contents)
+    return generation
+
+
+class TestSwapper:
+    def test_swap_in_alternates_generations(self, setup_test_directory):
+        home_path = Path.cwd() / "public"
+        first = build_generation(home_path, "first")
+        swap_in(home_path, first)
+        assert home_path.is_symlink()
+        assert Path(home_path, "index.html").read_text() == "first"
+
+        second = build_generation(home_path, "second")
+        assert second != first
+        swap_in(home_path, second)
+        assert get_live_generation(home_path) == second
+        assert Path(home_path, "index.html").read_text() == "second"
+        assert get_manifest_name(home_path, home_path) == "manifest-b.json"
+
+    def test_existing_output_directory_becomes_previous_generation(
+        self, setup_test_directory
+    ):
+        home_path = Path.cwd() / "public"
+        home_path.mkdir()
+        Path(home_path, "index.html").write_text("plain")
+        assert get_manifest_name(home_path, home_path) == "manifest.json"
+
+        generation = build_generation(home_path, "atomic")
+        swap_in(home_path, generation)
+        assert Path(home_path, "index.html").read_text() == "atomic"
+        assert rollback(home_path) != generation
+        assert Path(home_path, "index.html").read_text() == "plain"
+
+    def test_rollback_without_previous_generation(self, setup_test_directory):
+        home_path = Path.cwd() / "public"
+        with pytest.raises(FileNotFoundError):
+            rollback(home_path)
@@ -0,0 +1,65 @@
+from os import utime
+from pathlib import Path
+import pytest
+from rupantar.sohoj.syncer import prune_tree, sync_tree
+
+
+def make_static():
+    Path("static", "img").mkdir(parents=True)
+    Path("static", "style.css").write_text("body {}")
+    Path("static", "img", "logo.svg").write_text("<svg/>")
+
+
+class TestSyncTree:
+    def test_only_new_or_changed_files_are_copied(self, setup_test_directory):
+        make_static()
+        report = sync_tree("static", "public")
+        assert report.files == {"style.css", "img/logo.svg"}
+        assert report.copied == 2
+        assert Path("public", "img", "logo.svg").read_text() == "<svg/>"
+
+        Path("static", "style.css").write_text("body { margin: 0 }")
+        report = sync_tree("static", "public", report.files)
+        assert (report.copied, report.unchanged) == (1, 1)
+        assert Path("public", "style.css").read_text() == "body { margin: 0 }"
+
+    def test_deleted_files_are_removed(self, setup_test_directory):
+        make_static()
+        previous = sync_tree("static", "public").files
+        Path("public", "index.html").write_text("generated")
+        Path("static", "style.css").unlink()
+        report = sync_tree("static", "public", previous)
+        assert report.removed == 1
+        assert not Path("public", "style.css").exists()
+        assert Path("public", "index.html").exists()
+
+    def test_checksum_skips_touched_files(self, setup_test_directory):
+        make_static()
+        previous = sync_tree("static", "public").files
+        utime(Path("static", "style.css"), (0, 0))
+        report = sync_tree("static", "public", previous, checksum=True)
+        assert report.copied == 0
+
+    def test_hardlink_mode(self, setup_test_directory):
+        make_static()
+        sync_tree("static", "public", mode="hardlink")
+        source_stats = Path("static", "style.css").stat()
+        dest_stats = Path("public", "style.css").stat()
+        assert (dest_stats.st_ino, dest_stats.st_dev) == (
+            source_stats.st_ino,
+            source_stats.st_dev,
+        )
+        assert sync_tree("static", "public", mode="hardlink").copied == 0
+
+    def test_unknown_mode(self, setup_test_directory):
+        with pytest.raises(ValueError):
+            sync_tree("static", "public", mode="teleport")
+
+
+class TestPruneTree:
+    def test_prune_tree(self, setup_test_directory):
+        make_static()
+        Path("static", "old").mkdir()
+        Path("static", "old", "page.html").write_text("stale")
+        assert prune_tree("static", {"style.css"}) == 2
+        assert [path.name for path in Path("static").iterdir()] == ["style.css"]